@@ -0,0 +1,279 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: backends.py
+
+Selection of the implementations used to read and write serialised profiles.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from rtsprofile.exceptions import InvalidBackendError
+
+
+# The modules that implement the backends are imported when a backend of
+# their format is first used, so that programs that only use one format, or
+# none, do not pay for importing the others.
+
+
+##############################################################################
+## YAML backends
+
+# The YAML backends, by name, as (loader, dumper) pairs, or None until the
+# first use. Both produce the same objects and the same output; libyaml is
+# several times faster, but is only present if PyYAML was built against it.
+_yaml_backends = None
+
+
+def _get_yaml_backends():
+    # Import PyYAML and find the backends it provides
+    global _yaml_backends
+    if _yaml_backends is None:
+        import yaml
+        backends = {'python': (yaml.SafeLoader, yaml.SafeDumper)}
+        if hasattr(yaml, 'CSafeLoader') and hasattr(yaml, 'CSafeDumper'):
+            backends['libyaml'] = (yaml.CSafeLoader, yaml.CSafeDumper)
+        _yaml_backends = backends
+    return _yaml_backends
+
+# The backend used when none is given. 'auto' uses libyaml if it is available.
+_default_yaml_backend = 'auto'
+
+
+def available_yaml_backends():
+    '''Returns the names of the YAML backends that can be used, fastest first.
+
+    Example:
+    >>> 'python' in available_yaml_backends()
+    True
+    '''
+    return [b for b in ('libyaml', 'python') if b in _get_yaml_backends()]
+
+
+def get_yaml_backend(backend=None):
+    '''Returns the name of the YAML backend that will be used.
+
+    @param backend The name of a backend, 'auto', or None to use the default
+    set by @ref set_yaml_backend.
+    @raises InvalidBackendError
+
+    Example:
+    >>> get_yaml_backend('python')
+    'python'
+    >>> get_yaml_backend('auto') == available_yaml_backends()[0]
+    True
+    >>> get_yaml_backend('fortran')
+    Traceback (most recent call last):
+    ...
+    InvalidBackendError: fortran
+    '''
+    if backend is None:
+        backend = _default_yaml_backend
+    if backend == 'auto':
+        if 'libyaml' in _get_yaml_backends():
+            return 'libyaml'
+        return 'python'
+    if backend not in _get_yaml_backends():
+        raise InvalidBackendError(backend)
+    return backend
+
+
+def set_yaml_backend(backend):
+    '''Sets the YAML backend used when none is given.
+
+    @param backend 'libyaml', 'python' or 'auto'. 'auto' uses libyaml if it is
+    available and the pure-Python implementation otherwise.
+    @raises InvalidBackendError
+
+    Example:
+    >>> set_yaml_backend('python')
+    >>> get_yaml_backend()
+    'python'
+    >>> set_yaml_backend('auto')
+    '''
+    global _default_yaml_backend
+    get_yaml_backend(backend)
+    _default_yaml_backend = backend
+
+
+def yaml_load(stream, backend=None):
+    '''Loads a YAML document from a string or file object using only the
+    safe subset of YAML.
+
+    @param backend The name of the backend to use. See @ref get_yaml_backend.
+    @raises InvalidBackendError
+
+    Example:
+    >>> yaml_load('a: [1, 2]', backend='python')
+    {'a': [1, 2]}
+    '''
+    import yaml
+    loader = _get_yaml_backends()[get_yaml_backend(backend)][0]
+    return yaml.load(stream, Loader=loader)
+
+
+def yaml_dump(data, backend=None):
+    '''Dumps an object to a YAML string using only the safe subset of YAML.
+
+    @param backend The name of the backend to use. See @ref get_yaml_backend.
+    @raises InvalidBackendError
+
+    Example:
+    >>> yaml_dump({'a': 1}, backend='python')
+    'a: 1\\n'
+    '''
+    import yaml
+    dumper = _get_yaml_backends()[get_yaml_backend(backend)][1]
+    return yaml.dump(data, Dumper=dumper)
+
+
+
+##############################################################################
+## JSON backends
+
+def _compact_json_dumps(module):
+    # The dumps function of a module with the interface of json, writing
+    # without spaces
+    return lambda data: module.dumps(data, separators=(',', ':'))
+
+
+# The JSON backends, by name, as (loads, dumps) pairs, or None until the
+# first use. The standard library's json module is always present; the others
+# are used if they are installed. All produce the same objects, but the text
+# they write may differ in formatting.
+_json_backends = None
+
+
+def _get_json_backends():
+    # Import the JSON modules that are installed
+    global _json_backends
+    if _json_backends is not None:
+        return _json_backends
+    import json
+    backends = {'json': (json.loads, _compact_json_dumps(json))}
+    try:
+        import orjson
+        backends['orjson'] = (orjson.loads,
+                              lambda data: orjson.dumps(data).decode('utf-8'))
+    except ImportError:
+        pass
+    try:
+        import ujson
+        backends['ujson'] = (ujson.loads, ujson.dumps)
+    except ImportError:
+        pass
+    try:
+        import simplejson
+        backends['simplejson'] = (simplejson.loads,
+                                  _compact_json_dumps(simplejson))
+    except ImportError:
+        pass
+    _json_backends = backends
+    return _json_backends
+
+# The order in which backends are chosen by 'auto', fastest first
+_json_backend_order = ('orjson', 'ujson', 'simplejson', 'json')
+
+# The backend used when none is given
+_default_json_backend = 'auto'
+
+
+def available_json_backends():
+    '''Returns the names of the JSON backends that can be used, fastest first.
+
+    Example:
+    >>> available_json_backends()[-1]
+    'json'
+    '''
+    return [b for b in _json_backend_order if b in _get_json_backends()]
+
+
+def get_json_backend(backend=None):
+    '''Returns the name of the JSON backend that will be used.
+
+    @param backend The name of a backend, 'auto', or None to use the default
+    set by @ref set_json_backend.
+    @raises InvalidBackendError
+
+    Example:
+    >>> get_json_backend('json')
+    'json'
+    >>> get_json_backend('auto') == available_json_backends()[0]
+    True
+    >>> get_json_backend('fortran')
+    Traceback (most recent call last):
+    ...
+    InvalidBackendError: fortran
+    '''
+    if backend is None:
+        backend = _default_json_backend
+    if backend == 'auto':
+        return available_json_backends()[0]
+    if backend not in _get_json_backends():
+        raise InvalidBackendError(backend)
+    return backend
+
+
+def set_json_backend(backend):
+    '''Sets the JSON backend used when none is given.
+
+    @param backend 'orjson', 'ujson', 'simplejson', 'json' or 'auto'. 'auto'
+    uses the fastest backend that is installed.
+    @raises InvalidBackendError
+
+    Example:
+    >>> set_json_backend('json')
+    >>> get_json_backend()
+    'json'
+    >>> set_json_backend('auto')
+    '''
+    global _default_json_backend
+    get_json_backend(backend)
+    _default_json_backend = backend
+
+
+def json_load(stream, backend=None):
+    '''Loads a JSON document from a string or file object.
+
+    @param backend The name of the backend to use. See @ref get_json_backend.
+    @raises InvalidBackendError
+    @raises ValueError if the document is not valid JSON.
+
+    Example:
+    >>> json_load('{"a": [1, 2]}', backend='json') == {'a': [1, 2]}
+    True
+    '''
+    if hasattr(stream, 'read'):
+        stream = stream.read()
+    return _get_json_backends()[get_json_backend(backend)][0](stream)
+
+
+def json_dump(data, backend=None):
+    '''Dumps an object to a compact JSON string.
+
+    @param backend The name of the backend to use. See @ref get_json_backend.
+    @raises InvalidBackendError
+
+    Example:
+    >>> json_dump({'a': [1, 2]}, backend='json')
+    '{"a":[1,2]}'
+    '''
+    return _get_json_backends()[get_json_backend(backend)][1](data)
+
+
+# vim: tw=79
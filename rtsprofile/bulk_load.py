@@ -0,0 +1,369 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bulk_load.py
+
+Parallel loading of many RtsProfile files.
+
+Can also be run as a program to check that a set of files and directories of
+files can be loaded:
+
+    python -m rtsprofile.bulk_load [options] <file or directory> ...
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import multiprocessing
+import optparse
+import os
+import sys
+import traceback
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from rtsprofile.exceptions import RtsProfileError
+from rtsprofile.rts_profile import RtsProfile
+
+
+##############################################################################
+## LoadResult object
+
+class LoadResult(object):
+    '''The result of loading one file with @ref bulk_load.'''
+
+    __slots__ = ('_path', '_profile', '_error', '_traceback')
+
+    def __init__(self, path, profile=None, error=None, traceback=None):
+        '''Constructor.
+
+        @param path The path of the file.
+        @param profile The RtsProfile loaded from the file, if it was kept.
+        @param error A description of the error that prevented the file from
+        loading, or None.
+        @param traceback The formatted traceback of the error, or None.
+
+        '''
+        self._path = path
+        self._profile = profile
+        self._error = error
+        self._traceback = traceback
+
+    def __str__(self):
+        if self.ok:
+            return 'OK {0}'.format(self.path)
+        return 'ERROR {0}: {1}'.format(self.path, self.error)
+
+    @property
+    def path(self):
+        '''The path of the file.'''
+        return self._path
+
+    @property
+    def profile(self):
+        '''The RtsProfile loaded from the file.
+
+        None if the file failed to load, or if the profiles were not kept.
+
+        '''
+        return self._profile
+
+    @property
+    def error(self):
+        '''A description of the error that prevented the file from loading, or
+        None if it loaded.
+
+        '''
+        return self._error
+
+    @property
+    def traceback(self):
+        '''The formatted traceback of the error, or None if the file
+        loaded.
+
+        '''
+        return self._traceback
+
+    @property
+    def ok(self):
+        '''True if the file loaded without error.'''
+        return self._error is None
+
+
+##############################################################################
+## Public API functions
+
+PROFILE_EXTENSIONS = ('.xml', '.yaml', '.yml')
+
+
+def find_profiles(paths):
+    '''Generate the paths of the profile files in a list of files and
+    directories.
+
+    Files are generated as given. Directories are searched recursively for
+    files with an extension in PROFILE_EXTENSIONS, in sorted order.
+
+    Example:
+    >>> list(find_profiles(['test']))
+    ['test/rtsystem.xml', 'test/rtsystem.yaml']
+    '''
+    for p in paths:
+        if not os.path.isdir(p):
+            yield p
+            continue
+        for dirpath, dirnames, filenames in os.walk(p):
+            dirnames.sort()
+            for f in sorted(filenames):
+                if os.path.splitext(f)[1].lower() in PROFILE_EXTENSIONS:
+                    yield os.path.join(dirpath, f)
+
+
+def bulk_load(paths, processes=None, chunk_size=1, max_in_flight=None,
+              ordered=False, validate=True, keep_profiles=True,
+              cache_dir=None):
+    '''Load many profile files in parallel using a pool of processes.
+
+    The files are split into chunks, and each chunk is loaded by one worker
+    process. Results are generated as chunks finish, so the caller can
+    process them while the remaining files are loaded. A file that fails to
+    load gives a result holding the error rather than stopping the load.
+
+    @param paths An iterable of file paths. It is consumed only as fast as
+    chunks are handed out, so it may be a generator over a very large set of
+    files. Files with a .yaml or .yml extension are loaded as YAML, and all
+    others as XML.
+    @param processes The number of worker processes. Defaults to the number
+    of CPUs.
+    @param chunk_size The number of files given to a worker at a time. Larger
+    chunks lower the overhead for small files.
+    @param max_in_flight The maximum number of chunks handed out but not yet
+    returned to the caller. This bounds the memory used by waiting results.
+    Defaults to twice the number of processes.
+    @param ordered If True, results are generated in the order of paths.
+    Otherwise they are generated as soon as they are available.
+    @param validate If False, the files are trusted and attributes are not
+    validated. See @ref RtsProfile.parse_from_xml.
+    @param keep_profiles If False, the loaded profiles are not sent back from
+    the workers, which is faster when only checking that files load.
+    @param cache_dir If not None, the files are loaded through a @ref
+    SnapshotCache in this directory.
+    @return A generator of @ref LoadResult objects, one per file.
+
+    Example:
+    >>> paths = ['test/rtsystem.xml', 'test/no_such_file.xml',
+    ...          'test/rtsystem.yaml']
+    >>> results = list(bulk_load(paths, processes=2, ordered=True))
+    >>> [r.path for r in results] == paths
+    True
+    >>> [r.ok for r in results]
+    [True, False, True]
+    >>> print(results[1].error)
+    IOError: [Errno 2] No such file or directory: 'test/no_such_file.xml'
+    >>> str(results[0].profile) == str(RtsProfile(xml_spec=open(paths[0]).read()))
+    True
+    '''
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if max_in_flight is None:
+        max_in_flight = 2 * processes
+    options = (validate, keep_profiles, cache_dir)
+    chunks = _chunks(paths, chunk_size)
+    done = queue.Queue()
+    pool = multiprocessing.Pool(processes)
+    finished = False
+    try:
+        in_flight = {}
+        exhausted = False
+        pending = {}
+        next_index = 0
+        while True:
+            # Keep up to max_in_flight chunks in the pool. When ordered, chunks
+            # held back waiting for an earlier chunk count as in flight.
+            while not exhausted and \
+                    len(in_flight) + len(pending) < max_in_flight:
+                try:
+                    index, chunk = next(chunks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[index] = (chunk, pool.apply_async(_load_chunk,
+                        (index, chunk, options), callback=done.put))
+            if not in_flight:
+                break
+            index, results = _wait_for_chunk(done, in_flight)
+            del in_flight[index]
+            if not ordered:
+                for r in results:
+                    yield r
+                continue
+            pending[index] = results
+            while next_index in pending:
+                for r in pending.pop(next_index):
+                    yield r
+                next_index += 1
+        finished = True
+    finally:
+        if finished:
+            pool.close()
+        else:
+            # The caller stopped early or an error occurred
+            pool.terminate()
+        pool.join()
+
+
+def main(argv):
+    '''Load the profiles given on the command line and report on each.
+
+    @return 0 if all files loaded, 1 if any failed to load.
+
+    '''
+    parser = optparse.OptionParser(
+            usage='%prog [options] <file or directory> ...',
+            description='Load RtsProfile files in parallel and report any '
+                        'that fail to load. Directories are searched '
+                        'recursively for {0} files.'.format(
+                            '/'.join(PROFILE_EXTENSIONS)))
+    parser.add_option('-j', '--jobs', dest='processes', type='int',
+                      default=None,
+                      help='Number of worker processes [Default: CPU count]')
+    parser.add_option('-c', '--chunk-size', dest='chunk_size', type='int',
+                      default=1, help='Files per work unit [Default: %default]')
+    parser.add_option('-m', '--max-in-flight', dest='max_in_flight',
+                      type='int', default=None,
+                      help='Maximum number of outstanding work units '
+                           '[Default: twice the number of workers]')
+    parser.add_option('-o', '--ordered', dest='ordered', action='store_true',
+                      default=False,
+                      help='Report files in the order given')
+    parser.add_option('-q', '--quiet', dest='quiet', action='store_true',
+                      default=False, help='Only report files that fail')
+    parser.add_option('-t', '--trusted', dest='validate',
+                      action='store_false', default=True,
+                      help='Skip validation of attributes')
+    parser.add_option('--cache-dir', dest='cache_dir', default=None,
+                      help='Load files through a snapshot cache in this '
+                           'directory')
+    parser.add_option('--traceback', dest='traceback', action='store_true',
+                      default=False,
+                      help='Print the traceback of each error')
+    options, args = parser.parse_args(argv[1:])
+    if not args:
+        parser.error('No files or directories given.')
+    failed = 0
+    total = 0
+    for r in bulk_load(find_profiles(args), processes=options.processes,
+                       chunk_size=options.chunk_size,
+                       max_in_flight=options.max_in_flight,
+                       ordered=options.ordered, validate=options.validate,
+                       keep_profiles=False, cache_dir=options.cache_dir):
+        total += 1
+        if not r.ok:
+            failed += 1
+            print(r)
+            if options.traceback:
+                print(r.traceback)
+        elif not options.quiet:
+            print(r)
+    print('{0} of {1} files loaded.'.format(total - failed, total),
+          file=sys.stderr)
+    if failed:
+        return 1
+    return 0
+
+
+##############################################################################
+## Private functions
+
+def _chunks(paths, chunk_size):
+    # Generate (index, list of paths) for each chunk of paths
+    chunk = []
+    index = 0
+    for p in paths:
+        chunk.append(p)
+        if len(chunk) >= chunk_size:
+            yield index, chunk
+            chunk = []
+            index += 1
+    if chunk:
+        yield index, chunk
+
+
+def _wait_for_chunk(done, in_flight):
+    # Wait for a chunk to finish and get its (index, results). A chunk whose
+    # results could not be sent back from the worker never reaches the done
+    # queue, so the outstanding chunks are checked whenever the wait times
+    # out. The timeout also lets the wait be interrupted from the keyboard.
+    while True:
+        try:
+            return done.get(True, 0.1)
+        except queue.Empty:
+            pass
+        for index, (chunk, ar) in in_flight.items():
+            if ar.ready() and not ar.successful():
+                try:
+                    ar.get()
+                except Exception as e:
+                    error = '{0}: {1}'.format(type(e).__name__, e)
+                    tb = traceback.format_exc()
+                return index, [LoadResult(p, error=error, traceback=tb)
+                               for p in chunk]
+
+
+def _load_chunk(index, chunk, options):
+    # Load a chunk of files in a worker process. Must not raise, as the pool
+    # would then never report the chunk as done.
+    validate, keep_profiles, cache_dir = options
+    cache = None
+    results = []
+    for p in chunk:
+        try:
+            if cache_dir is not None:
+                if cache is None:
+                    from rtsprofile.snapshot_cache import SnapshotCache
+                    cache = SnapshotCache(cache_dir)
+                prof = cache.load(p)
+            else:
+                f = open(p, 'rb')
+                try:
+                    content = f.read()
+                finally:
+                    f.close()
+                if not content.strip():
+                    raise RtsProfileError('Empty file.')
+                if os.path.splitext(p)[1].lower() in ('.yaml', '.yml'):
+                    prof = RtsProfile(yaml_spec=content, validate=validate)
+                else:
+                    prof = RtsProfile(xml_spec=content, validate=validate)
+            if not keep_profiles:
+                prof = None
+            results.append(LoadResult(p, prof))
+        except Exception as e:
+            results.append(LoadResult(p,
+                error='{0}: {1}'.format(type(e).__name__, e),
+                traceback=traceback.format_exc()))
+    return index, results
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -27,26 +27,36 @@ from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
                        RTS_EXT_NS_YAML, XSI_NS, XSI_NS_S
 from rtsprofile import composite_type as comp_type
 from rtsprofile.config_set import ConfigurationSet
-from rtsprofile.exceptions import InvalidCompositeTypeError
+from rtsprofile.exceptions import InvalidCompositeTypeError, \
+                                  InvalidRtsProfileNodeError
 from rtsprofile.exec_context import ExecutionContext
 from rtsprofile.location import Location
+from rtsprofile.participant import Participant
 from rtsprofile.ports import DataPort, ServicePort
+from rtsprofile.tracking import ModelDict, ModelList, ModelObject
 from rtsprofile.utils import get_direct_child_elements_xml, \
-                             indent_string, parse_properties_xml, \
-                             properties_to_xml, validate_attribute, \
-                             string_types
+                             current_string_table, indent_string, \
+                             intern_string, interning, is_trusted, \
+                             parse_properties_xml, properties_to_xml, \
+                             trusted_load, validate_attribute, string_types
 
 
 ##############################################################################
 ## Component object
 
-class Component(object):
+class Component(ModelObject):
     '''Information about a component contained in an RT system.'''
 
+    __slots__ = ('_id', '_path_uri', '_active_config_set', '_instance_name',
+                 '_composite_type', '_is_required', '_data_ports',
+                 '_service_ports', '_config_sets', '_exec_contexts',
+                 '_participants', '_comment', '_visible', '_location',
+                 '_properties', '_lazy_source', '_fingerprint')
+
     def __init__(self, id='', path_uri='', active_configuration_set='',
                  instance_name='', composite_type=comp_type.NONE,
                  is_required=False, comment='', visible=True,
-                 location=Location()):
+                 location=None):
         '''@param id Component ID.
         @type id str
         @param path_uri Path to the component.
@@ -64,6 +74,7 @@ class Component(object):
         @param visible If this component is visible in graphical displays.
         @type visible bool
         @param location The location of this component in graphical displays.
+        A new Location is made if it is None.
         @type location Location
 
         '''
@@ -93,9 +104,11 @@ class Component(object):
         validate_attribute(visible, 'component.ext.visible',
                            expected_type=bool, required=False)
         self._visible = visible
+        if location is None:
+            location = Location()
         validate_attribute(location, 'component.ext.Location',
                            expected_type=Location, required=True)
-        self._location = location
+        self._location = self._adopt(location)
 
     def __str__(self):
         result = 'Instance name: {3}\n  ID: {0}\n  Path URI: {1}\n  Active \
@@ -161,6 +174,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def id(self, id):
         validate_attribute(id, 'component.id',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._id = id
 
     @property
@@ -183,6 +197,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def path_uri(self, path_uri):
         validate_attribute(path_uri, 'component.pathUri',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._path_uri = path_uri
 
     @property
@@ -208,6 +223,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         validate_attribute(active_config_set,
                            'component.activeConfigurationSet',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._active_config_set = active_config_set
 
     @property
@@ -234,6 +250,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def instance_name(self, instance_name):
         validate_attribute(instance_name, 'component.instanceName',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._instance_name = instance_name
 
     @property
@@ -261,6 +278,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def composite_type(self, composite_type):
         validate_attribute(composite_type, 'component.compositeType',
                            expected_type=comp_type.const_type, required=True)
+        self._changed()
         self._composite_type = composite_type
 
     @property
@@ -287,6 +305,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def is_required(self, is_required):
         validate_attribute(is_required, 'component.isRequired',
                            expected_type=bool)
+        self._changed()
         self._is_required = is_required
 
     @property
@@ -306,13 +325,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.DataPorts', <type 'int'>, <type 'list'>)
         '''
+        self._materialise()
         return self._data_ports
 
     @data_ports.setter
     def data_ports(self, data_ports):
+        self._materialise()
         validate_attribute(data_ports, 'component.DataPorts',
                            expected_type=list, required=False)
-        self._data_ports = data_ports
+        self._changed()
+        self._data_ports = ModelList(data_ports, self)
 
     @property
     def service_ports(self):
@@ -331,13 +353,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.ServicePorts', <type 'int'>, <type 'list'>)
         '''
+        self._materialise()
         return self._service_ports
 
     @service_ports.setter
     def service_ports(self, service_ports):
+        self._materialise()
         validate_attribute(service_ports, 'component.ServicePorts',
                            expected_type=list, required=False)
-        self._service_ports = service_ports
+        self._changed()
+        self._service_ports = ModelList(service_ports, self)
 
     @property
     def configuration_sets(self):
@@ -356,13 +381,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.ConfigurationSets', <type 'int'>, <type 'list'>)
         '''
+        self._materialise()
         return self._config_sets
 
     @configuration_sets.setter
     def configuration_sets(self, configuration_sets):
+        self._materialise()
         validate_attribute(configuration_sets, 'component.ConfigurationSets',
                            expected_type=list, required=False)
-        self._config_sets = configuration_sets
+        self._changed()
+        self._config_sets = ModelList(configuration_sets, self)
 
     @property
     def execution_contexts(self):
@@ -381,13 +409,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.ExecutionContexts', <type 'int'>, <type 'list'>)
         '''
+        self._materialise()
         return self._exec_contexts
 
     @execution_contexts.setter
     def execution_contexts(self, execution_contexts):
+        self._materialise()
         validate_attribute(execution_contexts, 'component.ExecutionContexts',
                            expected_type=list, required=False)
-        self._exec_contexts = execution_contexts
+        self._changed()
+        self._exec_contexts = ModelList(execution_contexts, self)
 
     @property
     def participants(self):
@@ -406,13 +437,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.Participants', <type 'int'>, <type 'list'>)
         '''
+        self._materialise()
         return self._participants
 
     @participants.setter
     def participants(self, participants):
+        self._materialise()
         validate_attribute(participants, 'component.Participants',
                            expected_type=list, required=False)
-        self._participants = participants
+        self._changed()
+        self._participants = ModelList(participants, self)
 
     @property
     def comment(self):
@@ -439,6 +473,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def comment(self, comment):
         validate_attribute(comment, 'component.ext.comment',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._comment = comment
 
     @property
@@ -466,6 +501,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     def visible(self, visible):
         validate_attribute(visible, 'component.ext.visible',
                            expected_type=bool, required=False)
+        self._changed()
         self._visible = visible
 
     @property
@@ -489,13 +525,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.ext.Location', <type 'int'>, <class 'rtsprofile.location.Location'>)
         '''
+        self._materialise()
         return self._location
 
     @location.setter
     def location(self, location):
+        self._materialise()
         validate_attribute(location, 'component.ext.Location',
                            expected_type=Location, required=True)
-        self._location = location
+        self._changed()
+        self._location = self._adopt(location)
 
     @property
     def properties(self):
@@ -515,13 +554,16 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         ...
         InvalidTypeError: ('component.ext.Properties', <type 'int'>, <type 'dict'>)
         '''
+        self._materialise()
         return self._properties
 
     @properties.setter
     def properties(self, properties):
+        self._materialise()
         validate_attribute(properties, 'component.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     ###########################################################################
     # API functions
@@ -542,23 +584,42 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     ###########################################################################
     # XML
 
-    def parse_xml_node(self, node):
+    def parse_xml_node(self, node, lazy=False):
         '''Parse an xml.dom Node object representing a component into this
         object.
 
-        >>> c = Component()
+        @param lazy If True, only the attributes of the component are parsed.
+        The children (ports, configuration sets, execution contexts,
+        participants, location and properties) are parsed from the node when
+        one of them is first used, so the node must not be unlinked before
+        then. Errors in the children are raised at that time.
+
+        Example:
+        >>> import xml.dom.minidom
+        >>> dom = xml.dom.minidom.parse('test/rtsystem.xml')
+        >>> node = dom.getElementsByTagNameNS(RTS_NS, 'Components')[0]
+        >>> c = Component().parse_xml_node(node, lazy=True)
+        >>> print(c.instance_name)
+        SampleComponent_1
+        >>> c._data_ports
+        []
+        >>> len(c.data_ports)
+        3
+        >>> str(c) == str(Component().parse_xml_node(node))
+        True
         '''
         self._reset()
         # Get the attributes
-        self.id = node.getAttributeNS(RTS_NS, 'id')
+        self.id = intern_string(node.getAttributeNS(RTS_NS, 'id'))
         self.path_uri = node.getAttributeNS(RTS_NS, 'pathUri')
         if node.hasAttributeNS(RTS_NS, 'activeConfigurationSet'):
-            self.active_configuration_set = node.getAttributeNS(RTS_NS,
-                    'activeConfigurationSet')
+            self.active_configuration_set = intern_string(
+                    node.getAttributeNS(RTS_NS, 'activeConfigurationSet'))
         else:
             self.active_configuration_set = ''
-        self.instance_name = node.getAttributeNS(RTS_NS, 'instanceName')
-        self.compositeType = comp_type.from_string(node.getAttributeNS(RTS_NS,
+        self.instance_name = intern_string(node.getAttributeNS(RTS_NS,
+                                                               'instanceName'))
+        self.composite_type = comp_type.from_string(node.getAttributeNS(RTS_NS,
                 'compositeType'))
         required = node.getAttributeNS(RTS_NS, 'isRequired')
         if required == 'true' or required == '1':
@@ -574,27 +635,11 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
                 self.visible = False
 
         # Get the children
-        for c in node.getElementsByTagNameNS(RTS_NS, 'DataPorts'):
-            self._data_ports.append(DataPort().parse_xml_node(c))
-        for c in node.getElementsByTagNameNS(RTS_NS, 'ServicePorts'):
-            self._service_ports.append(ServicePort().parse_xml_node(c))
-        for c in node.getElementsByTagNameNS(RTS_NS, 'ConfigurationSets'):
-            self._config_sets.append(ConfigurationSet().parse_xml_node(c))
-        for c in node.getElementsByTagNameNS(RTS_NS, 'ExecutionContexts'):
-            self._exec_contexts.append(ExecutionContext().parse_xml_node(c))
-        for c in node.getElementsByTagNameNS(RTS_NS, 'Participants'):
-            self._participants.append(Participant().parse_xml_node(c))
-        # Extended profile children
-        c = node.getElementsByTagNameNS(RTS_EXT_NS, 'Location')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('Location')
-            self._location = Location().parse_xml_node(c[0])
-        for c in get_direct_child_elements_xml(node, prefix=RTS_EXT_NS,
-                                               local_name='Properties'):
-            name, value = parse_properties_xml(c)
-            self._properties[name] = value
-
+        if lazy:
+            self._lazy_source = ('xml', node, is_trusted(),
+                                 current_string_table())
+        else:
+            self._parse_xml_children(node)
         return self
 
     def save_xml(self, doc, element):
@@ -642,7 +687,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
             element.appendChild(new_element)
         new_element = doc.createElementNS(RTS_EXT_NS,
                                           RTS_EXT_NS_S + 'Location')
-        self._location.save_xml(doc, new_element)
+        self.location.save_xml(doc, new_element)
         element.appendChild(new_element)
         for p in self.properties:
             new_prop_element = doc.createElementNS(RTS_EXT_NS,
@@ -653,17 +698,29 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     ###########################################################################
     # YAML
 
-    def parse_yaml(self, y):
-        '''Parse a YAML specification of a component into this object.'''
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new component from a dictionary.'''
+        return cls().parse_yaml(d)
+
+    def parse_yaml(self, y, lazy=False):
+        '''Parse a YAML specification of a component into this object.
+
+        @param lazy If True, only the attributes of the component are parsed,
+        and the children are parsed from y when one of them is first used. See
+        @ref parse_xml_node.
+
+        '''
         self._reset()
-        self.id = y['id']
+        self.id = intern_string(y['id'])
         self.path_uri = y['pathUri']
         if 'activeConfigurationSet' in y:
-            self.active_configuration_set = y['activeConfigurationSet']
+            self.active_configuration_set = intern_string(
+                    y['activeConfigurationSet'])
         else:
             self.active_configuration_set = ''
-        self.instance_name = y['instanceName']
-        self.compositeType = comp_type.from_string(y['compositeType'])
+        self.instance_name = intern_string(y['instanceName'])
+        self.composite_type = comp_type.from_string(y['compositeType'])
         required = y['isRequired']
         if required == True or required == 'true' or required == '1':
             self.is_required = True
@@ -678,34 +735,11 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
                 self.visible = True
 
         # Get the children
-        if 'dataPorts' in y:
-            for p in y.get('dataPorts'):
-                self._data_ports.append(DataPort().parse_yaml(p))
-        if 'servicePorts' in y:
-            for p in y.get('servicePorts'):
-                self._service_ports.append(ServicePort().parse_yaml(p))
-        if 'configurationSets' in y:
-            for p in y.get('configurationSets'):
-                self._config_sets.append(ConfigurationSet().parse_yaml(p))
-        if 'executionContexts' in y:
-            for p in y.get('executionContexts'):
-                self._exec_contexts.append(ExecutionContext().parse_yaml(p))
-        if 'participants' in y:
-            for p in y.get('participants'):
-                self._participants.append(Participant().parse_yaml(p))
-
-        # Extended profile children
-        if RTS_EXT_NS_YAML + 'location' in y:
-            l = y[RTS_EXT_NS_YAML + 'location']
-            self._location = Location().parse_yaml(l)
-        if RTS_EXT_NS_YAML + 'properties' in y:
-            for p in y.get(RTS_EXT_NS_YAML + 'properties'):
-                if 'value' in p:
-                    value = p['value']
-                else:
-                    value = None
-                self._properties[p['name']] = value
-
+        if lazy:
+            self._lazy_source = ('yaml', y, is_trusted(),
+                                 current_string_table())
+        else:
+            self._parse_yaml_children(y)
         return self
 
     def to_dict(self):
@@ -746,7 +780,7 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         if participants:
             d['participants'] = participants
 
-        d[RTS_EXT_NS_YAML + 'location'] = self._location.to_dict()
+        d[RTS_EXT_NS_YAML + 'location'] = self.location.to_dict()
         props = []
         for name in self.properties:
             p = {'name': name}
@@ -761,9 +795,88 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
     ###########################################################################
     # Internal functions
 
+    def _materialise(self):
+        # Parse the children of a lazily-parsed component, with validation as
+        # it was when the component was parsed. The component is detached
+        # from its parent meanwhile, as parsing is not a change to the objects
+        # holding it.
+        if self._lazy_source is None:
+            return
+        kind, source, trusted, strings = self._lazy_source
+        self._lazy_source = None
+        parent = self._parent
+        self._parent = None
+        try:
+            with trusted_load(trusted):
+                with interning(strings):
+                    if kind == 'xml':
+                        self._parse_xml_children(source)
+                    else:
+                        self._parse_yaml_children(source)
+        finally:
+            self._parent = parent
+
+    def _parse_xml_children(self, node):
+        location_found = False
+        for c in get_direct_child_elements_xml(node):
+            if c.namespaceURI == RTS_NS:
+                name = c.localName
+                if name == 'DataPorts':
+                    self._data_ports.append(DataPort().parse_xml_node(c))
+                elif name == 'ServicePorts':
+                    self._service_ports.append(ServicePort().parse_xml_node(c))
+                elif name == 'ConfigurationSets':
+                    self._config_sets.append(
+                            ConfigurationSet().parse_xml_node(c))
+                elif name == 'ExecutionContexts':
+                    self._exec_contexts.append(
+                            ExecutionContext().parse_xml_node(c))
+                elif name == 'Participants':
+                    self._participants.append(Participant().parse_xml_node(c))
+            elif c.namespaceURI == RTS_EXT_NS:
+                # Extended profile children
+                if c.localName == 'Location':
+                    if location_found:
+                        raise InvalidRtsProfileNodeError('Location')
+                    self._location = self._adopt(Location().parse_xml_node(c))
+                    location_found = True
+                elif c.localName == 'Properties':
+                    name, value = parse_properties_xml(c)
+                    self._properties[name] = value
+
+    def _parse_yaml_children(self, y):
+        if 'dataPorts' in y:
+            for p in y.get('dataPorts'):
+                self._data_ports.append(DataPort().parse_yaml(p))
+        if 'servicePorts' in y:
+            for p in y.get('servicePorts'):
+                self._service_ports.append(ServicePort().parse_yaml(p))
+        if 'configurationSets' in y:
+            for p in y.get('configurationSets'):
+                self._config_sets.append(ConfigurationSet().parse_yaml(p))
+        if 'executionContexts' in y:
+            for p in y.get('executionContexts'):
+                self._exec_contexts.append(ExecutionContext().parse_yaml(p))
+        if 'participants' in y:
+            for p in y.get('participants'):
+                self._participants.append(Participant().parse_yaml(p))
+
+        # Extended profile children
+        if RTS_EXT_NS_YAML + 'location' in y:
+            l = y[RTS_EXT_NS_YAML + 'location']
+            self._location = self._adopt(Location().parse_yaml(l))
+        if RTS_EXT_NS_YAML + 'properties' in y:
+            for p in y.get(RTS_EXT_NS_YAML + 'properties'):
+                if 'value' in p:
+                    value = p['value']
+                else:
+                    value = None
+                self._properties[p['name']] = value
+
     def _reset(self):
         # Clears all values in the class in preparation for parsing an XML
         # file.
+        self._changed()
         # Attributes
         self._id = ''
         self._path_uri = ''
@@ -772,16 +885,18 @@ configuration set: {2}\n  Composite type: {4}\n  Is required: {5}\n'.format(\
         self._composite_type = comp_type.NONE
         self._is_required = False
         # Children
-        self._data_ports = []
-        self._service_ports = []
-        self._config_sets = []
-        self._exec_contexts = []
-        self._participants = []
+        self._data_ports = ModelList(parent=self)
+        self._service_ports = ModelList(parent=self)
+        self._config_sets = ModelList(parent=self)
+        self._exec_contexts = ModelList(parent=self)
+        self._participants = ModelList(parent=self)
         # Extended spec
         self._comment = ''
         self._visible = True
-        self._location = Location()
-        self._properties = {}
+        self._location = self._adopt(Location())
+        self._properties = ModelDict(parent=self)
+        self._lazy_source = None
+        self._fingerprint = None
 
 
 # vim: tw=79
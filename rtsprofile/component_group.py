@@ -24,15 +24,20 @@ __version__ = '$Revision: $'
 
 
 from rtsprofile import RTS_NS, RTS_NS_S
-from rtsprofile.utils import validate_attribute, string_types
+from rtsprofile.targets import TargetComponent
+from rtsprofile.tracking import ModelList, ModelObject
+from rtsprofile.utils import get_direct_child_elements_xml, \
+                             validate_attribute, string_types
 
 
 ##############################################################################
 ## ComponentGroup object
 
-class ComponentGroup(object):
+class ComponentGroup(ModelObject):
     '''A group of components in the RT system.'''
 
+    __slots__ = ('_group_id', '_members')
+
     def __init__(self, group_id='', members=[]):
         '''Constructor.
 
@@ -47,7 +52,7 @@ class ComponentGroup(object):
         self._group_id = group_id
         validate_attribute(members, 'component_group.Members',
                            expected_type=list, required=False)
-        self._members = members
+        self._members = ModelList(members, self)
 
     def __str__(self):
         result = 'Group ID: {0}\n'.format(self.group_id)
@@ -77,6 +82,7 @@ class ComponentGroup(object):
     def group_id(self, group_id):
         validate_attribute(group_id, 'component_group.groupID',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._group_id = group_id
 
     @property
@@ -106,7 +112,8 @@ class ComponentGroup(object):
     def members(self, members):
         validate_attribute(members, 'component_group.Members',
                            expected_type=list, required=True)
-        self._members = members
+        self._changed()
+        self._members = ModelList(members, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a component group into
@@ -114,18 +121,24 @@ class ComponentGroup(object):
 
         '''
         self.group_id = node.getAttributeNS(RTS_NS, 'groupId')
-        self._members = []
-        for c in node.getElementsByTagNameNS(RTS_NS, 'Members'):
+        self._members = ModelList(parent=self)
+        for c in get_direct_child_elements_xml(node, prefix=RTS_NS,
+                                               local_name='Members'):
             self._members.append(TargetComponent().parse_xml_node(c))
         return self
 
-    def parse_yaml(self, node):
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new component group from a dictionary.'''
+        return cls().parse_yaml(d)
+
+    def parse_yaml(self, y):
         '''Parse a YAML specification of a component group into this
         object.
 
         '''
         self.group_id = y['groupId']
-        self._members = []
+        self._members = ModelList(parent=self)
         if 'members' in y:
             for m in y.get('members'):
                 self._members.append(TargetComponent().parse_yaml(m))
@@ -133,7 +146,7 @@ class ComponentGroup(object):
 
     def save_xml(self, doc, element):
         '''Save this component group into an xml.dom.Element object.'''
-        element.setAttributeNS(RTS_NS, RTS_NS_S + 'groupID', self.group_id)
+        element.setAttributeNS(RTS_NS, RTS_NS_S + 'groupId', self.group_id)
         for m in self.members:
             new_element = doc.createElementNS(RTS_NS, RTS_NS_S + 'Members')
             m.save_xml(doc, new_element)
@@ -58,7 +58,7 @@ def from_string(type_string):
     if type_string == NONE:
         return NONE
     elif type_string == PERIODIC_EC_SHARED:
-        return PERIODC_EC_SHARED
+        return PERIODIC_EC_SHARED
     elif type_string == PERIODIC_STATE_SHARED:
         return PERIODIC_STATE_SHARED
     elif type_string == GROUPING:
@@ -80,7 +80,7 @@ def to_string(comp_type):
     if comp_type == NONE:
         return NONE
     elif comp_type== PERIODIC_EC_SHARED:
-        return PERIODC_EC_SHARED
+        return PERIODIC_EC_SHARED
     elif comp_type == PERIODIC_STATE_SHARED:
         return PERIODIC_STATE_SHARED
     elif comp_type == GROUPING:
@@ -90,7 +90,7 @@ def to_string(comp_type):
     elif comp_type == FSM_STATE_SHARED:
         return FSM_STATE_SHARED
     else:
-        raise InvalidCompositeTypeError(type_string)
+        raise InvalidCompositeTypeError(comp_type)
 
 
 # vim: tw=79
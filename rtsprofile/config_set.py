@@ -25,13 +25,16 @@ __version__ = '$Revision: $'
 
 from rtsprofile import RTS_NS, RTS_NS_S
 from rtsprofile.exec_context import ExecutionContext
-from rtsprofile.utils import indent_string, validate_attribute, string_types
+from rtsprofile.tracking import ModelList, ModelObject
+from rtsprofile.utils import get_direct_child_elements_xml, \
+                             indent_string, intern_string, \
+                             validate_attribute, string_types
 
 
 ##############################################################################
 ## ConfigurationSet object
 
-class ConfigurationSet(object):
+class ConfigurationSet(ModelObject):
     '''Represents a configuration set.
 
     A configuration set is a collection of configuration parameters. An RT
@@ -39,6 +42,8 @@ class ConfigurationSet(object):
 
     '''
 
+    __slots__ = ('_id', '_config_data', '_fingerprint')
+
     def __init__(self, id=''):
         '''Constructor.
 
@@ -49,7 +54,8 @@ class ConfigurationSet(object):
         validate_attribute(id, 'configuration_set.id',
                            expected_type=string_types(), required=False)
         self._id = id
-        self._config_data = []
+        self._config_data = ModelList(parent=self)
+        self._fingerprint = None
 
     def __str__(self):
         result = 'ID: {0}\n'.format(self.id)
@@ -73,7 +79,8 @@ class ConfigurationSet(object):
         validate_attribute(configuration_data,
                            'configuration_set.ConfigurationData',
                            expected_type=list)
-        self._config_data = configuration_data
+        self._changed()
+        self._config_data = ModelList(configuration_data, self)
 
     @property
     def id(self):
@@ -89,6 +96,7 @@ class ConfigurationSet(object):
     def id(self, id):
         validate_attribute(id, 'configuration_set.id',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._id = id
 
     def parse_xml_node(self, node):
@@ -96,19 +104,25 @@ class ConfigurationSet(object):
         this object.
 
         '''
-        self.id = node.getAttributeNS(RTS_NS, 'id')
-        self._config_data = []
-        for d in node.getElementsByTagNameNS(RTS_NS, 'ConfigurationData'):
+        self.id = intern_string(node.getAttributeNS(RTS_NS, 'id'))
+        self._config_data = ModelList(parent=self)
+        for d in get_direct_child_elements_xml(node, prefix=RTS_NS,
+                                               local_name='ConfigurationData'):
             self._config_data.append(ConfigurationData().parse_xml_node(d))
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new configuration set from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a configuration set into this
         object.
 
         '''
-        self.id = y['id']
-        self._config_data = []
+        self.id = intern_string(y['id'])
+        self._config_data = ModelList(parent=self)
         if 'configurationData' in y:
             for d in y.get('configurationData'):
                 self._config_data.append(ConfigurationData().parse_yaml(d))
@@ -137,9 +151,11 @@ class ConfigurationSet(object):
 ##############################################################################
 ## ConfigurationData object
 
-class ConfigurationData(object):
+class ConfigurationData(ModelObject):
     '''Represents an individual configuration parameter and its value.'''
 
+    __slots__ = ('_name', '_data')
+
     def __init__(self, name='', data=''):
         '''Constructor.
 
@@ -172,6 +188,7 @@ class ConfigurationData(object):
     def data(self, data):
         validate_attribute(data, 'configuration_set.data',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._data = data
 
     @property
@@ -187,6 +204,7 @@ class ConfigurationData(object):
     def name(self, name):
         validate_attribute(name, 'configuration_set.name',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._name = name
 
     def parse_xml_node(self, node):
@@ -194,19 +212,24 @@ class ConfigurationData(object):
         this object.
 
         '''
-        self.name = node.getAttributeNS(RTS_NS, 'name')
+        self.name = intern_string(node.getAttributeNS(RTS_NS, 'name'))
         if node.hasAttributeNS(RTS_NS, 'data'):
             self.data = node.getAttributeNS(RTS_NS, 'data')
         else:
             self.data = ''
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new configuration data object from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a configuration data into this
         object.
 
         '''
-        self.name = y['name']
+        self.name = intern_string(y['name'])
         if 'data' in y:
             self.data = y['data']
         else:
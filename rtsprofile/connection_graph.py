@@ -0,0 +1,213 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: connection_graph.py
+
+Object representing the graph of connections between the ports of the
+components in an RT system.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from collections import deque
+
+
+##############################################################################
+## ConnectionGraph object
+
+class ConnectionGraph(object):
+    '''Indexes the data and service port connectors of an RT system by the
+    ports and components they connect.
+
+    Ports are identified by a (component ID, instance name, port name) tuple,
+    and components by a (component ID, instance name) tuple. Wherever a port
+    or a component is expected, a @ref TargetPort, @ref TargetComponent or
+    @ref Component object may be given instead of a tuple.
+
+    All indexes are built when the graph is constructed, so each query only
+    costs as much as the size of its result. The graph does not follow changes
+    made to the connectors after it is built; use @ref
+    RtsProfile.connection_graph to get a graph that is kept up to date.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> g = ConnectionGraph(s.data_port_connectors, s.service_port_connectors)
+    >>> comp1 = s.components[0]
+    >>> len(g.fan_out(comp1)), len(g.fan_in(comp1))
+    (2, 1)
+    >>> port = (comp1.id, comp1.instance_name, 'Comp1_outport1')
+    >>> print(g.fan_out(port)[0].name)
+    Comp1_outport1_Comp2_inport1
+    >>> sorted([str(n) for c, n in g.neighbours(comp1)])
+    ['SampleComponent2_1', 'SampleComponent3_1']
+    >>> len(g.reachable(comp1)), len(g.reachable(s.components[1]))
+    (2, 0)
+    '''
+
+    def __init__(self, data_port_connectors=[], service_port_connectors=[]):
+        '''Constructor.
+
+        @param data_port_connectors The data port connectors to index.
+        @type data_port_connectors list(DataPortConnector)
+        @param service_port_connectors The service port connectors to index.
+        @type service_port_connectors list(ServicePortConnector)
+
+        '''
+        # Port and component keys have different lengths, so they can share
+        # the same indexes.
+        self._in = {}
+        self._out = {}
+        self._succ = {}
+        self._pred = {}
+        for conn in data_port_connectors:
+            self._add(conn, conn.source_data_port, conn.target_data_port)
+        for conn in service_port_connectors:
+            self._add(conn, conn.source_service_port,
+                      conn.target_service_port)
+
+    ###########################################################################
+    # API functions
+
+    @property
+    def ports(self):
+        '''The keys of all ports that have at least one connector.'''
+        return [k for k in set(self._in) | set(self._out) if len(k) == 3]
+
+    @property
+    def components(self):
+        '''The keys of all components that have at least one connector.'''
+        return [k for k in set(self._in) | set(self._out) if len(k) == 2]
+
+    def connectors(self, target):
+        '''All connectors with the given port or component at either end.
+
+        A connector from a port or component to itself is only returned once.
+
+        '''
+        key = _key(target)
+        result = list(self._out.get(key, []))
+        seen = set([id(c) for c in result])
+        for conn in self._in.get(key, []):
+            if id(conn) not in seen:
+                result.append(conn)
+        return result
+
+    def fan_in(self, target):
+        '''The connectors that have the given port or component as their
+        target.
+
+        '''
+        return list(self._in.get(_key(target), []))
+
+    def fan_out(self, target):
+        '''The connectors that have the given port or component as their
+        source.
+
+        '''
+        return list(self._out.get(_key(target), []))
+
+    def successors(self, component):
+        '''The keys of the components that the given component's ports are
+        connected to as the source.
+
+        '''
+        return set(self._succ.get(_comp_key(component), ()))
+
+    def predecessors(self, component):
+        '''The keys of the components that the given component's ports are
+        connected to as the target.
+
+        '''
+        return set(self._pred.get(_comp_key(component), ()))
+
+    def neighbours(self, component):
+        '''The keys of all components connected to the given component in
+        either direction.
+
+        '''
+        key = _comp_key(component)
+        result = self.successors(key) | self.predecessors(key)
+        result.discard(key)
+        return result
+
+    def reachable(self, component, directed=True):
+        '''The keys of all components that can be reached from the given
+        component by following connectors.
+
+        @param component The component to start from.
+        @param directed If True, connectors are only followed from their
+        source to their target. Otherwise they are followed in both directions.
+        @return A set of component keys, not including the starting component.
+
+        '''
+        start = _comp_key(component)
+        seen = set([start])
+        queue = deque([start])
+        while queue:
+            key = queue.popleft()
+            if directed:
+                following = self._succ.get(key, ())
+            else:
+                following = self.successors(key) | self.predecessors(key)
+            for n in following:
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        seen.discard(start)
+        return seen
+
+    ###########################################################################
+    # Internal functions
+
+    def _add(self, conn, source, target):
+        s_port = _key(source)
+        t_port = _key(target)
+        s_comp = s_port[:2]
+        t_comp = t_port[:2]
+        self._out.setdefault(s_port, []).append(conn)
+        self._out.setdefault(s_comp, []).append(conn)
+        self._in.setdefault(t_port, []).append(conn)
+        self._in.setdefault(t_comp, []).append(conn)
+        self._succ.setdefault(s_comp, set()).add(t_comp)
+        self._pred.setdefault(t_comp, set()).add(s_comp)
+
+
+##############################################################################
+## Key functions
+
+def _key(target):
+    # Get the port or component key for a tuple, target or component
+    if type(target) == tuple:
+        return target
+    if hasattr(target, 'port_name'):
+        return (target.component_id, target.instance_name, target.port_name)
+    return _comp_key(target)
+
+
+def _comp_key(target):
+    # Get the component key for a tuple, target or component
+    if type(target) == tuple:
+        return target[:2]
+    if hasattr(target, 'component_id'):
+        return (target.component_id, target.instance_name)
+    return (target.id, target.instance_name)
+
+
+# vim: tw=79
+
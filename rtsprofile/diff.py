@@ -0,0 +1,308 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: diff.py
+
+Structural comparison of RtsProfile objects.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from rtsprofile import RTS_EXT_NS_YAML
+
+
+##############################################################################
+## Change kinds
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+##############################################################################
+## Change object
+
+class Change(object):
+    '''A single difference between two profiles.
+
+    The path locates the difference in the dictionary form of the profile
+    (the form that is saved as YAML). It is a tuple of field names, each
+    followed by the key of an item when the field holds a list of items that
+    are matched by key. For example, a change to the data of a configuration
+    parameter has the path
+
+        ('components', (component ID, instance name),
+         'configurationSets', set ID, 'configurationData', parameter name,
+         'data')
+
+    For an added item or field, old is None and new is the new value; for a
+    removed one, old is the old value and new is None. Values are in the
+    dictionary form.
+
+    '''
+
+    __slots__ = ('_kind', '_path', '_old', '_new')
+
+    def __init__(self, kind, path, old=None, new=None):
+        '''Constructor.
+
+        @param kind ADDED, REMOVED or CHANGED.
+        @param path The path of the difference.
+        @param old The old value.
+        @param new The new value.
+
+        '''
+        self._kind = kind
+        self._path = path
+        self._old = old
+        self._new = new
+
+    def __str__(self):
+        if self._kind == ADDED:
+            return 'added {0}'.format(path_to_string(self._path))
+        elif self._kind == REMOVED:
+            return 'removed {0}'.format(path_to_string(self._path))
+        return 'changed {0}: {1!r} -> {2!r}'.format(
+                path_to_string(self._path), self._old, self._new)
+
+    def __repr__(self):
+        return 'Change({0!r}, {1!r}, {2!r}, {3!r})'.format(self._kind,
+                self._path, self._old, self._new)
+
+    def __eq__(self, other):
+        return isinstance(other, Change) and \
+                (self._kind, self._path, self._old, self._new) == \
+                (other._kind, other._path, other._old, other._new)
+
+    def __ne__(self, other):
+        return not self == other
+
+    @property
+    def kind(self):
+        '''ADDED, REMOVED or CHANGED.'''
+        return self._kind
+
+    @property
+    def path(self):
+        '''The path of the difference. See @ref Change.'''
+        return self._path
+
+    @property
+    def old(self):
+        '''The old value, or None if the item was added.'''
+        return self._old
+
+    @property
+    def new(self):
+        '''The new value, or None if the item was removed.'''
+        return self._new
+
+
+##############################################################################
+## Public API functions
+
+def diff(old, new):
+    '''Compare two profiles and return a list of @ref Change objects.
+
+    Items in lists are matched by key rather than by position: components by
+    ID and instance name, connectors by connector ID, groups by group ID,
+    ports and configuration data by name, configuration sets and execution
+    contexts by ID, participants and members by component ID and instance
+    name, and properties by name. Each list is indexed with a dictionary, so
+    the time taken is linear in the size of the profiles. Items with
+    duplicate keys are matched in the order they appear. Lists of other
+    items are compared as a whole.
+
+    The changes are given in a stable order that does not depend on the
+    order of dictionary entries: the fields of each object are taken in
+    alphabetical order of their names in the dictionary form, fields only in
+    the new object after the others. Within a list, removals and changes of
+    items are given in the order of the old list, and then additions in the
+    order of the new list.
+
+    @param old The old RtsProfile, or any other object of the model such as
+    a Component.
+    @param new The new object, of the same type.
+    @return A list of Change objects. The list is empty if the objects are
+    the same.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> old = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> new = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> diff(old, new)
+    []
+    >>> new.components[0].configuration_sets[0].configuration_data[0].data = '2'
+    >>> new.components[1].data_ports.pop(0).name
+    u'Comp2_inport1'
+    >>> new.data_port_connectors[0].connector_id = 'new_conn'
+    >>> for c in diff(old, new):
+    ...     print(c)
+    changed components[RTC:SampleVendor:SampleCategory:SampleComponent:1.0.0, SampleComponent_1].configurationSets[configSet_1].configurationData[name_1].data: u'value' -> '2'
+    removed components[RTC:SampleVendor:SampleCategory:SampleComponent2:1.0.0, SampleComponent2_1].dataPorts[Comp2_inport1]
+    removed dataPortConnectors[9c477198-dbf4-4298-9713-c5e1b1b30607]
+    added dataPortConnectors[new_conn]
+    '''
+    return list(iter_diff(old, new))
+
+
+def iter_diff(old, new):
+    '''Generate the differences between two objects one at a time.
+
+    See @ref diff.
+
+    '''
+    return _diff_value((), _to_tree(old), _to_tree(new))
+
+
+def path_to_string(path):
+    '''Format the path of a @ref Change for display.
+
+    Example:
+    >>> path_to_string(('components', ('RTC:a:b:c:1.0', 'c0'), 'dataPorts',
+    ...                 'in', 'name'))
+    'components[RTC:a:b:c:1.0, c0].dataPorts[in].name'
+    '''
+    result = ''
+    keyed = False
+    for p in path:
+        if keyed:
+            if type(p) == tuple:
+                p = ', '.join([str(k) for k in p])
+            result += '[{0}]'.format(p)
+            keyed = False
+        else:
+            if result:
+                result += '.'
+            result += p
+            keyed = p in KEYS
+    return result
+
+
+##############################################################################
+## Item keys
+
+def _target_key(d):
+    # Key of a target component, possibly wrapped as a participant
+    if 'participant' in d:
+        d = d['participant']
+    return (d.get('componentId'), d.get('instanceName'))
+
+
+def _condition_key(d):
+    # Key of a message sending condition
+    t = d.get('targetComponent', {})
+    return (t.get('componentId'), t.get('instanceName'), t.get('id'))
+
+
+def _field_key(name):
+    return lambda d: d.get(name)
+
+
+# The functions that get the key of each item in lists of these names
+KEYS = {'components': lambda d: (d.get('id'), d.get('instanceName')),
+        'groups': _field_key('groupId'),
+        'dataPortConnectors': _field_key('connectorId'),
+        'servicePortConnectors': _field_key('connectorId'),
+        'dataPorts': _field_key('name'),
+        'servicePorts': _field_key('name'),
+        'configurationSets': _field_key('id'),
+        'configurationData': _field_key('name'),
+        'executionContexts': _field_key('id'),
+        'participants': _target_key,
+        'members': _target_key,
+        'targets': _condition_key,
+        RTS_EXT_NS_YAML + 'properties': _field_key('name')}
+
+
+##############################################################################
+## Private functions
+
+def _to_tree(obj):
+    # Get the dictionary form of an object
+    if hasattr(obj, '_to_dict'):
+        return obj._to_dict()['rtsProfile']
+    return obj.to_dict()
+
+
+def _diff_value(path, old, new):
+    # Generate the changes between two values
+    if type(old) == dict and type(new) == dict:
+        for c in _diff_dict(path, old, new):
+            yield c
+    elif old != new:
+        yield Change(CHANGED, path, old, new)
+
+
+def _diff_dict(path, old, new):
+    # Generate the changes between two dictionaries
+    # Empty lists are left out of the dictionary form, so a keyed list that
+    # is missing on one side is compared as an empty list to give a change
+    # per item.
+    for name in _ordered_keys(old):
+        o = old[name]
+        if name in KEYS and type(o) == list:
+            n = new.get(name, [])
+            if type(n) == list:
+                for c in _diff_keyed_list(path + (name,), KEYS[name], o, n):
+                    yield c
+                continue
+        if name not in new:
+            yield Change(REMOVED, path + (name,), o, None)
+        else:
+            for c in _diff_value(path + (name,), o, new[name]):
+                yield c
+    for name in _ordered_keys(new):
+        if name in old:
+            continue
+        n = new[name]
+        if name in KEYS and type(n) == list:
+            for c in _diff_keyed_list(path + (name,), KEYS[name], [], n):
+                yield c
+        else:
+            yield Change(ADDED, path + (name,), None, n)
+
+
+def _diff_keyed_list(path, key, old, new):
+    # Generate the changes between two lists of items matched by key
+    new_index = {}
+    for n in new:
+        new_index.setdefault(key(n), []).append(n)
+    matched = {}
+    for o in old:
+        k = key(o)
+        candidates = new_index.get(k)
+        if not candidates:
+            yield Change(REMOVED, path + (k,), o, None)
+            continue
+        n = candidates.pop(0)
+        matched[id(n)] = True
+        for c in _diff_value(path + (k,), o, n):
+            yield c
+    for n in new:
+        if id(n) not in matched:
+            yield Change(ADDED, path + (key(n),), None, n)
+
+
+def _ordered_keys(d):
+    # Field names in a stable order, so the output does not depend on the
+    # order of dictionary entries
+    return sorted(d.keys())
+
+
+# vim: tw=79
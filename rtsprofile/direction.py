@@ -74,7 +74,7 @@ def to_string(direction):
     elif direction == RIGHT:
         return RIGHT
     else:
-        raise InvalidDirectionError(type_string)
+        raise InvalidDirectionError(direction)
 
 
 # vim: tw=79
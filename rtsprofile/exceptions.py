@@ -84,5 +84,37 @@ class MissingComponentError(RtsProfileError):
     pass
 
 
+class InvalidPatchError(RtsProfileError):
+    '''A patch could not be applied to a profile (e.g. it changes an item
+    that the profile does not have).
+
+    '''
+    pass
+
+
+class DependencyCycleError(RtsProfileError):
+    '''The conditions of a message sending action make components wait for
+    each other in a cycle.
+
+    '''
+    pass
+
+
+class ActionFailedError(RtsProfileError):
+    '''A component did not carry out a message sending action (e.g. it could
+    not be reached).
+
+    '''
+    pass
+
+
+class InvalidBackendError(RtsProfileError):
+    '''Tried to use a serialisation backend that is unknown or not
+    available.
+
+    '''
+    pass
+
+
 # vim: tw=79
 
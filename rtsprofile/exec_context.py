@@ -26,18 +26,22 @@ __version__ = '$Revision: $'
 from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
                        RTS_EXT_NS_YAML, XSI_NS, XSI_NS_S
 from rtsprofile.participant import Participant
+from rtsprofile.targets import TargetComponent
+from rtsprofile.tracking import ModelDict, ModelList, ModelObject
 from rtsprofile.utils import get_direct_child_elements_xml, \
-                             indent_string, parse_properties_xml, \
-                             properties_to_xml, validate_attribute, \
-                             string_types
+                             indent_string, intern_string, \
+                             parse_properties_xml, properties_to_xml, \
+                             validate_attribute, string_types
 
 
 ##############################################################################
 ## ExecutionContext object
 
-class ExecutionContext(object):
+class ExecutionContext(ModelObject):
     '''Represents an execution context being used in the RT system.'''
 
+    __slots__ = ('_id', '_kind', '_rate', '_participants', '_properties')
+
     def __init__(self, id='', kind='', rate=0.0):
         '''Constructor.
 
@@ -58,8 +62,8 @@ class ExecutionContext(object):
         validate_attribute(rate, 'execution_context.rate',
                            expected_type=[int, float], required=False)
         self._rate = rate
-        self._participants = []
-        self._properties = {}
+        self._participants = ModelList(parent=self)
+        self._properties = ModelDict(parent=self)
 
     def __str__(self):
         result = 'ID: {0}\nKind: {1}\nRate: {2}\n'.format(self.id, self.kind,
@@ -94,6 +98,7 @@ class ExecutionContext(object):
     def id(self, id):
         validate_attribute(id, 'execution_context.id',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._id = id
 
     @property
@@ -121,6 +126,7 @@ class ExecutionContext(object):
     def kind(self, kind):
         validate_attribute(kind, 'execution_context.kind',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._kind = kind
 
     @property
@@ -146,7 +152,8 @@ class ExecutionContext(object):
     def participants(self, participants):
         validate_attribute(participants, 'execution_context.participants',
                            expected_type = list)
-        self._participants = participants
+        self._changed()
+        self._participants = ModelList(participants, self)
 
     @property
     def rate(self):
@@ -171,6 +178,7 @@ class ExecutionContext(object):
     def rate(self, rate):
         validate_attribute(rate, 'execution_context.rate',
                            expected_type=[int, float], required=False)
+        self._changed()
         self._rate = rate
 
     @property
@@ -197,40 +205,46 @@ class ExecutionContext(object):
     def properties(self, properties):
         validate_attribute(properties, 'execution_context.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing an execution context into
         this object.
 
         '''
-        self.id = node.getAttributeNS(RTS_NS, 'id')
-        self.kind = node.getAttributeNS(RTS_NS, 'kind')
+        self.id = intern_string(node.getAttributeNS(RTS_NS, 'id'))
+        self.kind = intern_string(node.getAttributeNS(RTS_NS, 'kind'))
         if node.hasAttributeNS(RTS_NS, 'rate'):
             self.rate = float(node.getAttributeNS(RTS_NS, 'rate'))
         else:
             self.rate = 0.0
-        self._participants = []
-        for c in node.getElementsByTagNameNS(RTS_NS, 'Participants'):
-            self._participants.append(TargetComponent().parse_xml_node(c))
-        for c in get_direct_child_elements_xml(node, prefix=RTS_EXT_NS,
-                                               local_name='Properties'):
-            name, value = parse_properties_xml(c)
-            self._properties[name] = value
+        self._participants = ModelList(parent=self)
+        for c in get_direct_child_elements_xml(node):
+            if c.namespaceURI == RTS_NS and c.localName == 'Participants':
+                self._participants.append(TargetComponent().parse_xml_node(c))
+            elif c.namespaceURI == RTS_EXT_NS and c.localName == 'Properties':
+                name, value = parse_properties_xml(c)
+                self._properties[name] = value
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new execution context from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML spefication of an execution context into this
         object.
 
         '''
-        self.id = y['id']
-        self.kind = y['kind']
+        self.id = intern_string(y['id'])
+        self.kind = intern_string(y['kind'])
         if 'rate' in y:
             self.rate = float(y['rate'])
         else:
             self.rate = 0.0
-        self._participants = []
+        self._participants = ModelList(parent=self)
         if 'participants' in y:
             for p in y.get('participants'):
                 self._participants.append(TargetComponent().parse_yaml(p))
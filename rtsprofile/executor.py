@@ -0,0 +1,693 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: executor.py
+
+Carrying out the message sending actions of an RT system with asyncio.
+
+The components are acted on through a @ref ComponentDriver. @ref MockDriver
+stands in for real components, so that the executor can be tested and
+measured without them.
+
+Executing actions requires Python 3.4 or later, for the asyncio module. The
+executor is written with callbacks rather than coroutines so that this module
+can still be imported by Python 2.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from rtsprofile.exceptions import ActionFailedError
+from rtsprofile.lifecycle import ASYNC, SYNC, plan_lifecycle, \
+                                 target_to_string
+
+
+##############################################################################
+## Step states
+
+# The component carried out the action
+DONE = 'done'
+# Sending the action failed, or the component did not carry it out
+FAILED = 'failed'
+# The action was not sent because a step it waits for failed or was skipped
+SKIPPED = 'skipped'
+
+
+##############################################################################
+## ComponentDriver object
+
+class ComponentDriver(object):
+    '''The interface used by a @ref LifecycleExecutor to send actions to
+    components.
+
+    Subclass it to act on real components, for example through a naming
+    service, or use @ref MockDriver to stand in for them.
+
+    '''
+
+    __slots__ = ()
+
+    def act(self, action, target):
+        '''Send an action to the execution context of a component.
+
+        This is called from the event loop, so it must not block.
+
+        @param action The name of the action, such as 'activation'.
+        @param target The key of the execution context: a (component ID,
+        instance name, execution context ID) tuple.
+        @return An awaitable, such as a coroutine or future, that completes
+        when the component has carried out the action, or raises an
+        exception if it did not.
+
+        '''
+        raise NotImplementedError
+
+
+##############################################################################
+## MockDriver object
+
+class MockDriver(ComponentDriver):
+    '''A driver that stands in for components, carrying out each action after
+    a configurable latency.
+
+    '''
+
+    __slots__ = ('_latency', '_latencies', '_failures', '_time_scale',
+                 '_calls', '_active', '_max_active')
+
+    def __init__(self, latency=0, latencies=None, failures=None,
+                 time_scale=0.001):
+        '''Constructor.
+
+        @param latency The time each component takes to carry out an action,
+        in milliseconds: either a number, or a callable given the name of the
+        action and the key of the execution context and returning a number.
+        @param latencies A dictionary of latencies for particular components,
+        overriding latency. The keys are execution context keys or instance
+        names.
+        @param failures The execution context keys or instance names of the
+        components that fail to carry out actions. They fail with
+        ActionFailedError after their latency.
+        @param time_scale The length of a millisecond in seconds. Use a
+        smaller value to run faster than real time; it should match that of
+        the executor.
+
+        '''
+        self._latency = latency
+        if latencies is None:
+            latencies = {}
+        self._latencies = latencies
+        if failures is None:
+            failures = ()
+        self._failures = set(failures)
+        self._time_scale = time_scale
+        self._calls = []
+        self._active = 0
+        self._max_active = 0
+
+    @property
+    def calls(self):
+        '''The (action, execution context key) pairs of the actions sent, in
+        the order they were sent.
+
+        '''
+        return self._calls
+
+    @property
+    def active(self):
+        '''The number of actions being carried out.'''
+        return self._active
+
+    @property
+    def max_active(self):
+        '''The most actions that were being carried out at once.'''
+        return self._max_active
+
+    def latency_for(self, action, target):
+        '''Get the time a component takes to carry out an action.
+
+        @param action The name of the action.
+        @param target The key of the execution context.
+        @return The latency in milliseconds.
+
+        Example:
+        >>> d = MockDriver(latency=5, latencies={'RTC1': 20})
+        >>> d.latency_for('startup', ('id', 'RTC1', 'ec'))
+        20
+        >>> d.latency_for('startup', ('id', 'RTC2', 'ec'))
+        5
+        >>> d = MockDriver(latency=lambda action, target: len(target[1]))
+        >>> d.latency_for('startup', ('id', 'RTC2', 'ec'))
+        4
+        '''
+        latency = _lookup(self._latencies, target)
+        if latency is not None:
+            return latency
+        if callable(self._latency):
+            return self._latency(action, target)
+        return self._latency
+
+    def act(self, action, target):
+        asyncio = _get_asyncio()
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._calls.append((action, target))
+        self._active += 1
+        self._max_active = max(self._max_active, self._active)
+        error = None
+        if target in self._failures or target[1] in self._failures:
+            error = ActionFailedError('{0} of {1}'.format(action,
+                    target_to_string(target)))
+        loop.call_later(self.latency_for(action, target) * self._time_scale,
+                        self._complete, future, error)
+        return future
+
+    def _complete(self, future, error):
+        self._active -= 1
+        if future.cancelled():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+
+##############################################################################
+## StepResult object
+
+class StepResult(object):
+    '''The outcome of one step of an execution.
+
+    All times are in milliseconds from the start of the execution, or None if
+    the step did not get that far.
+
+    '''
+
+    __slots__ = ('_step', '_state', '_start', '_sent', '_finished', '_error',
+                 '_timed_out')
+
+    def __init__(self, step):
+        '''Constructor.
+
+        @param step The @ref PlanStep.
+
+        '''
+        self._step = step
+        self._state = None
+        self._start = None
+        self._sent = None
+        self._finished = None
+        self._error = None
+        self._timed_out = []
+
+    def __str__(self):
+        result = '{0}: {1}'.format(target_to_string(self.target), self._state)
+        if self._sent is not None:
+            result += ', sent at {0:.1f} ms'.format(self._sent)
+        if self._finished is not None:
+            result += ', finished at {0:.1f} ms'.format(self._finished)
+        if self._timed_out:
+            result += ', stopped waiting for ' + ', '.join(
+                    [target_to_string(t) for t in self._timed_out])
+        if self._error is not None:
+            result += ': {0}'.format(self._error)
+        return result
+
+    @property
+    def step(self):
+        '''The @ref PlanStep.'''
+        return self._step
+
+    @property
+    def target(self):
+        '''The key of the execution context acted on.'''
+        return self._step.target
+
+    @property
+    def state(self):
+        '''DONE, FAILED or SKIPPED.'''
+        return self._state
+
+    @property
+    def start(self):
+        '''When the steps this step waits for allowed it to start.'''
+        return self._start
+
+    @property
+    def sent(self):
+        '''When the action was sent, at the end of the wait time.'''
+        return self._sent
+
+    @property
+    def finished(self):
+        '''When the component carried out the action or failed to.'''
+        return self._finished
+
+    @property
+    def error(self):
+        '''The exception raised if the step failed, or None.'''
+        return self._error
+
+    @property
+    def timed_out(self):
+        '''The keys of the preceding components that this step stopped waiting
+        for because the timeout of its Preceding condition passed.
+
+        '''
+        return self._timed_out
+
+
+##############################################################################
+## ExecutionReport object
+
+class ExecutionReport(object):
+    '''The outcome of executing a message sending action.'''
+
+    __slots__ = ('_action', '_results', '_duration', '_max_in_flight',
+                 '_index')
+
+    def __init__(self, action, results, duration, max_in_flight):
+        '''Constructor.
+
+        @param action The name of the action.
+        @param results The @ref StepResult objects, in the order of the
+        steps of the plan.
+        @param duration The time from the start of the execution until the
+        last step finished, in milliseconds.
+        @param max_in_flight The most actions that were sent and not finished
+        at once.
+
+        '''
+        self._action = action
+        self._results = results
+        self._duration = duration
+        self._max_in_flight = max_in_flight
+        self._index = dict([(r.target, r) for r in results])
+
+    def __str__(self):
+        result = '{0}: {1:.1f} ms, at most {2} in flight\n'.format(
+                self._action, self._duration, self._max_in_flight)
+        for r in self._results:
+            result += '  {0}\n'.format(r)
+        return result[:-1] # Lop off the last new line
+
+    @property
+    def action(self):
+        '''The name of the action.'''
+        return self._action
+
+    @property
+    def results(self):
+        '''The @ref StepResult of every step, in the order of the steps of the
+        plan.
+
+        '''
+        return self._results
+
+    @property
+    def duration(self):
+        '''The time from the start of the execution until the last step
+        finished, in milliseconds.
+
+        '''
+        return self._duration
+
+    @property
+    def max_in_flight(self):
+        '''The most actions that were sent and not finished at once.'''
+        return self._max_in_flight
+
+    @property
+    def succeeded(self):
+        '''True if every step was done.'''
+        return all([r.state == DONE for r in self._results])
+
+    @property
+    def failed(self):
+        '''The results of the steps that failed.'''
+        return [r for r in self._results if r.state == FAILED]
+
+    @property
+    def skipped(self):
+        '''The results of the steps that were skipped.'''
+        return [r for r in self._results if r.state == SKIPPED]
+
+    def result(self, target):
+        '''Get the result of the step acting on an execution context.
+
+        @param target The key of the execution context.
+        @return The @ref StepResult, or None if there is no such step.
+
+        '''
+        return self._index.get(target)
+
+
+##############################################################################
+## LifecycleExecutor object
+
+class LifecycleExecutor(object):
+    '''Carries out message sending actions on components, as concurrently as
+    their conditions allow.
+
+    Every step is started as soon as the steps it waits for allow:
+
+    - A step that waits for a preceding component with SYNC timing starts
+      when that component has carried out the action. If the Preceding
+      condition has a timeout, it stops waiting once that long has passed
+      since the action was sent to the preceding component, and the result
+      records that it timed out.
+    - A step that waits with ASYNC timing starts when the action has been
+      sent to the preceding component.
+    - With strict_sequence, a step also waits for all steps with lower
+      sequence numbers to finish.
+
+    Once a step has started, it waits for the wait time of its WaitTime
+    conditions, then sends the action through the driver. If sending fails,
+    or the component does not carry out the action, the step fails. Steps
+    that wait for a step that failed, or was skipped, are skipped, except
+    that those waiting with ASYNC timing for a step whose action was sent
+    still go ahead.
+
+    The timing is the same as that assumed by @ref analyze_critical_path.
+
+    '''
+
+    __slots__ = ('_driver', '_strict_sequence', '_time_scale')
+
+    def __init__(self, driver, strict_sequence=False, time_scale=0.001):
+        '''Constructor.
+
+        @param driver The @ref ComponentDriver used to send actions.
+        @param strict_sequence If True, every step waits for all steps with
+        lower sequence numbers to finish.
+        @param time_scale The length of a millisecond of the wait times and
+        timeouts in seconds. Use a smaller value to run faster than real time.
+
+        '''
+        self._driver = driver
+        self._strict_sequence = strict_sequence
+        self._time_scale = time_scale
+
+    @property
+    def driver(self):
+        '''The @ref ComponentDriver used to send actions.'''
+        return self._driver
+
+    @property
+    def strict_sequence(self):
+        '''If True, every step waits for all steps with lower sequence numbers
+        to finish.
+
+        '''
+        return self._strict_sequence
+
+    @property
+    def time_scale(self):
+        '''The length of a millisecond of the wait times and timeouts in
+        seconds.
+
+        '''
+        return self._time_scale
+
+    def execute(self, message_sending, action, loop=None):
+        '''Start carrying out a message sending action.
+
+        The steps are started once the event loop runs. Cancelling the
+        returned future cancels the steps that have not finished.
+
+        @param message_sending The MessageSending object, such as the
+        activation of an RtsProfile.
+        @param action The name of the action, given to the driver.
+        @param loop The event loop to use. If None, the current event loop is
+        used.
+        @return An asyncio future that gives an @ref ExecutionReport.
+        @raises DependencyCycleError
+
+        '''
+        asyncio = _get_asyncio()
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        plan = plan_lifecycle(message_sending, self._strict_sequence)
+        return _Execution(self, plan, action, loop, asyncio).start()
+
+    def run(self, message_sending, action):
+        '''Carry out a message sending action in a new event loop, and wait
+        for it to finish.
+
+        @param message_sending The MessageSending object.
+        @param action The name of the action, given to the driver.
+        @return An @ref ExecutionReport.
+        @raises DependencyCycleError
+
+        '''
+        asyncio = _get_asyncio()
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.execute(message_sending,
+                                                        action, loop))
+        finally:
+            loop.close()
+
+
+##############################################################################
+## Execution state
+
+class _Execution(object):
+    # The state of one execution of a plan. The nodes are the steps, in the
+    # order of the plan, then a barrier for each sequence number if the
+    # sequence is strict. Each node has a list of out edges, one for each
+    # node waiting for it: [waiting node, timing, timeout, satisfied, timer].
+
+    def __init__(self, executor, plan, action, loop, asyncio):
+        self._driver = executor.driver
+        self._scale = executor.time_scale
+        self._action = action
+        self._loop = loop
+        self._asyncio = asyncio
+        self._results = [StepResult(s) for s in plan.steps]
+        self._steps = plan.steps
+        num_steps = len(self._steps)
+        index = dict([(s.target, ii) for ii, s in enumerate(self._steps)])
+        self._out = [[] for s in self._steps]
+        self._waiting = [0] * num_steps
+        for ii, step in enumerate(self._steps):
+            for d, timing in step.dependencies:
+                self._edge(index[d], ii, timing, step.timeout)
+        if executor.strict_sequence:
+            self._add_barriers()
+        self._state = [None] * len(self._out)
+        self._remaining = len(self._out)
+        self._in_flight = 0
+        self._max_in_flight = 0
+        # Timers and driver futures to cancel if the execution is cancelled
+        self._pending = set()
+        self._start = None
+        self._done = loop.create_future()
+
+    def start(self):
+        self._done.add_done_callback(self._cancelled)
+        self._loop.call_soon(self._begin)
+        return self._done
+
+    def _edge(self, node, waiting_node, timing, timeout):
+        self._out[node].append([waiting_node, timing, timeout, False, None])
+        self._waiting[waiting_node] += 1
+
+    def _add_barriers(self):
+        # A barrier between each pair of consecutive sequence numbers, as in
+        # plan_lifecycle
+        by_seq = {}
+        for ii, step in enumerate(self._steps):
+            if step.sequence is not None:
+                by_seq.setdefault(step.sequence, []).append(ii)
+        barrier = None
+        for seq in sorted(by_seq):
+            if barrier is not None:
+                for ii in by_seq[seq]:
+                    self._edge(barrier, ii, ASYNC, 0)
+            barrier = len(self._out)
+            self._out.append([])
+            self._waiting.append(0)
+            for ii in by_seq[seq]:
+                self._edge(ii, barrier, SYNC, 0)
+
+    def _now(self):
+        return (self._loop.time() - self._start) / self._scale
+
+    def _begin(self):
+        self._start = self._loop.time()
+        if not self._remaining:
+            self._finish()
+            return
+        for ii, waiting in enumerate(self._waiting):
+            if not waiting:
+                self._ready(ii)
+
+    def _ready(self, ii):
+        # All the nodes a node waits for allow it to start
+        if self._done.done() or self._state[ii] is not None:
+            return
+        if ii >= len(self._steps):
+            # A barrier is passed as soon as it is reached
+            self._sent(ii)
+            self._resolve(ii, DONE)
+            return
+        self._results[ii]._start = self._now()
+        wait = self._steps[ii].wait_time
+        if wait:
+            self._later(wait, self._send, ii)
+        else:
+            self._send(ii)
+
+    def _send(self, ii):
+        if self._done.done():
+            return
+        try:
+            future = self._asyncio.ensure_future(
+                    self._driver.act(self._action, self._steps[ii].target),
+                    loop=self._loop)
+        except Exception as e:
+            self._results[ii]._error = e
+            self._results[ii]._finished = self._now()
+            self._resolve(ii, FAILED)
+            return
+        self._pending.add(future)
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        self._results[ii]._sent = self._now()
+        future.add_done_callback(lambda f: self._action_done(ii, f))
+        self._sent(ii)
+
+    def _action_done(self, ii, future):
+        self._pending.discard(future)
+        if self._done.done():
+            return
+        self._in_flight -= 1
+        result = self._results[ii]
+        result._finished = self._now()
+        if future.cancelled():
+            result._error = self._asyncio.CancelledError()
+        else:
+            result._error = future.exception()
+        if result._error is None:
+            self._resolve(ii, DONE)
+        else:
+            self._resolve(ii, FAILED)
+
+    def _sent(self, ii):
+        # Let the nodes waiting for the action to be sent start, and start
+        # the timeouts of those waiting for it to finish
+        for edge in self._out[ii]:
+            if edge[1] == ASYNC:
+                self._satisfy(edge)
+            elif edge[2]:
+                edge[4] = self._later(edge[2], self._time_out, ii, edge)
+
+    def _time_out(self, ii, edge):
+        edge[4] = None
+        if edge[3]:
+            return
+        waiting = edge[0]
+        if waiting < len(self._steps) and self._state[waiting] is None:
+            self._results[waiting]._timed_out.append(self._steps[ii].target)
+        self._satisfy(edge)
+
+    def _satisfy(self, edge):
+        edge[3] = True
+        self._cancel_timeout(edge)
+        waiting = edge[0]
+        if self._state[waiting] is not None:
+            return
+        self._waiting[waiting] -= 1
+        if not self._waiting[waiting]:
+            # Start it from the loop rather than here, so that long chains of
+            # steps do not recurse
+            self._loop.call_soon(self._ready, waiting)
+
+    def _resolve(self, ii, state):
+        # Record the end of a node, and release the nodes waiting for it or,
+        # if it was not done, skip them and the nodes waiting for them
+        self._state[ii] = state
+        resolved = [ii]
+        while resolved:
+            ii = resolved.pop()
+            state = self._state[ii]
+            if ii < len(self._steps):
+                self._results[ii]._state = state
+            self._remaining -= 1
+            for edge in self._out[ii]:
+                if edge[3]:
+                    continue
+                if state == DONE:
+                    self._satisfy(edge)
+                    continue
+                edge[3] = True
+                self._cancel_timeout(edge)
+                if self._state[edge[0]] is None:
+                    self._state[edge[0]] = SKIPPED
+                    resolved.append(edge[0])
+        if not self._remaining:
+            self._finish()
+
+    def _later(self, delay, callback, *args):
+        handle = self._loop.call_later(delay * self._scale, callback, *args)
+        self._pending.add(handle)
+        return handle
+
+    def _cancel_timeout(self, edge):
+        if edge[4] is not None:
+            edge[4].cancel()
+            self._pending.discard(edge[4])
+            edge[4] = None
+
+    def _finish(self):
+        if self._done.done():
+            return
+        self._pending.clear()
+        duration = max([r.finished for r in self._results
+                        if r.finished is not None] + [0])
+        self._done.set_result(ExecutionReport(self._action, self._results,
+                                              duration,
+                                              self._max_in_flight))
+
+    def _cancelled(self, done):
+        # Cancel everything still pending if the execution is cancelled
+        if not done.cancelled():
+            return
+        for p in list(self._pending):
+            p.cancel()
+        self._pending.clear()
+
+
+##############################################################################
+## Private functions
+
+def _lookup(mapping, target):
+    # Get the value for an execution context from a dictionary keyed by
+    # execution context keys or instance names
+    if target in mapping:
+        return mapping[target]
+    return mapping.get(target[1])
+
+
+def _get_asyncio():
+    # Import asyncio when an action is first executed
+    import asyncio
+    return asyncio
+
+
+# vim: tw=79
@@ -0,0 +1,148 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: fingerprint.py
+
+Content hashes of RtsProfile objects.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import hashlib
+import json
+
+from rtsprofile import RTS_EXT_NS_YAML
+from rtsprofile.component import Component
+
+
+##############################################################################
+## Public API functions
+
+def fingerprint(obj):
+    '''Get the fingerprint of an object of the model: a hash of its content.
+
+    Two objects with the same content have the same fingerprint, so
+    fingerprints can be compared to find changed or duplicate objects without
+    saving them.
+
+    The fingerprint is the SHA-1 hash of the canonical JSON form of the
+    object's dictionary form. Fingerprints are combined in a tree: the
+    fingerprint of a profile is computed from the fingerprints of its
+    components, groups, connectors and message sending objects, and the
+    fingerprint of a component from those of its configuration sets. Those
+    lists are hashed as sets, so their order does not change the fingerprint,
+    matching @ref diff.
+
+    The fingerprints of profiles, components, configuration sets, connectors
+    and message sending objects are cached in the objects with their
+    revision (see @ref tracking). A change to an object makes the cached
+    fingerprints of that object and of the objects holding it out of date,
+    but not those of other objects, so only the changed path is hashed
+    again.
+
+    @param obj The object. Any object of the model with a to_dict method may
+    be given, as well as an RtsProfile.
+    @return The fingerprint as a string of hexadecimal digits.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> a = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> b = RtsProfile(yaml_spec=a.save_to_yaml())
+    >>> fingerprint(a) == fingerprint(b)
+    True
+    >>> len(fingerprint(a))
+    40
+    >>> old = fingerprint(b.components[0])
+    >>> b.components[0].configuration_sets[0].configuration_data[0].data = '2'
+    >>> fingerprint(b.components[0]) == old
+    False
+    >>> fingerprint(a) == fingerprint(b)
+    False
+    >>> fingerprint(a.components[1]) == fingerprint(b.components[1])
+    True
+
+    Reordering the components does not change the fingerprint:
+    >>> c = RtsProfile(yaml_spec=a.save_to_yaml())
+    >>> c.components.reverse()
+    >>> fingerprint(a) == fingerprint(c)
+    True
+    '''
+    cached = getattr(obj, '_fingerprint', _NOT_CACHED)
+    if cached is _NOT_CACHED:
+        return _hash(_tree(obj))
+    if cached is not None and cached[0] == obj._revision:
+        return cached[1]
+    result = _hash(_tree(obj))
+    # The revision is read afterwards, as getting the dictionary form of a
+    # lazily-parsed component parses its children
+    obj._fingerprint = (obj._revision, result)
+    return result
+
+
+##############################################################################
+## Private functions
+
+# Marks objects that do not cache their fingerprint
+_NOT_CACHED = object()
+
+
+_MESSAGE_SENDING = (('startUp', 'startup'), ('shutDown', 'shutdown'),
+                    ('activation', 'activation'),
+                    ('deactivation', 'deactivation'),
+                    ('resetting', 'resetting'),
+                    ('initializing', 'initializing'),
+                    ('finalizing', 'finalizing'))
+
+
+def _tree(obj):
+    # Get the dictionary form of an object, with the child objects whose
+    # fingerprints are combined replaced by their fingerprints
+    if _is_profile(obj):
+        d = obj._attributes_to_dict()
+        d['components'] = _set_of(obj.components)
+        d['groups'] = _set_of(obj.groups)
+        d['dataPortConnectors'] = _set_of(obj.data_port_connectors)
+        d['servicePortConnectors'] = _set_of(obj.service_port_connectors)
+        for name, attr in _MESSAGE_SENDING:
+            ms = getattr(obj, attr)
+            if ms is not None:
+                d[name] = fingerprint(ms)
+        d[RTS_EXT_NS_YAML + 'properties'] = sorted(obj.properties.items())
+        return d
+    d = obj.to_dict()
+    if isinstance(obj, Component):
+        d['configurationSets'] = _set_of(obj.configuration_sets)
+    return d
+
+
+def _set_of(objs):
+    # Combine the fingerprints of a list of objects without their order
+    return sorted([fingerprint(o) for o in objs])
+
+
+def _hash(tree):
+    # Hash the canonical JSON form of a dictionary tree
+    s = json.dumps(tree, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(s.encode('utf-8')).hexdigest()
+
+
+def _is_profile(obj):
+    return hasattr(obj, '_attributes_to_dict')
+
+
+# vim: tw=79
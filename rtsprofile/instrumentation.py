@@ -0,0 +1,366 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: instrumentation.py
+
+Per-phase timing of parsing and saving profiles.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from timeit import default_timer
+
+
+##############################################################################
+## Phases
+
+# Reading the document into memory (parsing the XML or YAML text), or
+# releasing the parsed document afterwards
+DOCUMENT = 'document'
+# The attributes of the RtsProfile itself
+ATTRIBUTES = 'attributes'
+COMPONENTS = 'components'
+GROUPS = 'groups'
+# Data port and service port connectors
+CONNECTORS = 'connectors'
+# Start up, shut down, activation, etc.
+MESSAGE_SENDING = 'message_sending'
+# The version up log and properties of the extended specification
+EXTENDED = 'extended'
+# Writing the saved document out as text
+SERIALIZATION = 'serialization'
+
+
+##############################################################################
+## PhaseRecord object
+
+class PhaseRecord(object):
+    '''The measurements of one phase of a parse or save operation.'''
+
+    __slots__ = ('_operation', '_phase', '_time', '_count', '_memory')
+
+    def __init__(self, operation, phase, time, count, memory=None):
+        '''Constructor.
+
+        @param operation The name of the RtsProfile method measured, such as
+        'parse_from_xml'.
+        @param phase The phase, such as COMPONENTS.
+        @param time The time spent in the phase, in seconds.
+        @param count The number of objects handled in the phase.
+        @param memory The change in memory allocated by Python during the
+        phase, in bytes, or None if memory was not traced.
+
+        '''
+        self._operation = operation
+        self._phase = phase
+        self._time = time
+        self._count = count
+        self._memory = memory
+
+    def __str__(self):
+        result = '{0} {1}: {2:.6f} s, {3} objects'.format(self._operation,
+                self._phase, self._time, self._count)
+        if self._memory is not None:
+            result += ', {0:+d} bytes'.format(self._memory)
+        return result
+
+    @property
+    def operation(self):
+        '''The name of the RtsProfile method measured.'''
+        return self._operation
+
+    @property
+    def phase(self):
+        '''The phase.'''
+        return self._phase
+
+    @property
+    def time(self):
+        '''The time spent in the phase, in seconds.'''
+        return self._time
+
+    @property
+    def count(self):
+        '''The number of objects handled in the phase.
+
+        For the children of the profile, this is the number of components,
+        connectors, etc. For the serialization of XML, it is the number of
+        elements written.
+
+        '''
+        return self._count
+
+    @property
+    def memory(self):
+        '''The change in memory allocated by Python during the phase, in
+        bytes, or None if memory was not traced.
+
+        '''
+        return self._memory
+
+
+##############################################################################
+## Collector object
+
+class Collector(object):
+    '''An instrument that keeps the records of every operation it is given.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> c = Collector()
+    >>> s = RtsProfile()
+    >>> s.parse_from_xml(open('test/rtsystem.xml'), instrument=c)
+    >>> [(r.phase, r.count) for r in c.records]
+    [('document', 1), ('attributes', 1), ('components', 3), \
+('connectors', 3), ('message_sending', 2)]
+    >>> c.clear()
+    >>> yaml = s.save_to_yaml(instrument=c)
+    >>> [r.phase for r in c.records]
+    ['attributes', 'components', 'groups', 'connectors', 'message_sending', \
+'extended', 'serialization']
+    >>> c.total_time() == sum([r.time for r in c.records])
+    True
+
+    Nothing is reported for an operation that fails:
+    >>> c.clear()
+    >>> s.parse_from_xml('non-XML string', instrument=c)
+    Traceback (most recent call last):
+    ...
+    ExpatError: syntax error: line 1, column 0
+    >>> c.records
+    []
+    '''
+
+    def __init__(self, trace_memory=False):
+        '''Constructor.
+
+        @param trace_memory If True, the change in memory allocated during
+        each phase is measured with the tracemalloc module. This slows the
+        operations considerably. tracemalloc is started for each operation if
+        it is not already tracing. Memory is never traced under Python 2.
+
+        '''
+        self.trace_memory = trace_memory
+        self._records = []
+
+    def __call__(self, record):
+        self._records.append(record)
+
+    def __str__(self):
+        result = ''
+        for r in self._records:
+            result += '{0}\n'.format(r)
+        return result[:-1] # Lop off the last new line
+
+    @property
+    def records(self):
+        '''The @ref PhaseRecord objects collected, in the order they were
+        given.
+
+        '''
+        return self._records
+
+    def clear(self):
+        '''Discard the records collected so far.'''
+        self._records = []
+
+    def total_time(self, operation=None, phase=None):
+        '''The total time of the records collected, in seconds.
+
+        @param operation If not None, only records of this operation are
+        counted.
+        @param phase If not None, only records of this phase are counted.
+
+        '''
+        return sum([r.time for r in self._records
+                    if (operation is None or r.operation == operation) and
+                       (phase is None or r.phase == phase)])
+
+
+##############################################################################
+## Public API functions
+
+def set_default_instrument(instrument):
+    '''Set the instrument used by the parse and save methods of RtsProfile
+    when none is given to them.
+
+    This allows an application to measure every profile it loads without
+    changing the code that loads them.
+
+    An instrument is any callable taking a @ref PhaseRecord. At the end of
+    each measured operation, it is called once for each phase of the
+    operation, in the order the phases were first entered. Phases that are
+    entered more than once, such as when the components of an XML document
+    are not all together, are reported once with the total time and count.
+    The records of an operation that raises an exception are not reported.
+    If the instrument has an attribute trace_memory that is True, the
+    change in allocated memory is also measured; see @ref Collector.
+
+    @param instrument The instrument, or None to measure nothing. This is the
+    default.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> c = Collector()
+    >>> set_default_instrument(c)
+    >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> xml = s.save_to_xml()
+    >>> set_default_instrument(None)
+    >>> sorted(set([r.operation for r in c.records]))
+    ['parse_from_xml', 'save_to_xml']
+    >>> c.total_time('save_to_xml', SERIALIZATION) > 0
+    True
+    '''
+    _default[0] = instrument
+
+
+def get_default_instrument():
+    '''Get the instrument set with @ref set_default_instrument, or None.'''
+    return _default[0]
+
+
+def recorder(operation, instrument=None):
+    '''Get a recorder to measure the phases of an operation.
+
+    Used by the methods of RtsProfile. The recorder is a context manager;
+    call its enter method with the phase and the number of objects it will
+    handle as each phase starts. If neither instrument nor the default
+    instrument is set, a recorder that does nothing is returned, so that
+    the cost of an operation that is not measured is only the calls to
+    enter.
+
+    @param operation The name of the operation.
+    @param instrument The instrument to report to. If None, the default
+    instrument is used.
+
+    '''
+    if instrument is None:
+        instrument = _default[0]
+        if instrument is None:
+            return NULL_RECORDER
+    return _Recorder(operation, instrument)
+
+
+##############################################################################
+## Recorders
+
+class _NullRecorder(object):
+    # A recorder that measures nothing, used when there is no instrument
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def enter(self, phase, count=1):
+        pass
+
+
+NULL_RECORDER = _NullRecorder()
+
+
+class _Recorder(object):
+    # A recorder that measures the phases of one operation
+
+    __slots__ = ('_operation', '_instrument', '_trace', '_stop_tracing',
+                 '_order', '_totals', '_phase', '_start', '_start_memory')
+
+    def __init__(self, operation, instrument):
+        self._operation = operation
+        self._instrument = instrument
+        # The tracemalloc module if memory is traced, otherwise None
+        self._trace = None
+        if getattr(instrument, 'trace_memory', False):
+            self._trace = _get_tracemalloc()
+        self._stop_tracing = False
+        self._order = []
+        # Phase: [time, count, memory]
+        self._totals = {}
+        self._phase = None
+        self._start = None
+        self._start_memory = None
+
+    def __enter__(self):
+        if self._trace and not self._trace.is_tracing():
+            self._trace.start()
+            self._stop_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._close()
+        if self._stop_tracing:
+            self._trace.stop()
+        if exc_type is None:
+            for phase in self._order:
+                time, count, memory = self._totals[phase]
+                self._instrument(PhaseRecord(self._operation, phase, time,
+                                             count, memory))
+        return False
+
+    def enter(self, phase, count=1):
+        self._close()
+        if phase not in self._totals:
+            self._order.append(phase)
+            if self._trace:
+                self._totals[phase] = [0.0, 0, 0]
+            else:
+                self._totals[phase] = [0.0, 0, None]
+        self._totals[phase][1] += count
+        self._phase = phase
+        if self._trace:
+            self._start_memory = self._trace.get_traced_memory()[0]
+        self._start = default_timer()
+
+    def _close(self):
+        # Add the time since the current phase was entered to its total
+        if self._phase is None:
+            return
+        now = default_timer()
+        totals = self._totals[self._phase]
+        totals[0] += now - self._start
+        if self._trace:
+            totals[2] += self._trace.get_traced_memory()[0] - \
+                    self._start_memory
+        self._phase = None
+
+
+##############################################################################
+## Private functions
+
+def _get_tracemalloc():
+    # Import tracemalloc when memory is first traced, or get None if it is not
+    # available (under Python 2)
+    try:
+        import tracemalloc
+    except ImportError:
+        return None
+    return tracemalloc
+
+
+##############################################################################
+## Private values
+
+# The default instrument, in a list so that it can be set
+_default = [None]
+
+
+# vim: tw=79
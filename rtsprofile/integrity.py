@@ -0,0 +1,261 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: integrity.py
+
+Checking that the references in a profile point at things that exist.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from rtsprofile.message_sending import Preceding
+
+
+##############################################################################
+## Problems
+
+# More than one component has the same ID and instance name
+DUPLICATE_COMPONENT = 'duplicate component'
+MISSING_COMPONENT = 'missing component'
+MISSING_DATA_PORT = 'missing data port'
+MISSING_SERVICE_PORT = 'missing service port'
+MISSING_EXECUTION_CONTEXT = 'missing execution context'
+MISSING_CONFIGURATION_SET = 'missing configuration set'
+
+
+##############################################################################
+## BrokenReference object
+
+class BrokenReference(object):
+    '''A reference in a profile that points at something that does not
+    exist.
+
+    '''
+
+    __slots__ = ('_problem', '_location', '_reference')
+
+    def __init__(self, problem, location, reference):
+        '''Constructor.
+
+        @param problem The problem, such as MISSING_COMPONENT.
+        @param location Where the reference is in the profile, written as the
+        properties followed to reach it from the RtsProfile, such as
+        'data_port_connectors[0].source_data_port'.
+        @param reference The thing referred to, as a string.
+
+        '''
+        self._problem = problem
+        self._location = location
+        self._reference = reference
+
+    def __str__(self):
+        return '{0}: {1} {2}'.format(self._location, self._problem,
+                                     self._reference)
+
+    @property
+    def problem(self):
+        '''The problem, such as MISSING_COMPONENT.'''
+        return self._problem
+
+    @property
+    def location(self):
+        '''Where the reference is in the profile, such as
+        'data_port_connectors[0].source_data_port'.
+
+        '''
+        return self._location
+
+    @property
+    def reference(self):
+        '''The thing referred to, as a string.'''
+        return self._reference
+
+
+##############################################################################
+## Public API functions
+
+def check_integrity(profile):
+    '''Check that every reference in a profile points at something that
+    exists.
+
+    The references checked are:
+
+    - The ports of the data and service port connectors, which must be data
+      and service ports, respectively, of components in the profile.
+    - The members of the component groups, the participants of composite
+      components and of execution contexts, which must be components in the
+      profile.
+    - The targets and preceding components of the message sending actions,
+      which must be execution contexts of components in the profile.
+    - The active configuration set of each component, which must be one of
+      its configuration sets.
+
+    Each component that shares its ID and instance name with an earlier one
+    is also reported, as references to it are ambiguous.
+
+    The components are indexed once, then every reference is checked
+    against the indexes, so the time taken is linear in the size of the
+    profile.
+
+    @param profile The RtsProfile.
+    @return A list of @ref BrokenReference objects, in the order the
+    references appear in the profile. It is empty if all references are
+    valid.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+
+    The sample profile has a component with an active configuration set it
+    does not have, a connector to a misspelt port, and a start up target
+    with the wrong component ID:
+    >>> for b in check_integrity(s):
+    ...     print(b)
+    components[1].active_configuration_set: missing configuration set \
+configSet_1
+    data_port_connectors[1].target_data_port: missing data port \
+RTC:SampleVendor:SampleCategory:SampleComponent3:0.5.0:SampleComponent3_1.\
+Comp3_inort2
+    startup.targets[0].target_component: missing component \
+RTC:SampleVendor.SampleCategory.SampleComponent:1.0.0:SampleComponent_1
+
+    Every reference to a removed component is found:
+    >>> c = s.components.pop(1)
+    >>> for b in check_integrity(s):
+    ...     print('{0}: {1}'.format(b.location, b.problem))
+    data_port_connectors[0].target_data_port: missing component
+    data_port_connectors[1].target_data_port: missing data port
+    startup.targets[0].target_component: missing component
+    startup.targets[1].target_component: missing component
+    shutdown.targets[1].target_component: missing component
+    shutdown.targets[2].preceding_components[1]: missing component
+    '''
+    problems = []
+    index = _ComponentIndex(profile.components, problems)
+    check = index.check
+    for ii, c in enumerate(profile.components):
+        if c.active_configuration_set and c.active_configuration_set not in \
+                [cs.id for cs in c.configuration_sets]:
+            problems.append(BrokenReference(MISSING_CONFIGURATION_SET,
+                    'components[{0}].active_configuration_set'.format(ii),
+                    c.active_configuration_set))
+        for jj, p in enumerate(c.participants):
+            check(p.target_component, None, None,
+                  'components[{0}].participants[{1}].target_component', ii,
+                  jj)
+        for jj, ec in enumerate(c.execution_contexts):
+            for kk, p in enumerate(ec.participants):
+                check(p, None, None, 'components[{0}].execution_contexts'
+                      '[{1}].participants[{2}]', ii, jj, kk)
+    for ii, g in enumerate(profile.groups):
+        for jj, m in enumerate(g.members):
+            check(m, None, None, 'groups[{0}].members[{1}]', ii, jj)
+    for ii, conn in enumerate(profile.data_port_connectors):
+        t = conn.source_data_port
+        check(t, _DATA_PORTS, t.port_name,
+              'data_port_connectors[{0}].source_data_port', ii)
+        t = conn.target_data_port
+        check(t, _DATA_PORTS, t.port_name,
+              'data_port_connectors[{0}].target_data_port', ii)
+    for ii, conn in enumerate(profile.service_port_connectors):
+        t = conn.source_service_port
+        check(t, _SERVICE_PORTS, t.port_name,
+              'service_port_connectors[{0}].source_service_port', ii)
+        t = conn.target_service_port
+        check(t, _SERVICE_PORTS, t.port_name,
+              'service_port_connectors[{0}].target_service_port', ii)
+    for action in _ACTIONS:
+        ms = getattr(profile, action)
+        if ms is None:
+            continue
+        for ii, cond in enumerate(ms.targets):
+            t = cond.target_component
+            check(t, _EXEC_CONTEXTS, t.id, '{0}.targets[{1}].target_component',
+                  action, ii)
+            if not isinstance(cond, Preceding):
+                continue
+            for jj, t in enumerate(cond.preceding_components):
+                check(t, _EXEC_CONTEXTS, t.id,
+                      '{0}.targets[{1}].preceding_components[{2}]', action, ii,
+                      jj)
+    return problems
+
+
+##############################################################################
+## Component index
+
+class _ComponentIndex(object):
+    # The names of the data ports, service ports and execution contexts of
+    # each component, keyed by the component ID and instance name. Broken
+    # references found by check are added to the list of problems.
+
+    __slots__ = ('_problems', '_parts')
+
+    def __init__(self, components, problems):
+        self._problems = problems
+        self._parts = {}
+        for ii, c in enumerate(components):
+            key = (c.id, c.instance_name)
+            if key in self._parts:
+                problems.append(BrokenReference(DUPLICATE_COMPONENT,
+                        'components[{0}]'.format(ii), _comp_string(key)))
+                continue
+            self._parts[key] = (set([p.name for p in c.data_ports]),
+                                set([p.name for p in c.service_ports]),
+                                set([ec.id for ec in c.execution_contexts]))
+
+    def check(self, target, part, name, location, *args):
+        # Check that a target refers to a component and, if part is not None,
+        # that the component has a port or execution context of that kind
+        # with the given name. The location is formatted with args only if
+        # the reference is broken.
+        key = (target.component_id, target.instance_name)
+        parts = self._parts.get(key)
+        if parts is None:
+            self._problems.append(BrokenReference(MISSING_COMPONENT,
+                    location.format(*args), _comp_string(key)))
+        elif part is not None and name not in parts[part]:
+            self._problems.append(BrokenReference(_PART_PROBLEMS[part],
+                    location.format(*args),
+                    '{0}.{1}'.format(_comp_string(key), name)))
+
+
+##############################################################################
+## Private functions
+
+def _comp_string(key):
+    return '{0}:{1}'.format(key[0], key[1])
+
+
+##############################################################################
+## Private values
+
+# The kinds of names held for each component by _ComponentIndex, and the
+# problem when a name is missing
+_DATA_PORTS = 0
+_SERVICE_PORTS = 1
+_EXEC_CONTEXTS = 2
+_PART_PROBLEMS = (MISSING_DATA_PORT, MISSING_SERVICE_PORT,
+                  MISSING_EXECUTION_CONTEXT)
+
+# The properties of RtsProfile holding message sending actions
+_ACTIONS = ('startup', 'shutdown', 'activation', 'deactivation', 'resetting',
+            'initializing', 'finalizing')
+
+
+# vim: tw=79
@@ -0,0 +1,860 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: lifecycle.py
+
+Plans for carrying out the message sending actions of an RT system.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import heapq
+
+from rtsprofile.exceptions import DependencyCycleError
+from rtsprofile.message_sending import Preceding, WaitTime
+
+
+##############################################################################
+## Sending timings
+
+# Wait for the preceding components to finish the action
+SYNC = 'SYNC'
+# Wait only for the action to be sent to the preceding components
+ASYNC = 'ASYNC'
+
+
+##############################################################################
+## Actions
+
+# The actions that bring an RT system up, in the order they are carried out
+STARTUP_ACTIONS = ('initializing', 'startup', 'activation')
+
+
+##############################################################################
+## PlanStep object
+
+class PlanStep(object):
+    '''One action in a @ref LifecyclePlan: sending the action to the execution
+    context of a component.
+
+    '''
+
+    __slots__ = ('_target', '_conditions', '_dependencies', '_wave',
+                 '_index')
+
+    def __init__(self, target, conditions=None):
+        '''Constructor.
+
+        @param target The key of the execution context acted on: a
+        (component ID, instance name, execution context ID) tuple.
+        @param conditions The conditions of the message sending object that
+        target the execution context.
+
+        '''
+        self._target = target
+        if conditions is None:
+            conditions = []
+        self._conditions = conditions
+        # (target key, sending timing) pairs
+        self._dependencies = []
+        self._wave = 0
+        self._index = 0
+
+    def __str__(self):
+        result = '{0}'.format(target_to_string(self._target))
+        if self.wait_time:
+            result += ' (wait {0} ms)'.format(self.wait_time)
+        if self._dependencies:
+            result += ' after ' + ', '.join(['{0} [{1}]'.format(
+                target_to_string(t), timing)
+                for t, timing in self._dependencies])
+        return result
+
+    @property
+    def target(self):
+        '''The key of the execution context acted on: a (component ID,
+        instance name, execution context ID) tuple.
+
+        '''
+        return self._target
+
+    @property
+    def conditions(self):
+        '''The conditions that target the execution context.
+
+        Usually there is one. The list is empty if the execution context is
+        not a target of the message sending object, but is a preceding
+        component of one of its targets.
+
+        '''
+        return self._conditions
+
+    @property
+    def sequence(self):
+        '''The lowest sequence number of the conditions, or None if there are
+        none.
+
+        '''
+        if not self._conditions:
+            return None
+        return min([c.sequence for c in self._conditions])
+
+    @property
+    def dependencies(self):
+        '''The steps this step must wait for, as a list of (target key,
+        sending timing) pairs.
+
+        With SYNC timing, the action must have been finished by the preceding
+        component; with ASYNC timing, it need only have been sent to it.
+
+        '''
+        return self._dependencies
+
+    @property
+    def wave(self):
+        '''The index of the wave of the plan that holds this step.'''
+        return self._wave
+
+    @property
+    def wait_time(self):
+        '''The time the component waits after receiving the action before
+        carrying it out, in milliseconds.
+
+        The longest wait time of the WaitTime conditions, or 0 if there are
+        none.
+
+        '''
+        return max([c.wait_time for c in self._conditions
+                    if isinstance(c, WaitTime)] + [0])
+
+    @property
+    def timeout(self):
+        '''The time to wait for the preceding components to finish before
+        giving up, in milliseconds.
+
+        The longest timeout of the Preceding conditions, or 0 if there are
+        none. Zero means there is no limit.
+
+        '''
+        return max([c.timeout for c in self._conditions
+                    if isinstance(c, Preceding)] + [0])
+
+
+##############################################################################
+## LifecyclePlan object
+
+class LifecyclePlan(object):
+    '''A plan for carrying out a message sending action, such as start up,
+    on all of its targets, as waves of steps that can run concurrently.
+
+    The actions of the steps in a wave may be sent as soon as every step of
+    the previous waves has finished. The steps of a wave are given in the
+    order their actions should be sent, so that each step comes after the
+    steps it depends on with ASYNC timing, and otherwise in sequence order.
+
+    Use @ref plan_lifecycle or @ref RtsProfile.lifecycle_plan to make a plan.
+
+    '''
+
+    __slots__ = ('_waves', '_index')
+
+    def __init__(self, waves=None):
+        '''Constructor.
+
+        @param waves A list of lists of @ref PlanStep objects.
+
+        '''
+        if waves is None:
+            waves = []
+        self._waves = waves
+        self._index = {}
+        for ii, wave in enumerate(waves):
+            for s in wave:
+                s._wave = ii
+                self._index[s.target] = s
+
+    def __str__(self):
+        result = ''
+        for ii, wave in enumerate(self._waves):
+            result += 'Wave {0}:\n'.format(ii)
+            for s in wave:
+                result += '  {0}\n'.format(s)
+        return result[:-1] # Lop off the last new line
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def waves(self):
+        '''The waves of the plan, as lists of @ref PlanStep objects.'''
+        return self._waves
+
+    @property
+    def steps(self):
+        '''All steps of the plan, wave by wave.'''
+        return [s for wave in self._waves for s in wave]
+
+    def step(self, target):
+        '''Get the step that acts on an execution context.
+
+        @param target A (component ID, instance name, execution context ID)
+        tuple or a TargetExecutionContext.
+        @return The @ref PlanStep, or None if the plan has no step for the
+        execution context.
+
+        '''
+        return self._index.get(_key(target))
+
+    def duration(self):
+        '''The least time the plan takes if it is carried out wave by wave,
+        in milliseconds.
+
+        Each wave is taken to last as long as the longest wait time of its
+        steps; the time the components take to carry out the action is not
+        known, so it is not included.
+
+        '''
+        return sum([max([s.wait_time for s in wave] + [0])
+                    for wave in self._waves])
+
+
+##############################################################################
+## StepTiming object
+
+class StepTiming(object):
+    '''The timing of one step of a @ref CriticalPathAnalysis.
+
+    All times are in milliseconds from the start of the first action.
+
+    '''
+
+    __slots__ = ('_action', '_step', '_duration', '_earliest_start',
+                 '_latest_start')
+
+    def __init__(self, action, step, duration, earliest_start=0,
+                 latest_start=0):
+        '''Constructor.
+
+        @param action The name of the action, such as 'startup'.
+        @param step The @ref PlanStep.
+        @param duration The time the step takes.
+        @param earliest_start The earliest time the step can start.
+        @param latest_start The latest time the step can start without making
+        the whole longer.
+
+        '''
+        self._action = action
+        self._step = step
+        self._duration = duration
+        self._earliest_start = earliest_start
+        self._latest_start = latest_start
+
+    def __str__(self):
+        return '{0} {1}: start {2:g}-{3:g}, duration {4:g}'.format(
+                self._action, target_to_string(self._step.target),
+                self._earliest_start, self._latest_start, self._duration)
+
+    @property
+    def action(self):
+        '''The name of the action, such as 'startup'.'''
+        return self._action
+
+    @property
+    def step(self):
+        '''The @ref PlanStep.'''
+        return self._step
+
+    @property
+    def target(self):
+        '''The key of the execution context acted on.'''
+        return self._step.target
+
+    @property
+    def duration(self):
+        '''The time the step takes: its wait time and the time taken to carry
+        out the action.
+
+        '''
+        return self._duration
+
+    @property
+    def earliest_start(self):
+        '''The earliest time the step can start.'''
+        return self._earliest_start
+
+    @property
+    def latest_start(self):
+        '''The latest time the step can start without delaying the end of the
+        last action.
+
+        '''
+        return self._latest_start
+
+    @property
+    def slack(self):
+        '''How long the step can be delayed without delaying the end of the
+        last action.
+
+        '''
+        return self._latest_start - self._earliest_start
+
+    @property
+    def critical(self):
+        '''True if the step has no slack, so any delay to it delays the end
+        of the last action.
+
+        '''
+        return self.slack < _EPSILON
+
+
+##############################################################################
+## CriticalPathAnalysis object
+
+class CriticalPathAnalysis(object):
+    '''The timing of a sequence of message sending actions, such as
+    initializing, start up and activation, found from their plans.
+
+    Use @ref analyze_critical_path or @ref RtsProfile.critical_path to
+    analyse a profile.
+
+    '''
+
+    __slots__ = ('_timings', '_makespan', '_path', '_index')
+
+    def __init__(self, timings, makespan, path):
+        '''Constructor.
+
+        @param timings A list of @ref StepTiming objects, in the order of the
+        actions and of the steps of their plans.
+        @param makespan The time from the start of the first action to the end
+        of the last.
+        @param path The steps on the critical path, in order, as StepTiming
+        objects.
+
+        '''
+        self._timings = timings
+        self._makespan = makespan
+        self._path = path
+        self._index = dict([((t.action, t.target), t) for t in timings])
+
+    def __str__(self):
+        result = 'Makespan: {0:g} ms\nParallelism: {1:.2f}\n' \
+                 'Critical path:\n'.format(self._makespan, self.parallelism)
+        for t in self._path:
+            result += '  {0}\n'.format(t)
+        return result[:-1] # Lop off the last new line
+
+    @property
+    def timings(self):
+        '''The @ref StepTiming of every step, in the order of the actions and
+        of the steps of their plans.
+
+        '''
+        return self._timings
+
+    @property
+    def makespan(self):
+        '''The time from the start of the first action to the end of the last,
+        in milliseconds.
+
+        '''
+        return self._makespan
+
+    @property
+    def critical_path(self):
+        '''The steps that determine the makespan, in order, as @ref
+        StepTiming objects.
+
+        Each step on the path starts as soon as the one before it allows.
+        When several paths are equally long, one of them is given.
+
+        '''
+        return self._path
+
+    @property
+    def total_work(self):
+        '''The sum of the durations of all steps, in milliseconds.'''
+        return sum([t.duration for t in self._timings])
+
+    @property
+    def parallelism(self):
+        '''The total work divided by the makespan.
+
+        This is the average number of steps in progress at once. A value close
+        to 1 means the steps are carried out one after another.
+
+        '''
+        if not self._makespan:
+            return 1.0
+        return self.total_work / float(self._makespan)
+
+    def timing(self, action, target):
+        '''Get the timing of the step of an action that acts on an execution
+        context.
+
+        @param action The name of the action, such as 'startup'.
+        @param target A (component ID, instance name, execution context ID)
+        tuple or a TargetExecutionContext.
+        @return The @ref StepTiming, or None if there is no such step.
+
+        '''
+        return self._index.get((action, _key(target)))
+
+
+##############################################################################
+## Public API functions
+
+def plan_lifecycle(message_sending, strict_sequence=False):
+    '''Make a plan for carrying out a message sending action on all of its
+    targets.
+
+    The Preceding conditions of the targets give the dependencies between
+    them. A target with SYNC sending timing (or none, which is taken to mean
+    SYNC) must wait for its preceding components to finish the action, so it
+    is placed in a later wave than all of them. A target with ASYNC timing
+    need only wait for the action to be sent to its preceding components, so
+    it may be in the same wave as them, after them. All other targets are in
+    the first wave possible, so the plan has as few waves as the dependencies
+    allow. Wait times do not change the waves, but are kept in the steps.
+
+    Preceding components that are not targets of the action are given steps
+    of their own, with no conditions.
+
+    @param message_sending A MessageSending object, such as a StartUp, or
+    None for an empty plan.
+    @param strict_sequence If True, the sequence numbers of the targets are
+    also treated as dependencies: every target must wait for all targets with
+    a lower sequence number to finish. This gives the plan followed by a tool
+    that carries out the targets one sequence number at a time.
+    @return A @ref LifecyclePlan.
+    @raises DependencyCycleError if the targets depend on each other in a
+    cycle.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> plan = plan_lifecycle(s.shutdown)
+    >>> print(plan)
+    Wave 0:
+      SampleComponent3_1:Comp3Ec1 (wait 300 ms)
+    Wave 1:
+      SampleComponent2_1:Comp2Ec1 after SampleComponent3_1:Comp3Ec1 [SYNC]
+    Wave 2:
+      SampleComponent_1:Comp1Ec1 after SampleComponent3_1:Comp3Ec1 [SYNC], \
+SampleComponent2_1:Comp2Ec1 [SYNC]
+
+    Targets with no dependencies are acted on together:
+    >>> plan = plan_lifecycle(s.startup)
+    >>> [[str(step.target[1]) for step in w] for w in plan.waves]
+    [['SampleComponent_1', 'SampleComponent2_1', 'SampleComponent3_1']]
+    >>> plan.duration()
+    1000
+    >>> plan = plan_lifecycle(s.startup, strict_sequence=True)
+    >>> len(plan.waves), plan.duration()
+    (3, 2250)
+
+    Cycles are detected:
+    >>> cond = s.shutdown.targets[0]
+    >>> s.shutdown.targets[0] = Preceding(cond.sequence, cond.target_component,
+    ...         preceding_components=[s.shutdown.targets[2].target_component])
+    >>> plan_lifecycle(s.shutdown)
+    Traceback (most recent call last):
+    ...
+    DependencyCycleError: SampleComponent_1:Comp1Ec1 -> \
+SampleComponent3_1:Comp3Ec1 -> SampleComponent_1:Comp1Ec1
+    '''
+    if message_sending is None:
+        return LifecyclePlan()
+    steps = {}
+    order = []
+    for c in message_sending.targets:
+        key = _key(c.target_component)
+        if key not in steps:
+            steps[key] = PlanStep(key)
+            order.append(key)
+        steps[key].conditions.append(c)
+    for key in list(order):
+        step = steps[key]
+        for c in step.conditions:
+            if not isinstance(c, Preceding):
+                continue
+            timing = c.sending_timing.upper() or SYNC
+            if timing != ASYNC:
+                timing = SYNC
+            for p in c.preceding_components:
+                p_key = _key(p)
+                if p_key not in steps:
+                    steps[p_key] = PlanStep(p_key)
+                    order.append(p_key)
+                step.dependencies.append((p_key, timing))
+    for ii, key in enumerate(order):
+        steps[key]._index = ii
+
+    # The graph to sort: each node maps to a list of (dependency, timing)
+    nodes = list(order)
+    deps = dict([(key, list(steps[key].dependencies)) for key in order])
+    if strict_sequence:
+        _add_sequence_barriers(steps, nodes, deps)
+    # The wave of each node is the first after all the nodes it waits for to
+    # finish, and no earlier than those it waits for to be sent
+    levels = {}
+    waves = []
+    for key in _sort(steps, nodes, deps):
+        level = 0
+        for d, timing in deps[key]:
+            if timing == SYNC:
+                level = max(level, levels[d] + 1)
+            else:
+                level = max(level, levels[d])
+        levels[key] = level
+        if isinstance(key, _Barrier):
+            continue
+        while len(waves) <= level:
+            waves.append([])
+        waves[level].append(steps[key])
+    # Barriers may leave waves with no steps
+    return LifecyclePlan([w for w in waves if w])
+
+
+def target_to_string(target):
+    '''Format the key of an execution context for display, as
+    "instance name:execution context ID".
+
+    '''
+    if isinstance(target, _Barrier):
+        return str(target)
+    return '{0}:{1}'.format(target[1], target[2])
+
+
+def analyze_critical_path(profile, actions=STARTUP_ACTIONS,
+                          strict_sequence=False, action_time=None):
+    '''Find the critical path through a sequence of message sending actions
+    of a profile, and the earliest and latest start time of every step.
+
+    Each action is planned with @ref plan_lifecycle. The steps are then
+    timed as follows, in milliseconds from the start of the first action.
+
+    A step takes the wait time of its target plus the time the component
+    takes to carry out the action, given by action_time. The action is sent
+    at the end of the wait time.
+
+    A step that waits for a preceding component with SYNC timing starts when
+    that component's step has finished. If the Preceding condition has a
+    timeout, the wait is limited to it: the target is taken to stop waiting
+    once that long has passed since the action was sent to the preceding
+    component. When the action time is not known, the worst case is assumed,
+    which is that every such wait lasts the whole timeout.
+
+    A step that waits with ASYNC timing starts when the action has been sent
+    to the preceding component.
+
+    The step of an execution context in one action waits for its step in the
+    previous action, if it has one, to finish.
+
+    With strict_sequence, every step also waits for all steps of the same
+    action with a lower sequence number to finish. Comparing the makespan
+    with and without it shows how much a tool that follows the sequence
+    numbers one at a time serializes work that could run in parallel.
+
+    @param profile The RtsProfile.
+    @param actions The names of the properties of the profile holding the
+    actions, in the order they are carried out. Actions the profile does not
+    specify are skipped. Defaults to STARTUP_ACTIONS: 'initializing',
+    'startup' and 'activation'.
+    @param strict_sequence If True, the sequence numbers are also treated as
+    dependencies. See @ref plan_lifecycle.
+    @param action_time The time the components take to carry out an action,
+    in milliseconds: either a number, or a callable given the name of the
+    action and the @ref PlanStep and returning a number. If None, the time is
+    not known; it is taken as 0, except that waits with a timeout last the
+    whole timeout.
+    @return A @ref CriticalPathAnalysis.
+    @raises DependencyCycleError
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+
+    With no preceding conditions, the three start up steps run together:
+    >>> a = analyze_critical_path(s)
+    >>> a.makespan
+    1000
+    >>> for t in a.timings:
+    ...     print(t)
+    startup SampleComponent_1:Comp1Ec1: start 0-0, duration 1000
+    startup SampleComponent2_1:Comp2Ec1: start 0-500, duration 500
+    startup SampleComponent3_1:Comp3Ec1: start 0-250, duration 750
+
+    Following the sequence numbers one at a time serializes them:
+    >>> a = analyze_critical_path(s, strict_sequence=True)
+    >>> a.makespan, [str(t.target[1]) for t in a.critical_path]
+    (2250, ['SampleComponent_1', 'SampleComponent2_1', 'SampleComponent3_1'])
+    >>> print('{0:.2f}'.format(a.parallelism))
+    1.00
+
+    In the shut down, the waits for preceding components are limited by
+    their timeouts. When the action time is not known, each wait lasts the
+    whole timeout:
+    >>> a = analyze_critical_path(s, actions=('shutdown',))
+    >>> a.makespan, [t.earliest_start for t in a.timings]
+    (500, [0, 400, 500])
+    >>> a = analyze_critical_path(s, actions=('shutdown',), action_time=10)
+    >>> a.makespan, [t.earliest_start for t in a.timings]
+    (330, [0, 310, 320])
+    '''
+    # The activity graph. Each node is the StepTiming of a step, or None for
+    # a sequence barrier, and has a list of (predecessor node, weight) pairs:
+    # a node starts no earlier than each predecessor's start plus the weight.
+    nodes = []
+    preds = []
+    previous = {}
+    for action in actions:
+        plan = plan_lifecycle(getattr(profile, action), strict_sequence)
+        index = {}
+        for step in plan.steps:
+            index[step.target] = len(nodes)
+            nodes.append(StepTiming(action, step, step.wait_time +
+                                    _action_time(action_time, action, step)))
+            preds.append([])
+        for step in plan.steps:
+            ii = index[step.target]
+            for d, timing in step.dependencies:
+                jj = index[d]
+                sent = nodes[jj].step.wait_time
+                if timing == ASYNC:
+                    weight = sent
+                elif not step.timeout:
+                    weight = nodes[jj].duration
+                elif action_time is None:
+                    weight = sent + step.timeout
+                else:
+                    weight = min(nodes[jj].duration, sent + step.timeout)
+                preds[ii].append((jj, weight))
+            if step.target in previous:
+                jj = previous[step.target]
+                preds[ii].append((jj, nodes[jj].duration))
+        if strict_sequence:
+            _add_timing_barriers(plan, index, nodes, preds)
+        previous.update(index)
+    return _time_graph(nodes, preds)
+
+
+##############################################################################
+## Private functions
+
+class _Barrier(object):
+    # A node of the graph that all targets with one sequence number lead to,
+    # used when the sequence is strict
+
+    __slots__ = ('sequence',)
+
+    def __init__(self, sequence):
+        self.sequence = sequence
+
+    def __str__(self):
+        return 'end of sequence {0}'.format(self.sequence)
+
+
+def _key(target):
+    # Get the key of an execution context from a tuple or target
+    if type(target) == tuple:
+        return target
+    return (target.component_id, target.instance_name, target.id)
+
+
+def _add_sequence_barriers(steps, nodes, deps):
+    # Make every step wait for all steps with lower sequence numbers to finish,
+    # using a barrier node between each pair of consecutive sequence numbers
+    # so that the number of edges is linear in the number of steps
+    by_seq = {}
+    for key in nodes:
+        seq = steps[key].sequence
+        if seq is not None:
+            by_seq.setdefault(seq, []).append(key)
+    previous = None
+    for seq in sorted(by_seq):
+        if previous is not None:
+            for key in by_seq[seq]:
+                deps[key].append((previous, ASYNC))
+        barrier = _Barrier(seq)
+        deps[barrier] = [(key, SYNC) for key in by_seq[seq]]
+        nodes.append(barrier)
+        previous = barrier
+
+
+def _priority(steps, key):
+    # The order in which steps that are ready are sent: by sequence number,
+    # then in the order of the targets. Steps with no conditions come first,
+    # as they are only present because other steps wait for them.
+    if isinstance(key, _Barrier):
+        return (key.sequence, float('inf'))
+    step = steps[key]
+    seq = step.sequence
+    if seq is None:
+        return (float('-inf'), step._index)
+    return (seq, step._index)
+
+
+def _sort(steps, nodes, deps):
+    # Sort the nodes of the graph so that each comes after its dependencies,
+    # choosing among the nodes that are ready by priority. Each node's
+    # position in nodes breaks ties, so the nodes themselves are never
+    # compared. Raises DependencyCycleError if there is a cycle.
+    waiting = {}
+    users = {}
+    position = {}
+    for ii, key in enumerate(nodes):
+        position[key] = ii
+        waiting[key] = len(deps[key])
+        for d, timing in deps[key]:
+            users.setdefault(d, []).append(key)
+    ready = [(_priority(steps, k), position[k], k)
+             for k in nodes if not waiting[k]]
+    heapq.heapify(ready)
+    result = []
+    while ready:
+        p, ii, key = heapq.heappop(ready)
+        result.append(key)
+        for u in users.get(key, ()):
+            waiting[u] -= 1
+            if not waiting[u]:
+                heapq.heappush(ready, (_priority(steps, u), position[u], u))
+    if len(result) < len(nodes):
+        raise DependencyCycleError(_describe_cycle(
+                _find_cycle(deps, [k for k in nodes if waiting[k]])))
+    return result
+
+
+def _find_cycle(deps, remaining):
+    # Find a cycle among the nodes that could not be sorted. Each of them
+    # waits for at least one other, so following dependencies from any of them
+    # must come back to a node already visited.
+    start = remaining[0]
+    remaining = set(remaining)
+    path = []
+    seen = {}
+    key = start
+    while key not in seen:
+        seen[key] = len(path)
+        path.append(key)
+        key = [d for d, timing in deps[key] if d in remaining][0]
+    cycle = path[seen[key]:]
+    # Give the cycle in dependency order, starting and ending with one node
+    cycle.reverse()
+    return cycle + [cycle[0]]
+
+
+def _describe_cycle(cycle):
+    return ' -> '.join([target_to_string(k) for k in cycle])
+
+
+def _action_time(action_time, action, step):
+    # The time taken to carry out an action, or 0 if it is not known
+    if action_time is None:
+        return 0
+    if callable(action_time):
+        return action_time(action, step)
+    return action_time
+
+
+def _add_timing_barriers(plan, index, nodes, preds):
+    # Make each step of the activity graph wait for all steps of the same
+    # action with lower sequence numbers to finish, through a barrier node
+    # between each pair of consecutive sequence numbers
+    by_seq = {}
+    for step in plan.steps:
+        if step.sequence is not None:
+            by_seq.setdefault(step.sequence, []).append(index[step.target])
+    barrier = None
+    for seq in sorted(by_seq):
+        if barrier is not None:
+            for ii in by_seq[seq]:
+                preds[ii].append((barrier, 0))
+        barrier = len(nodes)
+        nodes.append(None)
+        preds.append([(ii, nodes[ii].duration) for ii in by_seq[seq]])
+
+
+def _time_graph(nodes, preds):
+    # Find the earliest and latest start times of the nodes of an activity
+    # graph, and its critical path
+    succs = [[] for n in nodes]
+    waiting = []
+    for ii, ps in enumerate(preds):
+        waiting.append(len(ps))
+        for jj, weight in ps:
+            succs[jj].append((ii, weight))
+    # Each plan has no cycles and each action only waits for earlier ones,
+    # so every node is reached
+    order = [ii for ii in range(len(nodes)) if not waiting[ii]]
+    for ii in order:
+        for jj, weight in succs[ii]:
+            waiting[jj] -= 1
+            if not waiting[jj]:
+                order.append(jj)
+    durations = [0 if n is None else n.duration for n in nodes]
+
+    earliest = [0] * len(nodes)
+    for ii in order:
+        for jj, weight in preds[ii]:
+            earliest[ii] = max(earliest[ii], earliest[jj] + weight)
+    makespan = max([earliest[ii] + durations[ii] for ii in order] + [0])
+    latest = [0] * len(nodes)
+    for ii in reversed(order):
+        latest[ii] = makespan - durations[ii]
+        for jj, weight in succs[ii]:
+            latest[ii] = min(latest[ii], latest[jj] - weight)
+
+    # Follow the edges that hold each node back, from the first step to
+    # finish last to a step that starts at 0
+    path = []
+    if nodes:
+        ii = min(order, key=lambda ii: (-(earliest[ii] + durations[ii]), ii))
+        while ii is not None:
+            path.append(ii)
+            ii = _binding(ii, preds, earliest)
+    path.reverse()
+
+    for ii, n in enumerate(nodes):
+        if n is not None:
+            n._earliest_start = earliest[ii]
+            n._latest_start = latest[ii]
+    return CriticalPathAnalysis([n for n in nodes if n is not None], makespan,
+                                [nodes[ii] for ii in path
+                                 if nodes[ii] is not None])
+
+
+def _binding(ii, preds, earliest):
+    # The first predecessor that determines the earliest start of a node, or
+    # None if it starts at 0
+    if earliest[ii] < _EPSILON:
+        return None
+    for jj, weight in preds[ii]:
+        if abs(earliest[jj] + weight - earliest[ii]) < _EPSILON:
+            return jj
+    return None
+
+
+##############################################################################
+## Private values
+
+# Times closer than this are taken to be equal
+_EPSILON = 1e-9
+
+
+# vim: tw=79
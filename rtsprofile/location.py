@@ -25,15 +25,18 @@ __version__ = '$Revision: $'
 
 from rtsprofile import RTS_EXT_NS, RTS_EXT_NS_S
 from rtsprofile import direction as dir
+from rtsprofile.tracking import ModelObject
 from rtsprofile.utils import validate_attribute
 
 
 ##############################################################################
 ## Location object
 
-class Location(object):
+class Location(ModelObject):
     '''Stores the location of a component in a graphical view.'''
 
+    __slots__ = ('_x', '_y', '_height', '_width', '_direction')
+
     def __init__(self, x=0, y=0, height=0, width=0, direction=dir.DOWN):
         '''Constructor.
 
@@ -79,6 +82,7 @@ class Location(object):
     def x(self, x):
         validate_attribute(x, 'Location.x',
                            expected_type=int, required=False)
+        self._changed()
         self._x = x
 
     @property
@@ -90,6 +94,7 @@ class Location(object):
     def y(self, y):
         validate_attribute(y, 'Location.y',
                            expected_type=int, required=False)
+        self._changed()
         self._y = y
 
     @property
@@ -101,6 +106,7 @@ class Location(object):
     def height(self, height):
         validate_attribute(height, 'Location.height',
                            expected_type=int, required=False)
+        self._changed()
         self._height = height
 
     @property
@@ -117,6 +123,7 @@ class Location(object):
     def width(self, width):
         validate_attribute(width, 'Location.width',
                            expected_type=int, required=False)
+        self._changed()
         self._width = width
 
     @property
@@ -133,6 +140,7 @@ class Location(object):
     def direction(self, direction):
         validate_attribute(direction, 'Location.direction',
                            expected_type=dir.const_type, required=False)
+        self._changed()
         self._direction = direction
 
     def parse_xml_node(self, node):
@@ -148,6 +156,11 @@ class Location(object):
                 'direction'))
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new location from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a location into this object.'''
         self.x = int(y['x'])
@@ -27,25 +27,30 @@ from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
                        RTS_EXT_NS_YAML, XSI_NS, XSI_NS_S
 from rtsprofile.exceptions import InvalidParticipantNodeError
 from rtsprofile.targets import TargetExecutionContext
+from rtsprofile.tracking import ModelDict, ModelList, ModelObject
 from rtsprofile.utils import get_direct_child_elements_xml, \
-                             indent_string, validate_attribute, \
+                             indent_string, parse_properties_xml, \
+                             properties_to_xml, validate_attribute, \
                              string_types
 
 
 ##############################################################################
 ## MessageSending base object
 
-class MessageSending(object):
+class MessageSending(ModelObject):
     '''Defines the orderings and conditions components in the RT system for
     various actions.
 
     '''
 
+    __slots__ = ('_targets', '_fingerprint')
+
     def __init__(self, targets=[]):
         '''@param targets Orderings and conditions.'''
         validate_attribute(targets, 'message_sending.Targets',
                            expected_type=list, required=False)
-        self._targets = targets
+        self._targets = ModelList(targets, self)
+        self._fingerprint = None
 
     def __str__(self):
         result = self.__class__.__name__ + '\n'
@@ -64,41 +69,45 @@ class MessageSending(object):
     def targets(self, targets):
         validate_attribute(targets, 'message_sending.targets',
                            expected_type=list, required=False)
-        self._targets = targets
+        self._changed()
+        self._targets = ModelList(targets, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a message sending object
         into this object.
 
         '''
-        self._targets = []
-        for c in node.getElementsByTagNameNS(RTS_NS, 'targets'):
-            if c.getElementsByTagNameNS(RTS_NS, 'WaitTime'):
-                new_target = WaitTime()
-            elif c.getElementsByTagNameNS(RTS_NS, 'Preceding'):
-                new_target = Preceding()
-            else:
-                new_target = Condition()
+        self._changed()
+        self._targets = ModelList(parent=self)
+        for c in get_direct_child_elements_xml(node, prefix=RTS_NS,
+                                               local_name='targets'):
+            new_target = Condition()
+            for cond in get_direct_child_elements_xml(c, prefix=RTS_NS):
+                if cond.localName == 'WaitTime':
+                    new_target = WaitTime()
+                    break
+                elif cond.localName == 'Preceding':
+                    new_target = Preceding()
+                    break
             new_target.parse_xml_node(c)
             self._targets.append(new_target)
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new message sending object from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML speficication of a message sending object into this
         object.
 
         '''
-        self._targets = []
+        self._changed()
+        self._targets = ModelList(parent=self)
         if 'targets' in y:
             for t in y['targets']:
-                if 'waitTime' in t['condition']:
-                    new_target = WaitTime()
-                elif 'preceding' in t['condition']:
-                    new_target = Preceding()
-                else:
-                    new_target = Condition()
-                new_target.parse_yaml(t)
-                self._targets.append(new_target)
+                self._targets.append(parse_condition_yaml(t))
         return self
 
     def save_xml(self, doc, element):
@@ -128,7 +137,8 @@ class StartUp(MessageSending):
     system is started.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
@@ -139,7 +149,8 @@ class ShutDown(MessageSending):
     is stopped.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
@@ -150,7 +161,8 @@ class Activation(MessageSending):
     system is activated.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
@@ -161,7 +173,8 @@ class Deactivation(MessageSending):
     system is deactivated.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
@@ -172,7 +185,8 @@ class Resetting(MessageSending):
     system is reset.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
@@ -183,7 +197,8 @@ class Initialize(MessageSending):
     RT system is initialised.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
@@ -194,13 +209,14 @@ class Finalize(MessageSending):
     RT system is finalised.
 
     '''
-    pass
+
+    __slots__ = ()
 
 
 ##############################################################################
 ## Condition base object
 
-class Condition(object):
+class Condition(ModelObject):
     '''Specifies execution orderings and conditions for RT components in the RT
     system.
 
@@ -210,22 +226,27 @@ class Condition(object):
 
     '''
 
-    def __init__(self, sequence=0, target_component=TargetExecutionContext()):
+    __slots__ = ('_sequence', '_target_component', '_properties')
+
+    def __init__(self, sequence=0, target_component=None):
         '''Constructor.
 
         @param sequence Execution order of the target component.
         @type sequence int
-        @param target_component The target of the condition.
+        @param target_component The target of the condition. A new
+        TargetExecutionContext is made if it is None.
         @type target_component TargetComponent
         '''
         validate_attribute(sequence, 'conditions.sequence',
                            expected_type=int, required=False)
         self._sequence = sequence
+        if target_component is None:
+            target_component = TargetExecutionContext()
         validate_attribute(target_component, 'conditions.TargetComponent',
                            expected_type=TargetExecutionContext,
                            required=True)
-        self._target_component = target_component
-        self._properties = {}
+        self._target_component = self._adopt(target_component)
+        self._properties = ModelDict(parent=self)
 
     def __str__(self):
         result = 'Sequence: {0}\nTargetEC:\n{1}\n'.format(self.sequence,
@@ -248,6 +269,7 @@ class Condition(object):
     def sequence(self, sequence):
         validate_attribute(sequence, 'conditions.sequence',
                            expected_type=int, required=False)
+        self._changed()
         self._sequence = sequence
 
     @property
@@ -260,7 +282,8 @@ class Condition(object):
         validate_attribute(target_component, 'conditions.TargetComponent',
                            expected_type=TargetExecutionContext,
                            required=True)
-        self._target_component = target_component
+        self._changed()
+        self._target_component = self._adopt(target_component)
 
     @property
     def properties(self):
@@ -277,7 +300,8 @@ class Condition(object):
     def properties(self, properties):
         validate_attribute(properties, 'conditions.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a condition into this
@@ -285,16 +309,31 @@ class Condition(object):
 
         '''
         self.sequence = int(node.getAttributeNS(RTS_NS, 'sequence'))
-        c = node.getElementsByTagNameNS(RTS_NS, 'TargetComponent')
-        if c.length != 1:
+        targets = []
+        for c in get_direct_child_elements_xml(node):
+            if c.namespaceURI == RTS_NS and c.localName == 'TargetComponent':
+                targets.append(c)
+            elif c.namespaceURI == RTS_EXT_NS and c.localName == 'Properties':
+                name, value = parse_properties_xml(c)
+                self._properties[name] = value
+        if len(targets) != 1:
             raise InvalidParticipantNodeError
-        self.target_component = TargetExecutionContext().parse_xml_node(c[0])
-        for c in get_direct_child_elements_xml(node, prefix=RTS_EXT_NS,
-                                               local_name='Properties'):
-            name, value = parse_properties_xml(c)
-            self._properties[name] = value
+        self.target_component = \
+                TargetExecutionContext().parse_xml_node(targets[0])
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new condition from a dictionary.
+
+        When called on Condition itself, the type of the new object is
+        chosen to match the dictionary. See @ref parse_condition_yaml.
+
+        '''
+        if cls is Condition:
+            return parse_condition_yaml(d)
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a condition into this object.'''
         self.sequence = int(y['sequence'])
@@ -347,7 +386,9 @@ class Preceding(Condition):
 
     '''
 
-    def __init__(self, sequence=0, target_component=TargetExecutionContext(),
+    __slots__ = ('_timeout', '_sending_timing', '_preceding_components')
+
+    def __init__(self, sequence=0, target_component=None,
                  timeout=0, sending_timing='', preceding_components=[]):
         '''Constructor.
 
@@ -373,7 +414,7 @@ class Preceding(Condition):
         validate_attribute(preceding_components,
                            'preceding.PrecedingComponents',
                            expected_type=list, required=False)
-        self._preceding_components = preceding_components
+        self._preceding_components = ModelList(preceding_components, self)
 
     def __str__(self):
         result = 'Timeout: {0}\nSending timing: {1}\n{2}'.format(self.timeout,
@@ -398,6 +439,7 @@ class Preceding(Condition):
     def timeout(self, timeout):
         validate_attribute(timeout, 'preceding.timeout',
                            expected_type=int, required=False)
+        self._changed()
         self._timeout = timeout
 
     @property
@@ -416,6 +458,7 @@ class Preceding(Condition):
     def sending_timing(self, sending_timing):
         validate_attribute(sending_timing, 'preceding.sendingTiming',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._sending_timing = sending_timing
 
     @property
@@ -425,9 +468,11 @@ class Preceding(Condition):
 
     @preceding_components.setter
     def preceding_components(self, preceding_components):
-        validate_attribute(sending_timing, 'preceding.PrecedingComponents',
+        validate_attribute(preceding_components,
+                           'preceding.PrecedingComponents',
                            expected_type=list, required=False)
-        self._preceding_components = preceding_components
+        self._changed()
+        self._preceding_components = ModelList(preceding_components, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a preceding condition into
@@ -435,8 +480,9 @@ class Preceding(Condition):
 
         '''
         super(Preceding, self).parse_xml_node(node)
-        p_nodes = node.getElementsByTagNameNS(RTS_NS, 'Preceding')
-        if p_nodes.length != 1:
+        p_nodes = list(get_direct_child_elements_xml(node, prefix=RTS_NS,
+                                                     local_name='Preceding'))
+        if len(p_nodes) != 1:
             raise InvalidParticipantNodeError
         p_node = p_nodes[0]
         if p_node.hasAttributeNS(RTS_NS, 'timeout'):
@@ -447,8 +493,9 @@ class Preceding(Condition):
             self.sending_timing = p_node.getAttributeNS(RTS_NS, 'sendingTiming')
         else:
             self.sending_timing = 'ASYNC'
-        self._preceding_components = []
-        for c in p_node.getElementsByTagNameNS(RTS_NS, 'PrecedingComponents'):
+        self._preceding_components = ModelList(parent=self)
+        for c in get_direct_child_elements_xml(p_node, prefix=RTS_NS,
+                local_name='PrecedingComponents'):
             self._preceding_components.append(TargetExecutionContext().parse_xml_node(c))
         return self
 
@@ -467,7 +514,7 @@ class Preceding(Condition):
             self.sending_timing = c['sendingTiming']
         else:
             self.sending_timing = 'ASYNC'
-        self._preceding_components = []
+        self._preceding_components = ModelList(parent=self)
         if 'precedingComponents' in c:
             for p in c.get('precedingComponents'):
                 self._preceding_components.append(TargetExecutionContext().parse_yaml(p))
@@ -517,8 +564,10 @@ class WaitTime(Condition):
 
     '''
 
+    __slots__ = ('_wait_time',)
+
     def __init__(self, wait_time=0, sequence=0,
-                 target_component=TargetExecutionContext()):
+                 target_component=None):
         '''Constructor.
 
         @param sequence Execution order of the target component.
@@ -551,6 +600,7 @@ class WaitTime(Condition):
     def wait_time(self, wait_time):
         validate_attribute(wait_time, 'wait_time.waitTime',
                            expected_type=int, required=False)
+        self._changed()
         self._wait_time = wait_time
 
     def parse_xml_node(self, node):
@@ -559,8 +609,9 @@ class WaitTime(Condition):
 
         '''
         super(WaitTime, self).parse_xml_node(node)
-        wait_time_nodes = node.getElementsByTagNameNS(RTS_NS, 'WaitTime')
-        if wait_time_nodes.length != 1:
+        wait_time_nodes = list(get_direct_child_elements_xml(node,
+                prefix=RTS_NS, local_name='WaitTime'))
+        if len(wait_time_nodes) != 1:
             raise InvalidParticipantNodeError
         self.wait_time = int(wait_time_nodes[0].getAttributeNS(RTS_NS,
                 'waitTime'))
@@ -590,5 +641,32 @@ class WaitTime(Condition):
         return d
 
 
+##############################################################################
+## Utility functions
+
+def parse_condition_yaml(y):
+    '''Parse a YAML specification of a condition into a new object of the
+    matching condition type.
+
+    @return A WaitTime, Preceding or Condition object.
+
+    Example:
+    >>> c = parse_condition_yaml({'sequence': 1, 'condition':
+    ...         {'waitTime': {'waitTime': 100}}, 'targetComponent':
+    ...         {'componentId': 'RTC:a:b:c:1.0', 'instanceName': 'c0',
+    ...          'id': 'ec0'}})
+    >>> type(c).__name__, c.wait_time
+    ('WaitTime', 100)
+    '''
+    condition = y.get('condition', {})
+    if 'waitTime' in condition:
+        new_target = WaitTime()
+    elif 'preceding' in condition:
+        new_target = Preceding()
+    else:
+        new_target = Condition()
+    return new_target.parse_yaml(y)
+
+
 # vim: tw=79
 
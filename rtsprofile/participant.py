@@ -26,17 +26,22 @@ __version__ = '$Revision: $'
 from rtsprofile import RTS_NS, RTS_NS_S
 from rtsprofile.exceptions import InvalidParticipantNodeError
 from rtsprofile.targets import TargetComponent
+from rtsprofile.tracking import ModelObject
+from rtsprofile.utils import get_direct_child_elements_xml, \
+                             validate_attribute
 
 
 ##############################################################################
 ## Participant object
 
-class Participant(object):
+class Participant(ModelObject):
     '''This object contains a reference to a component object that is part of a
     composite component.
 
     '''
 
+    __slots__ = ('_target_component',)
+
     def __init__(self, target_component=None):
         '''Constructor.
 
@@ -46,7 +51,7 @@ class Participant(object):
         '''
         validate_attribute(target_component, 'participant.target_component',
                            expected_type=TargetComponent, required=False)
-        self._target_component = target_component
+        self._target_component = self._adopt(target_component)
 
     def __str__(self):
         return str(self.target_component)
@@ -60,24 +65,31 @@ class Participant(object):
     def target_component(self, target_component):
         validate_attribute(target_component, 'participant.target_component',
                            expected_type=TargetComponent, required=True)
-        self._target_component = target_component
+        self._changed()
+        self._target_component = self._adopt(target_component)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a participant into this
         object.
 
         '''
-        if node.getElementsByTagNameNS(RTS_NS, 'Participant').length != 1:
+        c = list(get_direct_child_elements_xml(node, prefix=RTS_NS,
+                                               local_name='Participant'))
+        if len(c) != 1:
             raise InvalidParticipantNodeError
-        self.target_component = TargetComponent().parse_xml_node(\
-                node.getElementsByTagNameNS(RTS_NS, 'Participant')[0])
+        self.target_component = TargetComponent().parse_xml_node(c[0])
         return self
 
-    def parse_yaml_node(self, y):
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new participant from a dictionary.'''
+        return cls().parse_yaml(d)
+
+    def parse_yaml(self, y):
         '''Parse a YAML specification of a participant into this object.'''
         if 'participant' not in y:
             raise InvalidParticipantNodeError
-        self.target_component = TargetComponent().parse_yaml_node(y['participant'])
+        self.target_component = TargetComponent().parse_yaml(y['participant'])
         return self
 
     def save_xml(self, doc, element):
@@ -0,0 +1,470 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: patch.py
+
+Patches describing incremental changes to an RtsProfile.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+from bisect import bisect, insort
+
+from rtsprofile import RTS_EXT_NS_YAML
+from rtsprofile.backends import yaml_dump, yaml_load
+from rtsprofile.component import Component
+from rtsprofile.component_group import ComponentGroup
+from rtsprofile.config_set import ConfigurationSet, ConfigurationData
+from rtsprofile.diff import ADDED, REMOVED, CHANGED, KEYS, iter_diff, \
+                            path_to_string
+from rtsprofile.exceptions import InvalidPatchError
+from rtsprofile.exec_context import ExecutionContext
+from rtsprofile.location import Location
+from rtsprofile.message_sending import StartUp, ShutDown, Activation, \
+                                      Deactivation, Resetting, Initialize, \
+                                      Finalize, parse_condition_yaml
+from rtsprofile.participant import Participant
+from rtsprofile.port_connectors import DataPortConnector, ServicePortConnector
+from rtsprofile.ports import DataPort, ServicePort
+from rtsprofile.targets import TargetComponent
+
+
+##############################################################################
+## Operations
+
+ADD = 'add'
+REMOVE = 'remove'
+MODIFY = 'modify'
+
+_CHANGE_OPS = {ADDED: ADD, REMOVED: REMOVE, CHANGED: MODIFY}
+
+
+##############################################################################
+## Patch object
+
+class Patch(object):
+    '''A list of operations that change one profile into another.
+
+    Each operation is an (op, path, value) tuple. The op is ADD, REMOVE or
+    MODIFY, and the path locates the item or field to change in the same way
+    as the path of a @ref Change. The value is the new item or field in
+    dictionary form, and is None for REMOVE.
+
+    Patches are saved as a YAML list of [op, path, value] lists, leaving out
+    the value of REMOVE operations.
+
+    Example:
+    >>> p = Patch([(MODIFY, ('dataPortConnectors', 'conn0', 'name'), 'c')])
+    >>> print(p)
+    modify dataPortConnectors[conn0].name
+    >>> Patch(yaml_spec=p.save_to_yaml()).operations == p.operations
+    True
+    '''
+
+    __slots__ = ('_operations',)
+
+    def __init__(self, operations=None, yaml_spec=None):
+        '''Constructor.
+
+        @param operations A list of (op, path, value) tuples.
+        @param yaml_spec A YAML specification of a patch to load.
+
+        '''
+        if operations is None:
+            operations = []
+        self._operations = operations
+        if yaml_spec:
+            self.parse_from_yaml(yaml_spec)
+
+    def __str__(self):
+        return '\n'.join(['{0} {1}'.format(op, path_to_string(path))
+                          for op, path, value in self._operations])
+
+    def __len__(self):
+        return len(self._operations)
+
+    @property
+    def operations(self):
+        '''The list of (op, path, value) operations.'''
+        return self._operations
+
+    def parse_from_yaml(self, yaml_spec, backend=None):
+        '''Parse a YAML specification of a patch into this object.
+
+        @param backend The YAML backend to use. See @ref get_yaml_backend.
+
+        '''
+        self._operations = []
+        for o in yaml_load(yaml_spec, backend=backend) or []:
+            if len(o) == 2:
+                o = (o[0], o[1], None)
+            op, path, value = o
+            # Keys made of several values are saved as lists
+            path = tuple([type(p) == list and tuple(p) or p for p in path])
+            self._operations.append((op, path, value))
+
+    def save_to_yaml(self, backend=None):
+        '''Save this patch as a YAML specification.
+
+        @param backend The YAML backend to use. See @ref get_yaml_backend.
+
+        '''
+        ops = []
+        for op, path, value in self._operations:
+            path = [type(p) == tuple and list(p) or p for p in path]
+            if op == REMOVE:
+                ops.append([op, path])
+            else:
+                ops.append([op, path, value])
+        return yaml_dump(ops, backend=backend)
+
+
+##############################################################################
+## Public API functions
+
+def make_patch(old, new):
+    '''Make a patch that changes one profile into another.
+
+    The patch is built from the changes found by @ref diff, so only the items
+    and fields that differ are included.
+
+    @param old The profile to be changed.
+    @param new The profile to change it into.
+    @return A Patch object.
+
+    '''
+    return Patch([(_CHANGE_OPS[c.kind], c.path, c.new)
+                  for c in iter_diff(old, new)])
+
+
+def apply_patch(prof, patch):
+    '''Apply a patch to a profile in place.
+
+    Each operation changes the object model directly. Items are found by key,
+    and an item is only rebuilt from its dictionary form when one of its own
+    fields changes; the rest of the profile is not touched. The operations
+    are applied in order, so if one fails the operations before it remain
+    applied.
+
+    As with @ref diff, the order of items in lists is not part of a patch.
+    New items are added to the end of their list.
+
+    A patch can be tried out on a clone of the profile without changing the
+    original. See @ref RtsProfile.clone.
+
+    @param prof The RtsProfile to change.
+    @param patch The Patch to apply.
+    @raises InvalidPatchError
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> old = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> new = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> new.components[0].configuration_sets[0].configuration_data[0].data = '2'
+    >>> del new.data_port_connectors[0]
+    >>> new.startup.targets[0].sequence = 5
+    >>> new.components[1].properties['new_prop'] = 'value'
+    >>> p = make_patch(old, new)
+    >>> print(p)
+    modify components[RTC:SampleVendor:SampleCategory:SampleComponent:1.0.0, SampleComponent_1].configurationSets[configSet_1].configurationData[name_1].data
+    add components[RTC:SampleVendor:SampleCategory:SampleComponent2:1.0.0, SampleComponent2_1].rtsExt::properties[new_prop]
+    remove dataPortConnectors[9c477198-dbf4-4298-9713-c5e1b1b30607]
+    modify startUp.targets[RTC:SampleVendor.SampleCategory.SampleComponent:1.0.0, SampleComponent_1, Comp1Ec1].sequence
+    >>> apply_patch(old, p)
+    >>> old.save_to_yaml() == new.save_to_yaml()
+    True
+
+    The connector has already been removed:
+    >>> apply_patch(old, p)
+    Traceback (most recent call last):
+    ...
+    InvalidPatchError: No item with key 9c477198-dbf4-4298-9713-c5e1b1b30607 in dataPortConnectors
+
+    Applying the patch to a clone leaves the original unchanged:
+    >>> old = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> what_if = old.clone()
+    >>> apply_patch(what_if, p)
+    >>> what_if.save_to_yaml() == new.save_to_yaml()
+    True
+    >>> old.save_to_yaml() == RtsProfile(xml_spec=open(
+    ...         'test/rtsystem.xml').read()).save_to_yaml()
+    True
+    '''
+    # The key index of each keyed list changed, by the ID of the list
+    indexes = {}
+    for op, path, value in patch.operations:
+        if op not in (ADD, REMOVE, MODIFY):
+            raise InvalidPatchError('Unknown operation {0}'.format(op))
+        if not path:
+            raise InvalidPatchError('Empty path')
+        _apply(prof, op, path, value, indexes)
+
+
+##############################################################################
+## Object model structure
+
+# The attribute holding each keyed list
+_LIST_ATTRS = {'components': 'components',
+               'groups': 'groups',
+               'dataPortConnectors': 'data_port_connectors',
+               'servicePortConnectors': 'service_port_connectors',
+               'dataPorts': 'data_ports',
+               'servicePorts': 'service_ports',
+               'configurationSets': 'configuration_sets',
+               'configurationData': 'configuration_data',
+               'executionContexts': 'execution_contexts',
+               'participants': 'participants',
+               'members': 'members',
+               'targets': 'targets',
+               RTS_EXT_NS_YAML + 'properties': 'properties'}
+
+# Builders of the items in each keyed list from their dictionary form
+_ITEM_TYPES = {'components': Component,
+               'groups': ComponentGroup,
+               'dataPortConnectors': DataPortConnector,
+               'servicePortConnectors': ServicePortConnector,
+               'dataPorts': DataPort,
+               'servicePorts': ServicePort,
+               'configurationSets': ConfigurationSet,
+               'configurationData': ConfigurationData,
+               'executionContexts': ExecutionContext,
+               'members': TargetComponent}
+
+# Objects held directly by a field of their parent: the attribute and the
+# type of object, for each field name.
+_SINGULAR = {'startUp': ('startup', StartUp),
+             'shutDown': ('shutdown', ShutDown),
+             'activation': ('activation', Activation),
+             'deactivation': ('deactivation', Deactivation),
+             'resetting': ('resetting', Resetting),
+             'initializing': ('initializing', Initialize),
+             'finalizing': ('finalizing', Finalize),
+             RTS_EXT_NS_YAML + 'location': ('location', Location)}
+
+
+def _make_item(parent, name, value):
+    # Build a new item of a keyed list from its dictionary form
+    if name == 'targets':
+        return parse_condition_yaml(value)
+    if name == 'participants':
+        # Components hold participants, execution contexts hold targets
+        if isinstance(parent, Component):
+            return Participant().parse_yaml(value)
+        return TargetComponent().parse_yaml(value)
+    return _ITEM_TYPES[name]().parse_yaml(value)
+
+
+def _item_key(name, item):
+    # Get the key of an item of a keyed list, matching the key diff gets from
+    # the item's dictionary form
+    if name == 'components':
+        return (item.id, item.instance_name)
+    elif name == 'groups':
+        return item.group_id
+    elif name in ('dataPortConnectors', 'servicePortConnectors'):
+        return item.connector_id
+    elif name in ('dataPorts', 'servicePorts', 'configurationData'):
+        return item.name
+    elif name in ('configurationSets', 'executionContexts'):
+        return item.id
+    elif name == 'targets':
+        t = item.target_component
+        return (t.component_id, t.instance_name, t.id)
+    # Participants and members
+    t = getattr(item, 'target_component', item)
+    return (t.component_id, t.instance_name)
+
+
+##############################################################################
+## Private functions
+
+def _apply(prof, op, path, value, indexes):
+    # Apply one operation, following the path down through the object model
+    obj = prof
+    # How to replace obj with a rebuilt object: (key index, key, parent,
+    # name) for an item of a keyed list, or (parent, field name) for a
+    # singular object
+    place = None
+    ii = 0
+    while ii < len(path):
+        name = path[ii]
+        if name in KEYS and name in _LIST_ATTRS and \
+                hasattr(obj, _LIST_ATTRS[name]):
+            if ii + 1 == len(path):
+                raise InvalidPatchError('Missing key after {0}'.format(
+                    path_to_string(path)))
+            items = getattr(obj, _LIST_ATTRS[name])
+            key = path[ii + 1]
+            rest = path[ii + 2:]
+            if isinstance(items, dict):
+                _apply_property(items, op, key, rest, value)
+                return
+            keys = indexes.get(id(items))
+            if keys is None:
+                keys = indexes[id(items)] = _KeyIndex(items, name)
+            if not rest:
+                _apply_item(obj, keys, name, op, key, value)
+                return
+            place = (keys, key, obj, name)
+            obj = items[keys.find(key)]
+            ii += 2
+        elif name in _SINGULAR and hasattr(obj, _SINGULAR[name][0]):
+            attr, cls = _SINGULAR[name]
+            if ii + 1 == len(path):
+                if op == REMOVE:
+                    # The setters do not accept None
+                    obj._changed()
+                    setattr(obj, '_' + attr, None)
+                else:
+                    setattr(obj, attr, cls().parse_yaml(value))
+                return
+            place = (obj, name)
+            obj = getattr(obj, attr)
+            if obj is None:
+                raise InvalidPatchError('No {0} to change'.format(name))
+            ii += 1
+        else:
+            # A field of obj itself; rebuild obj with the field changed
+            _rebuild(prof, obj, place, op, path[ii:], value)
+            return
+
+
+def _apply_item(parent, keys, name, op, key, value):
+    # Add, remove or replace a whole item of a keyed list
+    if op == ADD:
+        keys.append(_make_item(parent, name, value))
+    elif op == REMOVE:
+        keys.remove(key)
+    else:
+        keys.replace(key, _make_item(parent, name, value))
+
+
+def _apply_property(props, op, key, rest, value):
+    # Apply an operation to a dictionary of properties. Properties are saved
+    # as {'name': ..., 'value': ...} items, with no value if it is empty.
+    if op == REMOVE and not rest:
+        if key not in props:
+            raise InvalidPatchError('No property {0}'.format(key))
+        del props[key]
+    elif not rest:
+        props[key] = value.get('value')
+    elif rest == ('value',):
+        if key not in props:
+            raise InvalidPatchError('No property {0}'.format(key))
+        props[key] = op != REMOVE and value or None
+    else:
+        raise InvalidPatchError('Cannot change field {0} of property '
+                                '{1}'.format(rest[0], key))
+
+
+def _rebuild(prof, obj, place, op, rest, value):
+    # Change a field of an object by rebuilding the object from its
+    # dictionary form with the field changed
+    if place is None:
+        # The profile itself; only its attributes are rebuilt
+        d = prof._attributes_to_dict()
+        _change_dict(d, op, rest, value)
+        prof._parse_yaml_attributes(d)
+        return
+    d = obj.to_dict()
+    _change_dict(d, op, rest, value)
+    if len(place) == 4:
+        keys, key, parent, name = place
+        keys.replace(key, _make_item(parent, name, d))
+    else:
+        parent, name = place
+        attr, cls = _SINGULAR[name]
+        setattr(parent, attr, cls().parse_yaml(d))
+
+
+def _change_dict(d, op, rest, value):
+    # Apply an operation to a field in a dictionary tree
+    for name in rest[:-1]:
+        if type(d.get(name)) != dict:
+            if op != ADD:
+                raise InvalidPatchError('No field {0}'.format(name))
+            d[name] = {}
+        d = d[name]
+    name = rest[-1]
+    if op == REMOVE:
+        if name not in d:
+            raise InvalidPatchError('No field {0}'.format(name))
+        del d[name]
+    else:
+        d[name] = value
+
+
+##############################################################################
+## Key index
+
+class _KeyIndex(object):
+    # The positions of the items of a keyed list by their keys, built once
+    # per list by apply_patch and kept up to date as items are added, removed
+    # and replaced through it. The positions are those the items had when
+    # they were added to the index; the current position of an item is its
+    # position less the number of items removed before it. Items with the
+    # same key are found in the order they are in the list.
+
+    __slots__ = ('_items', '_name', '_positions', '_removed', '_next')
+
+    def __init__(self, items, name):
+        self._items = items
+        self._name = name
+        self._positions = {}
+        # The items are only read, so borrowed items are not copied
+        for ii, item in enumerate(items._read()):
+            self._positions.setdefault(_item_key(name, item), []).append(ii)
+        self._removed = []
+        self._next = len(items)
+
+    def find(self, key):
+        # Get the current index of the first item with the given key
+        positions = self._positions.get(key)
+        if not positions:
+            if type(key) == tuple:
+                key = ', '.join([str(k) for k in key])
+            raise InvalidPatchError('No item with key {0} in {1}'.format(
+                key, self._name))
+        return positions[0] - bisect(self._removed, positions[0])
+
+    def append(self, item):
+        self._items.append(item)
+        self._add(_item_key(self._name, item), self._next)
+        self._next += 1
+
+    def remove(self, key):
+        index = self.find(key)
+        del self._items[index]
+        insort(self._removed, self._positions[key].pop(0))
+        if not self._positions[key]:
+            del self._positions[key]
+
+    def replace(self, key, item):
+        index = self.find(key)
+        self._items[index] = item
+        new_key = _item_key(self._name, item)
+        if new_key != key:
+            self._add(new_key, self._positions[key].pop(0))
+            if not self._positions[key]:
+                del self._positions[key]
+
+    def _add(self, key, position):
+        insort(self._positions.setdefault(key, []), position)
+
+
+# vim: tw=79
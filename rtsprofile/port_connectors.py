@@ -28,22 +28,28 @@ from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
 from rtsprofile.exceptions import InvalidDataPortConnectorNodeError, \
                                   InvalidServicePortConnectorNodeError
 from rtsprofile.targets import TargetPort
+from rtsprofile.tracking import ModelDict, ModelObject
 from rtsprofile.utils import get_direct_child_elements_xml, \
-                             indent_string, parse_properties_xml, \
-                             properties_to_xml, validate_attribute, \
-                             string_types
+                             indent_string, intern_string, \
+                             parse_properties_xml, properties_to_xml, \
+                             validate_attribute, string_types
 
 
 ##############################################################################
 ## DataPortConnector object
 
-class DataPortConnector(object):
+class DataPortConnector(ModelObject):
     '''Represents a connection between data ports.'''
 
+    __slots__ = ('_connector_id', '_name', '_data_type', '_interface_type',
+                 '_data_flow_type', '_subscription_type', '_push_interval',
+                 '_source_data_port', '_target_data_port', '_comment',
+                 '_visible', '_properties', '_fingerprint')
+
     def __init__(self, connector_id='', name='', data_type='',
             interface_type='', data_flow_type='', subscription_type='',
-            push_interval=0.0, source_data_port=TargetPort(),
-            target_data_port=TargetPort(), comment='', visible=True):
+            push_interval=0.0, source_data_port=None,
+            target_data_port=None, comment='', visible=True):
         '''Constructor.
 
         @param connector_id ID of the connector.
@@ -60,9 +66,11 @@ class DataPortConnector(object):
         @type subscription_type str
         @param push_interval Rate at which data is sent between the ports.
         @type push_interval float
-        @param source_data_port The source port in the connection.
+        @param source_data_port The source port in the connection. A new
+        TargetPort is made if it is None.
         @type source_data_port TargetPort
-        @param target_data_port The target port in the connection.
+        @param target_data_port The target port in the connection. A new
+        TargetPort is made if it is None.
         @type target_data_port TargetPort
         @param comment A comment about the port connector.
         @type comment str
@@ -92,21 +100,26 @@ class DataPortConnector(object):
         validate_attribute(push_interval, 'dataport_connector.pushInterval',
                            expected_type=[int, float], required=False)
         self._push_interval = push_interval
+        if source_data_port is None:
+            source_data_port = TargetPort()
         validate_attribute(source_data_port,
                            'dataport_connector.sourceDataPort',
                            expected_type=TargetPort, required=False)
-        self._source_data_port = source_data_port
+        self._source_data_port = self._adopt(source_data_port)
+        if target_data_port is None:
+            target_data_port = TargetPort()
         validate_attribute(target_data_port,
                            'dataport_connector.targetDataPort',
                            expected_type=TargetPort, required=False)
-        self._target_data_port = target_data_port
+        self._target_data_port = self._adopt(target_data_port)
         validate_attribute(comment, 'component.ext.comment',
                            expected_type=string_types(), required=False)
         self._comment = comment
         validate_attribute(visible, 'component.ext.visible',
                            expected_type=bool, required=False)
         self._visible = visible
-        self._properties = {}
+        self._properties = ModelDict(parent=self)
+        self._fingerprint = None
 
     def __str__(self):
         result = 'Name: {1}\n  Connector ID: {0}\n  Data type: {2}\n  \
@@ -145,6 +158,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def connector_id(self, connector_id):
         validate_attribute(connector_id, 'dataport_connector.connectorID',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._connector_id = connector_id
 
     @property
@@ -167,6 +181,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def name(self, name):
         validate_attribute(name, 'dataport_connector.name',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._name = name
 
     @property
@@ -189,6 +204,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def data_type(self, data_type):
         validate_attribute(data_type, 'dataport_connector.dataType',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._data_type = data_type
 
     @property
@@ -214,6 +230,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def interface_type(self, interface_type):
         validate_attribute(interface_type, 'dataport_connector.interfaceType',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._interface_type = interface_type
 
     @property
@@ -239,6 +256,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def data_flow_type(self, data_flow_type):
         validate_attribute(data_flow_type, 'dataport_connector.dataflowType',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._data_flow_type = data_flow_type
 
     @property
@@ -266,6 +284,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
         validate_attribute(subscription_type,
                            'dataport_connector.subscriptionType',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._subscription_type = subscription_type
 
     @property
@@ -290,6 +309,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def push_interval(self, push_interval):
         validate_attribute(push_interval, 'dataport_connector.pushInterval',
                            expected_type=[int, float], required=False)
+        self._changed()
         self._push_interval = push_interval
 
     @property
@@ -314,7 +334,8 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
         validate_attribute(source_data_port,
                            'dataport_connector.sourceDataPort',
                            expected_type=TargetPort, required=True)
-        self._source_data_port = source_data_port
+        self._changed()
+        self._source_data_port = self._adopt(source_data_port)
 
     @property
     def target_data_port(self):
@@ -338,7 +359,8 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
         validate_attribute(target_data_port,
                            'dataport_connector.targetDataPort',
                            expected_type=TargetPort, required=True)
-        self._target_data_port = target_data_port
+        self._changed()
+        self._target_data_port = self._adopt(target_data_port)
 
     @property
     def comment(self):
@@ -365,6 +387,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def comment(self, comment):
         validate_attribute(comment, 'dataport_connector.ext.comment',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._comment = comment
 
     @property
@@ -392,6 +415,7 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def visible(self, visible):
         validate_attribute(visible, 'dataport_connector.ext.visible',
                            expected_type=bool, required=False)
+        self._changed()
         self._visible = visible
 
     @property
@@ -418,7 +442,8 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
     def properties(self, properties):
         validate_attribute(properties, 'dataport_connector.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a data connector into this
@@ -427,12 +452,14 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
         '''
         self.connector_id = node.getAttributeNS(RTS_NS, 'connectorId')
         self.name = node.getAttributeNS(RTS_NS, 'name')
-        self.data_type = node.getAttributeNS(RTS_NS, 'dataType')
-        self.interface_type = node.getAttributeNS(RTS_NS, 'interfaceType')
-        self.data_flow_type = node.getAttributeNS(RTS_NS, 'dataflowType')
+        self.data_type = intern_string(node.getAttributeNS(RTS_NS, 'dataType'))
+        self.interface_type = intern_string(node.getAttributeNS(RTS_NS,
+                'interfaceType'))
+        self.data_flow_type = intern_string(node.getAttributeNS(RTS_NS,
+                'dataflowType'))
         if node.hasAttributeNS(RTS_NS, 'subscriptionType'):
-            self.subscription_type = node.getAttributeNS(RTS_NS,
-                                                         'subscriptionType')
+            self.subscription_type = intern_string(node.getAttributeNS(RTS_NS,
+                    'subscriptionType'))
         else:
             self.subscription_type = ''
         if node.hasAttributeNS(RTS_NS, 'pushInterval'):
@@ -448,20 +475,30 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
             else:
                 self.visible = False
 
-        if node.getElementsByTagNameNS(RTS_NS, 'sourceDataPort').length != 1:
+        sources = []
+        targets = []
+        for c in get_direct_child_elements_xml(node):
+            if c.namespaceURI == RTS_NS:
+                if c.localName == 'sourceDataPort':
+                    sources.append(c)
+                elif c.localName == 'targetDataPort':
+                    targets.append(c)
+            elif c.namespaceURI == RTS_EXT_NS and c.localName == 'Properties':
+                name, value = parse_properties_xml(c)
+                self._properties[name] = value
+        if len(sources) != 1:
             raise InvalidDataPortConnectorNodeError
-        self.source_data_port = TargetPort().parse_xml_node(\
-                node.getElementsByTagNameNS(RTS_NS, 'sourceDataPort')[0])
-        if node.getElementsByTagNameNS(RTS_NS, 'targetDataPort').length != 1:
+        self.source_data_port = TargetPort().parse_xml_node(sources[0])
+        if len(targets) != 1:
             raise InvalidDataPortConnectorNodeError
-        self.target_data_port = TargetPort().parse_xml_node(\
-                node.getElementsByTagNameNS(RTS_NS, 'targetDataPort')[0])
-        for c in get_direct_child_elements_xml(node, prefix=RTS_EXT_NS,
-                                               local_name='Properties'):
-            name, value = parse_properties_xml(c)
-            self._properties[name] = value
+        self.target_data_port = TargetPort().parse_xml_node(targets[0])
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new data port connector from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a data port connector into this
         object.
@@ -469,11 +506,11 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
         '''
         self.connector_id = y['connectorId']
         self.name = y['name']
-        self.data_type = y['dataType']
-        self.interface_type = y['interfaceType']
-        self.data_flow_type = y['dataflowType']
+        self.data_type = intern_string(y['dataType'])
+        self.interface_type = intern_string(y['interfaceType'])
+        self.data_flow_type = intern_string(y['dataflowType'])
         if 'subscriptionType' in y:
-            self.subscription_type = y['subscriptionType']
+            self.subscription_type = intern_string(y['subscriptionType'])
         else:
             self.subscription_type = ''
         if 'pushInterval' in y:
@@ -573,12 +610,16 @@ interval: {6}\n  Source data port:\n{7}\n  Target data port:\n{8}\n'.format(\
 ##############################################################################
 ## ServicePortConnector object
 
-class ServicePortConnector(object):
+class ServicePortConnector(ModelObject):
     '''Represents a connection between service ports.'''
 
+    __slots__ = ('_connector_id', '_name', '_trans_method',
+                 '_source_service_port', '_target_service_port', '_comment',
+                 '_visible', '_properties', '_fingerprint')
+
     def __init__(self, connector_id='', name='', trans_method='',
-            source_service_port=TargetPort(),
-            target_service_port=TargetPort(), comment='', visible=True):
+            source_service_port=None,
+            target_service_port=None, comment='', visible=True):
         '''Constructor.
 
         @param connector_id ID of the connector.
@@ -587,9 +628,11 @@ class ServicePortConnector(object):
         @type name str
         @param trans_method Transport method used by the ports.
         @type trans_method str
-        @param source_service_port The source port in the connection.
+        @param source_service_port The source port in the connection. A new
+        TargetPort is made if it is None.
         @type source_service_port TargetPort
-        @param target_service_port The target port in the connection.
+        @param target_service_port The target port in the connection. A new
+        TargetPort is made if it is None.
         @type target_service_port TargetPort
         @param comment A comment about the port connector.
         @type comment str
@@ -606,21 +649,26 @@ class ServicePortConnector(object):
         validate_attribute(trans_method, 'serviceport_connector.transMethod',
                            expected_type=string_types(), required=False)
         self._trans_method = trans_method
+        if source_service_port is None:
+            source_service_port = TargetPort()
         validate_attribute(source_service_port,
                            'serviceport_connector.sourceServicePort',
                            expected_type=TargetPort, required=True)
-        self._source_service_port = source_service_port
+        self._source_service_port = self._adopt(source_service_port)
+        if target_service_port is None:
+            target_service_port = TargetPort()
         validate_attribute(target_service_port,
                            'serviceport_connector.targetServicePort',
                            expected_type=TargetPort, required=True)
-        self._target_service_port = target_service_port
+        self._target_service_port = self._adopt(target_service_port)
         validate_attribute(comment, 'component.ext.comment',
                            expected_type=string_types(), required=False)
         self._comment = comment
         validate_attribute(visible, 'component.ext.visible',
                            expected_type=bool, required=False)
         self._visible = visible
-        self._properties = {}
+        self._properties = ModelDict(parent=self)
+        self._fingerprint = None
 
 
     def __str__(self):
@@ -658,6 +706,7 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
     def connector_id(self, connector_id):
         validate_attribute(connector_id, 'serviceport_connector.connectorID',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._connector_id = connector_id
 
     @property
@@ -680,6 +729,7 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
     def name(self, name):
         validate_attribute(name, 'serviceport_connector.name',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._name = name
 
     @property
@@ -705,6 +755,7 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
     def trans_method(self, trans_method):
         validate_attribute(trans_method, 'serviceport_connector.transMethod',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._trans_method = trans_method
 
     @property
@@ -729,7 +780,8 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
         validate_attribute(source_service_port,
                            'serviceport_connector.sourceServicePort',
                            expected_type=TargetPort, required=True)
-        self._source_service_port = source_service_port
+        self._changed()
+        self._source_service_port = self._adopt(source_service_port)
 
     @property
     def target_service_port(self):
@@ -753,7 +805,8 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
         validate_attribute(target_service_port,
                            'serviceport_connector.targetServicePort',
                            expected_type=TargetPort, required=True)
-        self._target_service_port = target_service_port
+        self._changed()
+        self._target_service_port = self._adopt(target_service_port)
 
     @property
     def comment(self):
@@ -780,6 +833,7 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
     def comment(self, comment):
         validate_attribute(comment, 'serviceport_connector.ext.comment',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._comment = comment
 
     @property
@@ -807,6 +861,7 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
     def visible(self, visible):
         validate_attribute(visible, 'serviceport_connector.ext.visible',
                            expected_type=bool, required=False)
+        self._changed()
         self._visible = visible
 
     @property
@@ -833,7 +888,8 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
     def properties(self, properties):
         validate_attribute(properties, 'serviceport_connector.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a service port connector into
@@ -855,20 +911,30 @@ Source data port:\n{3}\n  Target data port:\n{4}'.format(self.connector_id,
             else:
                 self.visible = False
 
-        if node.getElementsByTagNameNS(RTS_NS, 'sourceServicePort').length != 1:
+        sources = []
+        targets = []
+        for c in get_direct_child_elements_xml(node):
+            if c.namespaceURI == RTS_NS:
+                if c.localName == 'sourceServicePort':
+                    sources.append(c)
+                elif c.localName == 'targetServicePort':
+                    targets.append(c)
+            elif c.namespaceURI == RTS_EXT_NS and c.localName == 'Properties':
+                name, value = parse_properties_xml(c)
+                self._properties[name] = value
+        if len(sources) != 1:
             raise InvalidServicePortConnectorNodeError
-        self.source_service_port = TargetPort().parse_xml_node(\
-                node.getElementsByTagNameNS(RTS_NS, 'sourceServicePort')[0])
-        if node.getElementsByTagNameNS(RTS_NS, 'targetServicePort').length != 1:
+        self.source_service_port = TargetPort().parse_xml_node(sources[0])
+        if len(targets) != 1:
             raise InvalidServicePortConnectorNodeError
-        self.target_service_port = TargetPort().parse_xml_node(\
-                node.getElementsByTagNameNS(RTS_NS, 'targetServicePort')[0])
-        for c in get_direct_child_elements_xml(node, prefix=RTS_EXT_NS,
-                                               local_name='Properties'):
-            name, value = parse_properties_xml(c)
-            self._properties[name] = value
+        self.target_service_port = TargetPort().parse_xml_node(targets[0])
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new service port connector from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a service port connector into this
         object.
@@ -25,20 +25,24 @@ __version__ = '$Revision: $'
 
 from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
                        RTS_EXT_NS_YAML, XSI_NS, XSI_NS_S
+from rtsprofile.tracking import ModelDict, ModelObject
 from rtsprofile.utils import get_direct_child_elements_xml, \
-                             parse_properties_xml, validate_attribute, \
-                             string_types, properties_to_xml
+                             intern_string, parse_properties_xml, \
+                             validate_attribute, string_types, \
+                             properties_to_xml
 
 
 ##############################################################################
 ## DataPort object
 
-class DataPort(object):
+class DataPort(ModelObject):
     '''Represents a data port of a component, as specified in a
     ConnectorProfile.
 
     '''
 
+    __slots__ = ('_name', '_comment', '_visible', '_properties')
+
     def __init__(self, name='', comment='', visible=True):
         '''Constructor.
 
@@ -59,7 +63,7 @@ class DataPort(object):
         validate_attribute(visible, 'component.ext.visible',
                            expected_type=bool, required=False)
         self._visible = visible
-        self._properties = {}
+        self._properties = ModelDict(parent=self)
 
     def __str__(self):
         result = 'Name: {0}\n'.format(self.name)
@@ -94,6 +98,7 @@ class DataPort(object):
     def name(self, name):
         validate_attribute(name, 'dataPort.name',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._name = name
 
     @property
@@ -121,6 +126,7 @@ class DataPort(object):
     def comment(self, comment):
         validate_attribute(comment, 'dataPort.ext.comment',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._comment = comment
 
     @property
@@ -148,6 +154,7 @@ class DataPort(object):
     def visible(self, visible):
         validate_attribute(visible, 'dataPort.ext.visible',
                            expected_type=bool, required=False)
+        self._changed()
         self._visible = visible
 
     @property
@@ -174,7 +181,8 @@ class DataPort(object):
     def properties(self, properties):
         validate_attribute(properties, 'dataPort.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a data port into this
@@ -182,7 +190,7 @@ class DataPort(object):
 
         '''
 
-        self.name = node.getAttributeNS(RTS_NS, 'name')
+        self.name = intern_string(node.getAttributeNS(RTS_NS, 'name'))
         self.comment = node.getAttributeNS(RTS_EXT_NS, 'comment')
         if node.hasAttributeNS(RTS_EXT_NS, 'visible'):
             visible = node.getAttributeNS(RTS_EXT_NS, 'visible')
@@ -196,9 +204,14 @@ class DataPort(object):
             self._properties[name] = value
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new data port from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a data port into this object.'''
-        self.name = y['name']
+        self.name = intern_string(y['name'])
         if RTS_EXT_NS_YAML + 'comment' in y:
             self.comment = y[RTS_EXT_NS_YAML + 'comment']
         if RTS_EXT_NS_YAML + 'visible' in y:
@@ -251,12 +264,14 @@ class DataPort(object):
 ##############################################################################
 ## ServicePort object
 
-class ServicePort(object):
+class ServicePort(ModelObject):
     '''Represents a service port of a component, as specified in a
     ConnectorProfile.
 
     '''
 
+    __slots__ = ('_name', '_comment', '_visible', '_properties')
+
     def __init__(self, name='', comment='', visible=True):
         '''Constructor.
 
@@ -277,7 +292,7 @@ class ServicePort(object):
         validate_attribute(visible, 'component.ext.visible',
                            expected_type=bool, required=False)
         self._visible = visible
-        self._properties = {}
+        self._properties = ModelDict(parent=self)
 
     def __str__(self):
         result = 'Name: {0}\n'.format(self.name)
@@ -312,6 +327,7 @@ class ServicePort(object):
     def name(self, name):
         validate_attribute(name, 'serviceport.name',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._name = name
 
     @property
@@ -339,6 +355,7 @@ class ServicePort(object):
     def comment(self, comment):
         validate_attribute(comment, 'serviceport.ext.comment',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._comment = comment
 
     @property
@@ -366,6 +383,7 @@ class ServicePort(object):
     def visible(self, visible):
         validate_attribute(visible, 'serviceport.ext.visible',
                            expected_type=bool, required=False)
+        self._changed()
         self._visible = visible
 
     @property
@@ -392,7 +410,8 @@ class ServicePort(object):
     def properties(self, properties):
         validate_attribute(properties, 'serviceport.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a service port into this
@@ -400,7 +419,7 @@ class ServicePort(object):
 
         '''
 
-        self.name = node.getAttributeNS(RTS_NS, 'name')
+        self.name = intern_string(node.getAttributeNS(RTS_NS, 'name'))
         self.comment = node.getAttributeNS(RTS_EXT_NS, 'comment')
         if node.hasAttributeNS(RTS_EXT_NS, 'visible'):
             visible = node.getAttributeNS(RTS_EXT_NS, 'visible')
@@ -414,9 +433,14 @@ class ServicePort(object):
             self._properties[name] = value
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new service port from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a service port into this object.'''
-        self.name = y['name']
+        self.name = intern_string(y['name'])
         if RTS_EXT_NS_YAML + 'comment' in y:
             self.comment = y[RTS_EXT_NS_YAML + 'comment']
         if RTS_EXT_NS_YAML + 'visible' in y:
@@ -25,33 +25,45 @@ from __future__ import print_function
 __version__ = '$Revision: $'
 # $Source$
 
+import copy
 from datetime import datetime, MINYEAR
+from itertools import chain
 import sys
-import xml.dom
-import xml.dom.minidom
-import yaml
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
                        RTS_EXT_NS_YAML, XSI_NS, XSI_NS_S
+from rtsprofile.backends import json_dump, json_load, yaml_dump, yaml_load
 from rtsprofile.component import Component
 from rtsprofile.component_group import ComponentGroup
+from rtsprofile.connection_graph import ConnectionGraph
 from rtsprofile.exceptions import MultipleSourcesError, \
-                                  InvalidRtsProfileNodeError, RtsProfileError
+                                  InvalidRtsProfileNodeError, \
+                                  MissingComponentError, RtsProfileError
 from rtsprofile.message_sending import StartUp, ShutDown, Activation, \
                                        Deactivation, Resetting, Initialize, \
                                        Finalize
+from rtsprofile.instrumentation import NULL_RECORDER, recorder, DOCUMENT, \
+                                       ATTRIBUTES, COMPONENTS, GROUPS, \
+                                       CONNECTORS, MESSAGE_SENDING, EXTENDED, \
+                                       SERIALIZATION
 from rtsprofile.port_connectors import DataPortConnector, ServicePortConnector
+from rtsprofile.tracking import ModelDict, ModelList, ModelObject
 from rtsprofile.utils import date_to_dict, get_direct_child_elements_xml, \
-                             indent_string, parse_properties_xml, \
-                             properties_to_xml, validate_attribute, \
-                             string_types
+                             indent_string, interning, parse_properties_xml, \
+                             properties_to_xml, trusted_load, \
+                             validate_attribute, string_types
 
 
 ##############################################################################
 ## RtsProfile object
 
-class RtsProfile(object):
-    def __init__(self, xml_spec=None, yaml_spec=None):
+class RtsProfile(ModelObject):
+    def __init__(self, xml_spec=None, yaml_spec=None, validate=True,
+                 lazy=False, json_spec=None):
         '''Constructor.
 
         Pass in an RTSProfile specification either in a string or a file
@@ -68,6 +80,17 @@ class RtsProfile(object):
         specification of the RTS Profile. If present, the other arguments must
         be None.
 
+        @param validate If False, the specification is trusted to be valid and
+        the attributes read from it are not validated. See @ref
+        parse_from_xml.
+
+        @param lazy If True, the children of each component are parsed only
+        when first used. See @ref parse_from_xml.
+
+        @param json_spec A string or open file object containing the JSON
+        specification of the RTS Profile. If present, the other
+        specifications must be None.
+
         Example:
         >>> s = RtsProfile()
 
@@ -79,20 +102,21 @@ class RtsProfile(object):
         >>> input = open('test/rtsystem.yaml').read()
         >>> s = RtsProfile(yaml_spec=input)
 
+        Initialize from json string:
+        >>> s = RtsProfile(json_spec=s.save_to_json())
+
         Get system summary as string:
         >>> str(s).find('ID:') != -1
         True
         '''
+        if len([s for s in (xml_spec, yaml_spec, json_spec) if s]) > 1:
+            raise MultipleSourcesError('More than one specification given.')
         if xml_spec:
-            if yaml_spec:
-                raise MultipleSourcesError('XML and YAML specifications both \
-given.')
-            self.parse_from_xml(xml_spec)
+            self.parse_from_xml(xml_spec, validate=validate, lazy=lazy)
         elif yaml_spec:
-            if xml_spec:
-                raise MultipleSourcesError('XML and YAML specifications both \
-given.')
-            self.parse_from_yaml(yaml_spec)
+            self.parse_from_yaml(yaml_spec, validate=validate, lazy=lazy)
+        elif json_spec:
+            self.parse_from_json(json_spec, validate=validate, lazy=lazy)
         else:
             self._reset()
 
@@ -168,6 +192,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def id(self, id):
         validate_attribute(id, 'rts_profile.id',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._id = id
 
     @property
@@ -192,6 +217,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def abstract(self, abstract):
         validate_attribute(abstract, 'rts_profile.abstract',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._abstract = abstract
 
     @property
@@ -216,6 +242,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def creation_date(self, creation_date):
         validate_attribute(creation_date, 'rts_profile.creationDate',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._creation_date = creation_date
 
     @property
@@ -240,6 +267,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def update_date(self, update_date):
         validate_attribute(update_date, 'rts_profile.updateDate',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._update_date = update_date
 
     @property
@@ -262,6 +290,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def version(self, version):
         validate_attribute(version, 'rts_profile.version',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._version = version
 
     @property
@@ -281,13 +310,15 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Components', <type 'int'>, <type 'list'>)
         '''
-        return self._components
+        return self._owned(self._components)
 
     @components.setter
     def components(self, components):
         validate_attribute(components, 'rts_profile.Components',
                            expected_type=list, required=False)
-        self._components = components
+        self._changed()
+        self._components = ModelList(components, self)
+        self._comp_index = None
 
     @property
     def groups(self):
@@ -306,13 +337,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Groups', <type 'int'>, <type 'list'>)
         '''
-        return self._groups
+        return self._owned(self._groups)
 
     @groups.setter
     def groups(self, groups):
         validate_attribute(groups, 'rts_profile.Groups',
                            expected_type=list, required=False)
-        self._groups = groups
+        self._changed()
+        self._groups = ModelList(groups, self)
 
     @property
     def data_port_connectors(self):
@@ -330,14 +362,16 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.DataPortConnectors', <type 'int'>, <type 'list'>)
         '''
-        return self._data_port_connectors
+        return self._owned(self._data_port_connectors)
 
     @data_port_connectors.setter
     def data_port_connectors(self, data_port_connectors):
         validate_attribute(data_port_connectors,
                            'rts_profile.DataPortConnectors',
                            expected_type=list, required=False)
-        self._data_port_connectors = data_port_connectors
+        self._changed()
+        self._data_port_connectors = ModelList(data_port_connectors, self)
+        self._conn_graph = None
 
     @property
     def service_port_connectors(self):
@@ -355,14 +389,17 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.ServicePortConnectors', <type 'int'>, <type 'list'>)
         '''
-        return self._service_port_connectors
+        return self._owned(self._service_port_connectors)
 
     @service_port_connectors.setter
     def service_port_connectors(self, service_port_connectors):
         validate_attribute(service_port_connectors,
                            'rts_profile.ServicePortConnectors',
                            expected_type=list, required=False)
-        self._service_port_connectors = service_port_connectors
+        self._changed()
+        self._service_port_connectors = ModelList(service_port_connectors,
+                                                  self)
+        self._conn_graph = None
 
     @property
     def startup(self):
@@ -379,13 +416,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.StartUp', <type 'int'>, <class 'rtsprofile.message_sending.StartUp'>)
         '''
-        return self._startup
+        return self._owned(self._startup)
 
     @startup.setter
     def startup(self, startup):
         validate_attribute(startup, 'rts_profile.StartUp',
                            expected_type=StartUp, required=False)
-        self._startup = startup
+        self._changed()
+        self._startup = self._adopt(startup)
 
     @property
     def shutdown(self):
@@ -402,13 +440,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.ShutDown', <type 'int'>, <class 'rtsprofile.message_sending.ShutDown'>)
         '''
-        return self._shutdown
+        return self._owned(self._shutdown)
 
     @shutdown.setter
     def shutdown(self, shutdown):
         validate_attribute(shutdown, 'rts_profile.ShutDown',
                            expected_type=ShutDown, required=False)
-        self._shutdown = shutdown
+        self._changed()
+        self._shutdown = self._adopt(shutdown)
 
     @property
     def activation(self):
@@ -425,13 +464,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Activation', <type 'int'>, <class 'rtsprofile.message_sending.Activation'>)
         '''
-        return self._activation
+        return self._owned(self._activation)
 
     @activation.setter
     def activation(self, activation):
         validate_attribute(activation, 'rts_profile.Activation',
                            expected_type=Activation, required=False)
-        self._activation = activation
+        self._changed()
+        self._activation = self._adopt(activation)
 
     @property
     def deactivation(self):
@@ -448,13 +488,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Deactivation', <type 'int'>, <class 'rtsprofile.message_sending.Deactivation'>)
         '''
-        return self._deactivation
+        return self._owned(self._deactivation)
 
     @deactivation.setter
     def deactivation(self, deactivation):
         validate_attribute(deactivation, 'rts_profile.Deactivation',
                            expected_type=Deactivation, required=False)
-        self._deactivation = deactivation
+        self._changed()
+        self._deactivation = self._adopt(deactivation)
 
     @property
     def resetting(self):
@@ -471,13 +512,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Resetting', <type 'int'>, <class 'rtsprofile.message_sending.Resetting'>)
         '''
-        return self._resetting
+        return self._owned(self._resetting)
 
     @resetting.setter
     def resetting(self, resetting):
         validate_attribute(resetting, 'rts_profile.Resetting',
                            expected_type=Resetting, required=False)
-        self._resetting = resetting
+        self._changed()
+        self._resetting = self._adopt(resetting)
 
     @property
     def initializing(self):
@@ -494,13 +536,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Initializing', <type 'int'>, <class 'rtsprofile.message_sending.Initialize'>)
         '''
-        return self._initializing
+        return self._owned(self._initializing)
 
     @initializing.setter
     def initializing(self, initializing):
         validate_attribute(initializing, 'rts_profile.Initializing',
                            expected_type=Initialize, required=False)
-        self._initializing = initializing
+        self._changed()
+        self._initializing = self._adopt(initializing)
 
     @property
     def finalizing(self):
@@ -517,13 +560,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rts_profile.Finalizing', <type 'int'>, <class 'rtsprofile.message_sending.Finalize'>)
         '''
-        return self._finalizing
+        return self._owned(self._finalizing)
 
     @finalizing.setter
     def finalizing(self, finalizing):
         validate_attribute(finalizing, 'rts_profile.Finalizing',
                            expected_type=Finalize, required=False)
-        self._finalizing = finalizing
+        self._changed()
+        self._finalizing = self._adopt(finalizing)
 
     @property
     def comment(self):
@@ -550,6 +594,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def comment(self, comment):
         validate_attribute(comment, 'rtsprofile.ext.comment',
                            expected_type=string_types(), required=False)
+        self._changed()
         self._comment = comment
 
     @property
@@ -571,13 +616,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rtsprofile.ext.VersionUpLog', <type 'int'>, <type 'list'>)
         '''
-        return self._version_up_log
+        return self._owned(self._version_up_log)
 
     @version_up_log.setter
     def version_up_log(self, version_up_log):
         validate_attribute(version_up_log, 'rtsprofile.ext.VersionUpLog',
                            expected_type=list, required=False)
-        self._version_up_log = version_up_log
+        self._changed()
+        self._version_up_log = ModelList(version_up_log, self)
 
     @property
     def properties(self):
@@ -597,13 +643,34 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         ...
         InvalidTypeError: ('rtsprofile.ext.Properties', <type 'int'>, <type 'dict'>)
         '''
-        return self._properties
+        return self._owned(self._properties)
 
     @properties.setter
     def properties(self, properties):
         validate_attribute(properties, 'rtsprofile.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
+
+    @property
+    def string_table(self):
+        '''The @ref StringTable that interned the strings read by the last
+        parse of this RtsProfile, or None if it has not been parsed.
+
+        Its statistics give the number of strings looked up while parsing and
+        the memory saved by keeping one copy of each value. Components parsed
+        lazily add to them when they are parsed. If a table was set with @ref
+        set_string_table, that table is used by every parse.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> t = s.string_table
+        >>> t.hits > 0 and t.saved_bytes > 0
+        True
+        >>> RtsProfile().string_table is None
+        True
+        '''
+        return self._string_table
 
     ###########################################################################
     # API functions
@@ -611,17 +678,122 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
     def find_comp_by_target(self, target):
         '''Finds a component using a TargetComponent or one of its subclasses.
 
+        Components are looked up through an index on their ID and instance
+        name, so this does not depend on the number of components. The index
+        is kept with the revision of the component list, and is rebuilt the
+        first time a component is looked up after the list, or a component in
+        it, has changed. If several components have the same ID and instance
+        name, the first of them in the list is found.
+
         @param A @ref TargetComponent object or subclass of @ref
         TargetComponent.
         @return A Component object matching the target.
         @raises MissingComponentError
 
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> t = s.data_port_connectors[0].source_data_port
+        >>> print(s.find_comp_by_target(t).instance_name)
+        SampleComponent_1
+
+        Changes to the component list are seen:
+        >>> c = s.components.pop(0)
+        >>> s.find_comp_by_target(t)
+        Traceback (most recent call last):
+        ...
+        MissingComponentError
+        >>> s.components.append(c)
+        >>> print(s.find_comp_by_target(t).instance_name)
+        SampleComponent_1
+
+        A component that is also held by another profile is still tracked:
+        >>> other = RtsProfile()
+        >>> other.components.append(c)
+        >>> other.components[0].instance_name = 'renamed'
+        >>> t.instance_name = 'renamed'
+        >>> print(s.find_comp_by_target(t).instance_name)
+        renamed
+
+        The first of several matching components is found:
+        >>> dup = Component(id=c.id, instance_name='renamed')
+        >>> s.components[0] = dup
+        >>> s.find_comp_by_target(t) is dup
+        True
+        >>> del s.components[0]
+        >>> s.find_comp_by_target(t) is c
+        True
+        '''
+        comps = self.components
+        if self._comp_index is None or self._comp_index_sig != \
+                (id(comps), comps._revision):
+            # The index is missing or out of date with the component list
+            self._build_comp_index()
+        ii = self._comp_index.get((target.component_id, target.instance_name))
+        if ii is None:
+            raise MissingComponentError
+        return comps[ii]
+
+    def connection_graph(self):
+        '''Gets a @ref ConnectionGraph of the data and service port connectors
+        in the RT system.
+
+        The graph is built the first time it is requested and kept until the
+        connectors change: a connector list is replaced, a connector is added
+        to, removed from or replaced in a list, or a connector or one of its
+        target ports is changed. Changes to other parts of the profile, or to
+        other profiles, do not cause the graph to be rebuilt.
+
+        @return The ConnectionGraph object.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> g = s.connection_graph()
+        >>> g is s.connection_graph()
+        True
+        >>> comp1 = s.components[0]
+        >>> len(g.fan_out(comp1))
+        2
+
+        Changes to the connectors are seen:
+        >>> conn = s.data_port_connectors.pop(0)
+        >>> len(s.connection_graph().fan_out(comp1))
+        1
+        >>> s.data_port_connectors.append(conn)
+        >>> conn.target_data_port.port_name = 'Comp2_inport2'
+        >>> g = s.connection_graph()
+        >>> len(g.fan_in((conn.target_data_port.component_id,
+        ...                conn.target_data_port.instance_name,
+        ...                'Comp2_inport1')))
+        0
+        >>> new_port = (conn.target_data_port.component_id,
+        ...             conn.target_data_port.instance_name, 'Comp2_inport2')
+        >>> len(g.fan_in(new_port))
+        1
+        >>> s.data_port_connectors[1] = DataPortConnector()
+        >>> len(s.connection_graph().fan_in(new_port))
+        0
+
+        Other profiles do not affect the graph:
+        >>> g = s.connection_graph()
+        >>> other = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> other.data_port_connectors[0].target_data_port.port_name = 'x'
+        >>> s.connection_graph() is g
+        True
+
+        A connector that is also held by another profile is still tracked:
+        >>> other.data_port_connectors.append(s.data_port_connectors[0])
+        >>> other.data_port_connectors[-1].target_data_port.port_name = 'y'
+        >>> s.connection_graph() is g
+        False
         '''
-        for comp in self._components:
-            if comp.id == target.component_id and \
-                    comp.instance_name == target.instance_name:
-                return comp
-        raise MissingComponentError
+        data_conns = self.data_port_connectors
+        service_conns = self.service_port_connectors
+        sig = (id(data_conns), data_conns._revision,
+               id(service_conns), service_conns._revision)
+        if self._conn_graph is None or sig != self._conn_graph_sig:
+            self._conn_graph = ConnectionGraph(data_conns, service_conns)
+            self._conn_graph_sig = sig
+        return self._conn_graph
 
     def optional_data_connections(self):
         '''Finds all data connections in which one or more components are not
@@ -637,7 +809,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         0
         '''
         result = []
-        for conn in self._data_port_connectors:
+        for conn in self.data_port_connectors:
             source_comp = self.find_comp_by_target(conn.source_data_port)
             target_comp = self.find_comp_by_target(conn.target_data_port)
             if not source_comp.is_required or not target_comp.is_required:
@@ -658,7 +830,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         0
         '''
         result = []
-        for conn in self._service_port_connectors:
+        for conn in self.service_port_connectors:
             source_comp = self.find_comp_by_target(conn.source_service_port)
             target_comp = self.find_comp_by_target(conn.target_service_port)
             if not source_comp.is_required or not target_comp.is_required:
@@ -678,7 +850,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         2
         '''
         result = []
-        for conn in self._data_port_connectors:
+        for conn in self.data_port_connectors:
             source_comp = self.find_comp_by_target(conn.source_data_port)
             target_comp = self.find_comp_by_target(conn.target_data_port)
             if source_comp.is_required and target_comp.is_required:
@@ -698,42 +870,356 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         1
         '''
         result = []
-        for conn in self._service_port_connectors:
+        for conn in self.service_port_connectors:
             source_comp = self.find_comp_by_target(conn.source_service_port)
             target_comp = self.find_comp_by_target(conn.target_service_port)
             if source_comp.is_required and target_comp.is_required:
                 result.append(conn)
         return result
 
+    def fingerprint(self):
+        '''Gets a hash of the content of this RtsProfile.
+
+        Profiles with the same content have the same fingerprint. The
+        fingerprint is combined from the fingerprints of the components,
+        connectors and other objects in the profile. All are cached until the
+        model is changed, so getting the fingerprint again is cheap. See @ref
+        fingerprint for details.
+
+        @return The fingerprint as a string of hexadecimal digits.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> f = s.fingerprint()
+        >>> s.fingerprint() == f
+        True
+        >>> s.components[0].instance_name = 'renamed'
+        >>> s.fingerprint() == f
+        False
+
+        A component that is also held by another profile is still tracked:
+        >>> f = s.fingerprint()
+        >>> other = RtsProfile()
+        >>> other.components.append(s.components[0])
+        >>> other.components[0].path_uri = 'changed'
+        >>> s.fingerprint() == f
+        False
+        '''
+        from rtsprofile.fingerprint import fingerprint
+        return fingerprint(self)
+
+    def lifecycle_plan(self, action, strict_sequence=False):
+        '''Makes a plan for carrying out a message sending action on all of its
+        targets, as waves of components that can be acted on concurrently.
+
+        See @ref plan_lifecycle.
+
+        @param action The name of the property holding the action: 'startup',
+        'shutdown', 'activation', 'deactivation', 'resetting', 'initializing'
+        or 'finalizing'.
+        @param strict_sequence If True, every target waits for all targets
+        with lower sequence numbers to finish.
+        @return A @ref LifecyclePlan. It is empty if the profile does not
+        specify the action.
+        @raises DependencyCycleError
+        @raises ValueError if the action is unknown.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> [len(w) for w in s.lifecycle_plan('shutdown').waves]
+        [1, 1, 1]
+        >>> len(s.lifecycle_plan('activation'))
+        0
+        '''
+        from rtsprofile.lifecycle import plan_lifecycle
+        if action not in _MESSAGE_SENDING_ATTRS:
+            raise ValueError('Unknown action: {0}'.format(action))
+        return plan_lifecycle(getattr(self, action), strict_sequence)
+
+    def critical_path(self, actions=None, strict_sequence=False,
+                      action_time=None):
+        '''Finds the earliest and latest start time of every step of a
+        sequence of message sending actions, the time they take altogether,
+        and the steps that determine it.
+
+        See @ref analyze_critical_path.
+
+        @param actions The names of the properties holding the actions, in
+        the order they are carried out. Defaults to 'initializing', 'startup'
+        and 'activation'.
+        @param strict_sequence If True, every target waits for all targets
+        of the same action with lower sequence numbers to finish.
+        @param action_time The time the components take to carry out an
+        action, in milliseconds, or None if it is not known.
+        @return A @ref CriticalPathAnalysis.
+        @raises DependencyCycleError
+        @raises ValueError if an action is unknown.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> s.critical_path().makespan
+        1000
+        >>> s.critical_path(strict_sequence=True).makespan
+        2250
+        '''
+        from rtsprofile.lifecycle import analyze_critical_path, \
+                                         STARTUP_ACTIONS
+        if actions is None:
+            actions = STARTUP_ACTIONS
+        for action in actions:
+            if action not in _MESSAGE_SENDING_ATTRS:
+                raise ValueError('Unknown action: {0}'.format(action))
+        return analyze_critical_path(self, actions, strict_sequence,
+                                     action_time)
+
+    def check_integrity(self):
+        '''Checks that every reference in the RT system, such as the ports of
+        the connectors and the targets of the message sending actions, points
+        at something that exists.
+
+        See @ref integrity.check_integrity.
+
+        @return A list of @ref BrokenReference objects. It is empty if all
+        references are valid.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> [b.problem for b in s.check_integrity()]
+        ['missing configuration set', 'missing data port', 'missing component']
+        '''
+        from rtsprofile.integrity import check_integrity
+        return check_integrity(self)
+
+    ###########################################################################
+    # Clones
+
+    def clone(self):
+        '''Makes a copy of this RtsProfile that shares its objects with this
+        one until they are changed.
+
+        Nothing is copied when the clone is made, so it takes the same short
+        time for any size of profile. Afterwards, the two profiles can be
+        changed freely without seeing each other's changes:
+
+        - This profile keeps its lists, dictionaries and objects, such as its
+          @ref Component, @ref ConfigurationSet, @ref Location and @ref
+          TargetPort objects, and changes them in place. Before an object is
+          changed, the clone is given a copy of it as it was.
+        - The clone copies a list, dictionary or object the first time it is
+          got from the clone. Lists are copied without their items, and
+          objects without the objects in their lists, so getting a component
+          from the clone copies that component and not the rest of the
+          profile.
+
+        The memory used therefore grows with the parts of the clone that are
+        used and the changes made.
+
+        @return The new RtsProfile.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> comp = s.components[0]
+        >>> c = s.clone()
+
+        Changes made through the clone are not seen in the original:
+        >>> removed = c.components.pop(1)
+        >>> len(c.components), len(s.components)
+        (2, 3)
+        >>> c.components[0].location.x = 5
+        >>> c.data_port_connectors[0].target_data_port.port_name = \\
+        ...         'Comp2_inport2'
+        >>> c.components[0].location.x, s.components[0].location.x
+        (5, 93)
+        >>> print(s.data_port_connectors[0].target_data_port.port_name)
+        Comp2_inport1
+
+        The original can still be changed, including through objects got
+        before the clone was made, and the changes are not seen in the
+        clone:
+        >>> comp.instance_name = 'renamed'
+        >>> s.components[0] is comp
+        True
+        >>> print(c.components[0].instance_name)
+        SampleComponent_1
+        >>> s.components[2].comment = 'changed'
+        >>> print(c.components[1].comment)
+        <BLANKLINE>
+        '''
+        new = type(self).__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new._revision = self._revision
+        new._borrowed = {}
+        for attr in _SHARED_ATTRS:
+            new._borrow(getattr(self, attr))
+        return new
+
+    ###########################################################################
+    # Patches
+
+    def make_patch(self, new):
+        '''Make a patch that changes this RtsProfile into another.
+
+        The patch holds only the items and fields that differ. Use @ref
+        apply_patch to apply it to another copy of this profile, or @ref
+        Patch.save_to_yaml to send it elsewhere.
+
+        @param new The RtsProfile to change this one into.
+        @return A @ref Patch object.
+
+        Example:
+        >>> old = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> new = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> new.data_port_connectors[0].name = 'renamed'
+        >>> print(old.make_patch(new))
+        modify dataPortConnectors[9c477198-dbf4-4298-9713-c5e1b1b30607].name
+        '''
+        from rtsprofile.patch import make_patch
+        return make_patch(self, new)
+
+    def apply_patch(self, patch):
+        '''Apply a patch to this RtsProfile in place.
+
+        Only the items changed by the patch are touched, so a small patch is
+        applied without parsing or saving the rest of the profile.
+
+        @param patch A @ref Patch object, or a YAML specification of one.
+        @raises InvalidPatchError
+
+        Example:
+        >>> old = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> new = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> new.data_port_connectors[0].name = 'renamed'
+        >>> old.apply_patch(old.make_patch(new).save_to_yaml())
+        >>> print(old.data_port_connectors[0].name)
+        renamed
+        '''
+        from rtsprofile.patch import Patch, apply_patch
+        if not isinstance(patch, Patch):
+            patch = Patch(yaml_spec=patch)
+        apply_patch(self, patch)
+
     ###########################################################################
     # XML
 
-    def parse_from_xml(self, xml_spec):
+    def parse_from_xml(self, xml_spec, validate=True, lazy=False,
+                       instrument=None):
         '''Parse a string or file containing an XML specification.
 
+        @param validate If True, every attribute read from the specification
+        is validated as it is set, as if set through its property. If False,
+        the specification is trusted and validation is skipped, which makes
+        parsing faster; use this only for input known to be valid, such as
+        profiles previously saved by this library. Properties set after
+        parsing are always validated.
+        @param lazy If True, only the attributes of each component are parsed
+        at first. Its ports, configuration sets, execution contexts,
+        participants, location and properties are parsed when one of them is
+        first used, so the time taken to load a profile depends on how much of
+        it is used. The document is kept in memory until all components have
+        been fully parsed, and errors in the children of a component are
+        raised when they are parsed.
+        @param instrument A callable that is given a @ref
+        rtsprofile.instrumentation.PhaseRecord with the time taken and the
+        number of objects parsed in each phase: reading the document, the
+        attributes, the components, groups, connectors, message sending
+        objects and extended children. If None, the default set with @ref
+        rtsprofile.instrumentation.set_default_instrument is used; if that is
+        also None, nothing is measured.
+
         Example:
         >>> s = RtsProfile()
         >>> s.parse_from_xml(open('test/rtsystem.xml'))
         >>> len(s.components)
         3
 
+        Trusted parsing gives the same result:
+        >>> s2 = RtsProfile()
+        >>> s2.parse_from_xml(open('test/rtsystem.xml'), validate=False)
+        >>> str(s2) == str(s)
+        True
+
+        As does lazy parsing:
+        >>> s2 = RtsProfile()
+        >>> s2.parse_from_xml(open('test/rtsystem.xml'), lazy=True)
+        >>> print(s2.components[0].instance_name)
+        SampleComponent_1
+        >>> str(s2) == str(s)
+        True
+
         Load of invalid data should throw exception:
         >>> s.parse_from_xml('non-XML string')
         Traceback (most recent call last):
         ...
         ExpatError: syntax error: line 1, column 0
         '''
-        if type(xml_spec) in string_types():
-            dom = xml.dom.minidom.parseString(xml_spec)
-        else:
-            dom = xml.dom.minidom.parse(xml_spec)
-        self._parse_xml(dom)
-        dom.unlink()
+        import xml.dom.minidom
+        with recorder('parse_from_xml', instrument) as rec:
+            rec.enter(DOCUMENT)
+            if hasattr(xml_spec, 'read'):
+                dom = xml.dom.minidom.parse(xml_spec)
+            else:
+                # A string, or under Python 3 either bytes or str
+                dom = xml.dom.minidom.parseString(xml_spec)
+            with trusted_load(not validate):
+                with interning() as strings:
+                    self._parse_xml(dom, lazy, rec)
+                    self._string_table = strings
+            if not lazy:
+                rec.enter(DOCUMENT, 0)
+                dom.unlink()
+
+    def parse_from_xml_stream(self, xml_spec, validate=True, lazy=False):
+        '''Parse a string or file containing an XML specification without
+        building a DOM tree of the whole document.
+
+        The document is read as a stream of parser events. Each child of the
+        RtsProfile node (a component, a connector, a message sending
+        specification, etc.) is expanded, parsed into the object model and then
+        discarded before the next one is read, so memory use is bounded by the
+        largest single child rather than by the whole document. The resulting
+        objects are the same as those produced by @ref parse_from_xml.
+
+        @param validate See @ref parse_from_xml.
+        @param lazy See @ref parse_from_xml. The nodes of the components are
+        kept in memory until they have been fully parsed.
 
-    def save_to_xml(self):
+        Example:
+        >>> s = RtsProfile()
+        >>> s.parse_from_xml_stream(open('test/rtsystem.xml'))
+        >>> len(s.components)
+        3
+        >>> str(s) == str(RtsProfile(xml_spec=open('test/rtsystem.xml').read()))
+        True
+
+        Load of invalid data should throw exception:
+        >>> s.parse_from_xml_stream('non-XML string')
+        Traceback (most recent call last):
+        ...
+        SAXParseException: <unknown>:1:0: syntax error
+        '''
+        import xml.dom.pulldom
+        if hasattr(xml_spec, 'read'):
+            events = xml.dom.pulldom.parse(xml_spec)
+        else:
+            # A string, or under Python 3 either bytes or str
+            events = xml.dom.pulldom.parseString(xml_spec)
+        with trusted_load(not validate):
+            with interning() as strings:
+                self._parse_xml_events(events, lazy)
+                self._string_table = strings
+
+    def save_to_xml(self, instrument=None):
         '''Save this RtsProfile into an XML-formatted string.
 
+        @param instrument A callable that is given a @ref
+        rtsprofile.instrumentation.PhaseRecord with the time taken and the
+        number of objects converted in each phase: the attributes, the
+        components, groups, connectors, message sending objects and extended
+        children, and the serialization of the elements as text. See @ref
+        parse_from_xml.
+
         Example:
+        >>> import xml.dom.minidom
         >>> input = xml.dom.minidom.parse(open('test/rtsystem.xml')).toprettyxml(indent='    ')
         >>> input = '\\n'.join([l for l in input.split('\\n') if l.strip() != ''])
         >>> s = RtsProfile(xml_spec=input)
@@ -743,34 +1229,97 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         >>> import difflib
         >>> print('\\n'.join(list(difflib.unified_diff(input.splitlines(), output.splitlines(), 'input', 'output'))))
         <BLANKLINE>
+
+        The output is the same as pretty-printing the whole document:
+        >>> output == s._to_xml_dom().toprettyxml(indent='    ')
+        True
+        '''
+        with recorder('save_to_xml', instrument) as rec:
+            stream = StringIO()
+            self._write_xml(stream, rec)
+            return stream.getvalue()
+
+    def save_to_xml_stream(self, stream, instrument=None):
+        '''Save this RtsProfile as XML to a file-like object.
+
+        The XML is the same as that returned by @ref save_to_xml, but it is
+        written to the stream as each child of the RtsProfile node (a
+        component, a connector, etc.) is converted, so that only one child is
+        held in memory as XML at a time. The stream must accept the strings
+        produced by xml.dom.minidom; in Python 3, this means a text stream.
+
+        @param stream The file-like object to write to.
+        @param instrument See @ref save_to_xml. The time spent writing to the
+        stream is part of the serialization phase.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> stream = StringIO()
+        >>> s.save_to_xml_stream(stream)
+        >>> stream.getvalue() == s._to_xml_dom().toprettyxml(indent='    ')
+        True
+
+        A profile with no children is written as an empty element:
+        >>> s = RtsProfile()
+        >>> s.creation_date = s.update_date = '2015-01-01T00:00:00'
+        >>> stream = StringIO()
+        >>> s.save_to_xml_stream(stream)
+        >>> stream.getvalue() == s._to_xml_dom().toprettyxml(indent='    ')
+        True
         '''
-        xml_obj = self._to_xml_dom()
-        return xml_obj.toprettyxml(indent='    ')
+        with recorder('save_to_xml_stream', instrument) as rec:
+            self._write_xml(stream, rec)
 
     ###########################################################################
     # YAML
 
-    def parse_from_yaml(self, yaml_spec):
+    def parse_from_yaml(self, yaml_spec, backend=None, validate=True,
+                        lazy=False, instrument=None):
         '''Parse a string or file containing a YAML specification.
 
+        @param backend The YAML backend to use: 'libyaml', 'python' or 'auto'.
+        If None, the default set with @ref rtsprofile.backends.set_yaml_backend
+        is used, which is libyaml if it is available.
+        @param validate See @ref parse_from_xml.
+        @param lazy See @ref parse_from_xml.
+        @param instrument See @ref parse_from_xml.
+        @raises InvalidBackendError
+
         Example:
         >>> s = RtsProfile()
         >>> s.parse_from_yaml(open('test/rtsystem.yaml'))
         >>> len(s.components)
         3
 
+        Both backends give the same result:
+        >>> s2 = RtsProfile()
+        >>> s2.parse_from_yaml(open('test/rtsystem.yaml'), backend='python')
+        >>> str(s2) == str(s)
+        True
+
         Load of invalid data should throw exception:
         >>> s.parse_from_yaml('non-YAML string')
         Traceback (most recent call last):
         ...
         RtsProfileError: Missing root node.
         '''
-        self._parse_yaml(yaml.safe_load(yaml_spec))
-
-    def save_to_yaml(self):
+        with recorder('parse_from_yaml', instrument) as rec:
+            rec.enter(DOCUMENT)
+            spec = yaml_load(yaml_spec, backend)
+            with trusted_load(not validate):
+                with interning() as strings:
+                    self._parse_yaml(spec, lazy, rec)
+                    self._string_table = strings
+
+    def save_to_yaml(self, backend=None, instrument=None):
         '''Save this RtsProfile into a YAML-formatted string.
 
+        @param backend The YAML backend to use. See @ref parse_from_yaml.
+        @param instrument See @ref save_to_xml.
+        @raises InvalidBackendError
+
         Example:
+        >>> import yaml
         >>> input = yaml.safe_dump(yaml.safe_load(open('test/rtsystem.yaml')))
         >>> s = RtsProfile()
         >>> s.parse_from_yaml(input)
@@ -778,127 +1327,245 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         >>> import difflib
         >>> print('\\n'.join(list(difflib.unified_diff(input.splitlines(), output.splitlines(), 'input', 'output'))))
         <BLANKLINE>
+        >>> s.save_to_yaml(backend='python') == output
+        True
+        '''
+        with recorder('save_to_yaml', instrument) as rec:
+            d = self._to_dict(rec)
+            rec.enter(SERIALIZATION)
+            return yaml_dump(d, backend)
+
+    ###########################################################################
+    # JSON
+
+    def parse_from_json(self, json_spec, backend=None, validate=True,
+                        lazy=False):
+        '''Parse a string or file containing a JSON specification.
+
+        The JSON specification has the same structure as the YAML
+        specification.
+
+        @param backend The JSON backend to use: 'orjson', 'ujson',
+        'simplejson', 'json' or 'auto'. If None, the default set with @ref
+        rtsprofile.backends.set_json_backend is used, which is the fastest
+        backend that is installed.
+        @param validate See @ref parse_from_xml.
+        @param lazy See @ref parse_from_xml.
+        @raises InvalidBackendError
+        @raises ValueError if the specification is not valid JSON.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> s2 = RtsProfile()
+        >>> s2.parse_from_json(s.save_to_json())
+        >>> s2.save_to_xml() == s.save_to_xml()
+        True
+
+        Load of invalid data should throw exception:
+        >>> s.parse_from_json('{}')
+        Traceback (most recent call last):
+        ...
+        RtsProfileError: Missing root node.
+        '''
+        spec = json_load(json_spec, backend)
+        with trusted_load(not validate):
+            with interning() as strings:
+                self._parse_yaml(spec, lazy)
+                self._string_table = strings
+
+    def save_to_json(self, backend=None):
+        '''Save this RtsProfile into a compact JSON-formatted string.
+
+        @param backend The JSON backend to use. See @ref parse_from_json.
+        @raises InvalidBackendError
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> s.save_to_json(backend='json').startswith('{"rtsProfile":{')
+        True
         '''
-        return self._to_yaml()
+        return json_dump(self._to_dict(), backend)
+
+    ###########################################################################
+    # Dictionaries
+
+    @classmethod
+    def from_dict(cls, d, validate=True, lazy=False):
+        '''Create a new RtsProfile from a dictionary, as made by @ref
+        to_dict.
+
+        @param validate See @ref parse_from_xml.
+        @param lazy See @ref parse_from_xml.
+
+        Example:
+        >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+        >>> RtsProfile.from_dict(s.to_dict()).save_to_xml() == s.save_to_xml()
+        True
+        '''
+        prof = cls()
+        with trusted_load(not validate):
+            with interning() as strings:
+                prof._parse_yaml(d, lazy)
+                prof._string_table = strings
+        return prof
+
+    def to_dict(self):
+        '''Save this RtsProfile into a dictionary.
+
+        The dictionary has the structure of the YAML and JSON specifications,
+        and holds only strings, numbers, booleans, lists and dictionaries.
+
+        '''
+        return self._to_dict()
 
     ###########################################################################
     # Internal functions
 
-    def _parse_xml(self, dom):
+    def _parse_xml(self, dom, lazy=False, rec=NULL_RECORDER):
+        rec.enter(ATTRIBUTES)
         self._reset()
         root = dom.documentElement
-        # Get the attributes
+        self._parse_xml_attributes(root)
+        for c in get_direct_child_elements_xml(root):
+            rec.enter(_XML_CHILD_PHASES.get(c.localName, EXTENDED))
+            self._parse_xml_child(c, lazy)
+
+    def _parse_xml_events(self, events, lazy=False):
+        # Parse a stream of pulldom events. The RtsProfile node is the first
+        # element; each child element is expanded and parsed in turn.
+        import xml.dom.pulldom
+        self._reset()
+        root = None
+        for event, node in events:
+            if event != xml.dom.pulldom.START_ELEMENT:
+                continue
+            if root is None:
+                root = node
+                self._parse_xml_attributes(root)
+            else:
+                events.expandNode(node)
+                self._parse_xml_child(node, lazy)
+                if not lazy:
+                    node.unlink()
+
+    def _parse_xml_attributes(self, root):
+        # Get the attributes of the RtsProfile node
         self.id = root.getAttributeNS(RTS_NS, 'id')
         self.abstract = root.getAttributeNS(RTS_NS, 'abstract')
         self.creation_date = root.getAttributeNS(RTS_NS, 'creationDate')
         self.update_date = root.getAttributeNS(RTS_NS, 'updateDate')
         self.version = root.getAttributeNS(RTS_NS, 'version')
         self.comment = root.getAttributeNS(RTS_EXT_NS, 'comment')
-        # Parse the children
-        for c in root.getElementsByTagNameNS(RTS_NS, 'Components'):
-            self._components.append(Component().parse_xml_node(c))
-        for c in root.getElementsByTagNameNS(RTS_NS, 'Groups'):
-            self._groups.append(ComponentGroup().parse_xml_node(c))
-        for c in root.getElementsByTagNameNS(RTS_NS, 'DataPortConnectors'):
-            self._data_port_connectors.append(DataPortConnector().parse_xml_node(c))
-        for c in root.getElementsByTagNameNS(RTS_NS, 'ServicePortConnectors'):
-            self._service_port_connectors.append(ServicePortConnector().parse_xml_node(c))
-        # These children should have zero or one
-        c = root.getElementsByTagNameNS(RTS_NS, 'StartUp')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('StartUp')
-            self._startup = StartUp().parse_xml_node(c[0])
-        c = root.getElementsByTagNameNS(RTS_NS, 'ShutDown')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('ShutDown')
-            self._shutdown = ShutDown().parse_xml_node(c[0])
-        c = root.getElementsByTagNameNS(RTS_NS, 'Activation')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('Activation')
-            self._activation = Activation().parse_xml_node(c[0])
-        c = root.getElementsByTagNameNS(RTS_NS, 'Deactivation')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('Deactivation')
-            self._deactivation = Deactivation().parse_xml_node(c[0])
-        c = root.getElementsByTagNameNS(RTS_NS, 'Resetting')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('Resetting')
-            self._resetting = Resetting().parse_xml_node(c[0])
-        c = root.getElementsByTagNameNS(RTS_NS, 'Initializing')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('Initializing')
-            self._initializing = Initializing().parse_xml_node(c[0])
-        c = root.getElementsByTagNameNS(RTS_NS, 'Finalizing')
-        if c.length > 0:
-            if c.length > 1:
-                raise InvalidRtsProfileNodeError('Finalizing')
-            self._finalizing = Finalizing().parse_xml_node(c[0])
-        # Extended profile children
-        for c in root.getElementsByTagNameNS(RTS_EXT_NS, 'VersionUpLog'):
-            if c.nodeType == c.TEXT_NODE:
-                self._version_up_log.append(c.data)
-            else:
-                print('Warning: bad VersionUpLog node type.', file=sys.stderr)
-        for c in get_direct_child_elements_xml(root, prefix=RTS_EXT_NS,
-                                               local_name='Properties'):
-            name, value = parse_properties_xml(c)
-            self._properties[name] = value
 
-    def _parse_yaml(self, spec):
+    def _parse_xml_child(self, node, lazy=False):
+        # Parse one child node of the RtsProfile node. Used by both the DOM and
+        # the streaming parsers, so it must only look at the node itself.
+        if node.namespaceURI == RTS_NS:
+            name = node.localName
+            if name == 'Components':
+                self._components.append(Component().parse_xml_node(node,
+                                                                   lazy))
+            elif name == 'Groups':
+                self._groups.append(ComponentGroup().parse_xml_node(node))
+            elif name == 'DataPortConnectors':
+                self._data_port_connectors.append(
+                        DataPortConnector().parse_xml_node(node))
+            elif name == 'ServicePortConnectors':
+                self._service_port_connectors.append(
+                        ServicePortConnector().parse_xml_node(node))
+            # These children should have zero or one
+            elif name == 'StartUp':
+                self._startup = self._parse_xml_single(node, self._startup,
+                                                       StartUp)
+            elif name == 'ShutDown':
+                self._shutdown = self._parse_xml_single(node, self._shutdown,
+                                                        ShutDown)
+            elif name == 'Activation':
+                self._activation = self._parse_xml_single(node,
+                        self._activation, Activation)
+            elif name == 'Deactivation':
+                self._deactivation = self._parse_xml_single(node,
+                        self._deactivation, Deactivation)
+            elif name == 'Resetting':
+                self._resetting = self._parse_xml_single(node,
+                        self._resetting, Resetting)
+            elif name == 'Initializing':
+                self._initializing = self._parse_xml_single(node,
+                        self._initializing, Initialize)
+            elif name == 'Finalizing':
+                self._finalizing = self._parse_xml_single(node,
+                        self._finalizing, Finalize)
+        elif node.namespaceURI == RTS_EXT_NS:
+            # Extended profile children
+            if node.localName == 'VersionUpLog':
+                text = [c.data for c in node.childNodes \
+                        if c.nodeType == c.TEXT_NODE]
+                if text:
+                    self._version_up_log.append(''.join(text))
+                else:
+                    print('Warning: bad VersionUpLog node type.',
+                          file=sys.stderr)
+            elif node.localName == 'Properties':
+                name, value = parse_properties_xml(node)
+                self._properties[name] = value
+
+    def _parse_xml_single(self, node, current, cls):
+        # Parse a child node of which the RtsProfile may hold only one.
+        if current is not None:
+            raise InvalidRtsProfileNodeError(node.localName)
+        return self._adopt(cls().parse_xml_node(node))
+
+    def _parse_yaml(self, spec, lazy=False, rec=NULL_RECORDER):
+        rec.enter(ATTRIBUTES)
         self._reset()
         if not 'rtsProfile' in spec:
             raise RtsProfileError('Missing root node.')
         root = spec['rtsProfile']
-        # Get the attributes
-        self.id = root['id']
-        if 'abstract' in root:
-            self.abstract = root['abstract']
-        self.creation_date = '{year:04}-{month:02}-{day:02}T{hour:02}:\
-{minute:02}:{second:02}'.format(**root['creationDate'])
-        self.update_date = '{year:04}-{month:02}-{day:02}T{hour:02}:\
-{minute:02}:{second:02}'.format(**root['updateDate'])
-        self.version = str(root['version'])
-        if RTS_EXT_NS_YAML + 'comment' in root:
-            self.comment = root[RTS_EXT_NS_YAML + 'comment']
+        self._parse_yaml_attributes(root)
         # Parse the children
         if 'components' in root:
+            rec.enter(COMPONENTS, len(root['components']))
             for c in root['components']:
-                self._components.append(Component().parse_yaml(c))
+                self._components.append(Component().parse_yaml(c, lazy))
         if 'groups' in root:
+            rec.enter(GROUPS, len(root['groups']))
             for c in root['groups']:
                 self._groups.append(ComponentGroup().parse_yaml(c))
         if 'dataPortConnectors' in root:
+            rec.enter(CONNECTORS, len(root['dataPortConnectors']))
             for c in root['dataPortConnectors']:
                 self._data_port_connectors.append(DataPortConnector().parse_yaml(c))
         if 'servicePortConnectors' in root:
+            rec.enter(CONNECTORS, len(root['servicePortConnectors']))
             for c in root['servicePortConnectors']:
                 self._service_port_connectors.append(ServicePortConnector().parse_yaml(c))
         # Singular children
+        rec.enter(MESSAGE_SENDING, len([k for k in _MESSAGE_SENDING_KEYS
+                                        if k in root]))
         if 'startUp' in root:
-            self._startup = StartUp().parse_yaml(root['startUp'])
+            self._startup = self._adopt(StartUp().parse_yaml(
+                    root['startUp']))
         if 'shutDown' in root:
-            self._shutdown = ShutDown().parse_yaml(root['shutDown'])
+            self._shutdown = self._adopt(ShutDown().parse_yaml(
+                    root['shutDown']))
         if 'activation' in root:
-            self._activation = Activation().parse_yaml(root['activation'])
+            self._activation = self._adopt(Activation().parse_yaml(
+                    root['activation']))
         if 'deactivation' in root:
-            self._deactivation = Deactivation().parse_yaml(root['deactivation'])
+            self._deactivation = self._adopt(Deactivation().parse_yaml(
+                    root['deactivation']))
         if 'resetting' in root:
-            self._resetting = Resetting().parse_yaml(root['resetting'])
+            self._resetting = self._adopt(Resetting().parse_yaml(
+                    root['resetting']))
         if 'initializing' in root:
-            self._initializing = Initializing().parse_yaml(root['initializing'])
+            self._initializing = self._adopt(Initialize().parse_yaml(
+                    root['initializing']))
         if 'finalizing' in root:
-            self._finalizing = Finalizing().parse_yaml(root['finalizing'])
+            self._finalizing = self._adopt(Finalize().parse_yaml(
+                    root['finalizing']))
         # Extended profile children
-        if RTS_EXT_NS_YAML + 'versionUpLogs' in root:
-            for c in root[RTS_EXT_NS_YAML + 'versionUpLogs']:
-                self._version_up_log.append(c)
         if RTS_EXT_NS_YAML + 'properties' in root:
+            rec.enter(EXTENDED, len(root[RTS_EXT_NS_YAML + 'properties']))
             for p in root[RTS_EXT_NS_YAML + 'properties']:
                 if 'value' in p:
                     value = p['value']
@@ -906,9 +1573,38 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
                     value = None
                 self._properties[p['name']] = value
 
+    def _parse_yaml_attributes(self, root):
+        # Parse the attributes of the profile from the root of a YAML
+        # specification. Attributes missing from the specification are reset
+        # to their defaults.
+        self.id = root['id']
+        if 'abstract' in root:
+            self.abstract = root['abstract']
+        else:
+            self._abstract = None
+        self.creation_date = '{year:04}-{month:02}-{day:02}T{hour:02}:\
+{minute:02}:{second:02}'.format(**root['creationDate'])
+        self.update_date = '{year:04}-{month:02}-{day:02}T{hour:02}:\
+{minute:02}:{second:02}'.format(**root['updateDate'])
+        self.version = str(root['version'])
+        self.comment = root.get(RTS_EXT_NS_YAML + 'comment', '')
+        self._version_up_log = ModelList(
+                root.get(RTS_EXT_NS_YAML + 'versionUpLogs', []), self)
+
+    def _build_comp_index(self):
+        # Map the ID and instance name of each component to the position of
+        # the first component in the list with those values.
+        index = {}
+        for ii, comp in enumerate(self._components._read()):
+            index.setdefault((comp.id, comp.instance_name), ii)
+        self._comp_index = index
+        self._comp_index_sig = (id(self._components),
+                                self._components._revision)
+
     def _reset(self):
         # Clears all values in the class in preparation for parsing an
         # XML file.
+        self._changed()
         # Attributes
         self._id = ''
         self._abstract = None
@@ -916,10 +1612,14 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         self._update_date = datetime(MINYEAR, 1, 1)
         self._version = ''
         # Children
-        self._components = []
-        self._groups = []
-        self._data_port_connectors = []
-        self._service_port_connectors = []
+        self._components = ModelList(parent=self)
+        self._comp_index = None
+        self._comp_index_sig = None
+        self._groups = ModelList(parent=self)
+        self._data_port_connectors = ModelList(parent=self)
+        self._service_port_connectors = ModelList(parent=self)
+        self._conn_graph = None
+        self._conn_graph_sig = None
         self._startup = None
         self._shutdown = None
         self._activation = None
@@ -929,32 +1629,33 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         self._finalizing = None
         # Extended spec
         self._comment = ''
-        self._version_up_log = ''
-        self._properties = {}
+        self._version_up_log = ModelList(parent=self)
+        self._properties = ModelDict(parent=self)
+        self._fingerprint = None
+        self._string_table = None
 
-    def _to_dict(self):
+    def _to_dict(self, rec=NULL_RECORDER):
         # This converts an RTSProfile object into a dictionary. The typical use
         # for this is to then dump that dictionary as YAML.
         # We need to do this because the RtsProfile object hierarchy does not
         # correspond directly to the YAML object hierarchy.
-        prof = {'id': self.id,
-                'abstract': self.abstract,
-                'creationDate': date_to_dict(self.creation_date),
-                'updateDate': date_to_dict(self.update_date),
-                'version': self.version}
-        if self.comment:
-            prof[RTS_EXT_NS_YAML + 'comment'] = self.comment
+        rec.enter(ATTRIBUTES)
+        prof = self._attributes_to_dict()
 
+        rec.enter(COMPONENTS, len(self.components))
         components = []
         for c in self.components:
             components.append(c.to_dict())
         if components:
             prof['components'] = components
+        rec.enter(GROUPS, len(self.groups))
         groups = []
         for g in self.groups:
             groups.append(g.to_dict())
         if groups:
             prof['groups'] = groups
+        rec.enter(CONNECTORS, len(self.data_port_connectors) +
+                              len(self.service_port_connectors))
         d_connectors = []
         for c in self.data_port_connectors:
             d_connectors.append(c.to_dict())
@@ -966,6 +1667,8 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         if s_connectors:
             prof['servicePortConnectors'] = s_connectors
 
+        rec.enter(MESSAGE_SENDING, len([a for a in _MESSAGE_SENDING_ATTRS
+                                        if getattr(self, a)]))
         if self.startup:
             prof['startUp'] = self.startup.to_dict()
         if self.shutdown:
@@ -981,11 +1684,7 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
         if self.finalizing:
             prof['finalizing'] = self.finalizing.to_dict()
 
-        log = []
-        for l in self.version_up_log:
-            log.append(l)
-        if log:
-            prof[RTS_EXT_NS_YAML + 'versionUpLogs'] = log
+        rec.enter(EXTENDED, len(self.properties))
         props = []
         for name in self.properties:
             p = {'name': name}
@@ -997,7 +1696,33 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
 
         return {'rtsProfile': prof}
 
+    def _attributes_to_dict(self):
+        # Convert the attributes of the profile, without its children, into
+        # the dictionary form of the root node.
+        prof = {'id': self.id,
+                'abstract': self.abstract,
+                'creationDate': date_to_dict(self.creation_date),
+                'updateDate': date_to_dict(self.update_date),
+                'version': self.version}
+        if self.comment:
+            prof[RTS_EXT_NS_YAML + 'comment'] = self.comment
+        log = []
+        for l in self.version_up_log:
+            log.append(l)
+        if log:
+            prof[RTS_EXT_NS_YAML + 'versionUpLogs'] = log
+        return prof
+
     def _to_xml_dom(self):
+        doc = self._new_xml_doc()
+        for e in self._xml_child_elements(doc):
+            doc.documentElement.appendChild(e)
+        return doc
+
+    def _new_xml_doc(self):
+        # Create a document with an RtsProfile node holding this profile's
+        # attributes but none of its children.
+        import xml.dom.minidom
         impl = xml.dom.minidom.getDOMImplementation()
         doc = impl.createDocument(RTS_NS, RTS_NS_S + 'RtsProfile', None)
         doc.documentElement.setAttribute('xmlns:rts', RTS_NS)
@@ -1017,69 +1742,153 @@ Update date: {3}\nVersion: {4}\n'.format(self.id, self.abstract,
             doc.documentElement.setAttributeNS(RTS_EXT_NS,
                                                RTS_EXT_NS_S + 'comment',
                                                self.comment)
+        return doc
+
+    def _write_xml(self, stream, rec=NULL_RECORDER):
+        # Write the XML of this profile to a stream, one child at a time. Each
+        # piece is written out by minidom itself, with the arguments that
+        # toprettyxml passes down the tree, so the output is identical to
+        # that of toprettyxml.
+        import xml.dom.minidom
+        indent = '    '
+        newl = '\n'
+        rec.enter(ATTRIBUTES)
+        doc = self._new_xml_doc()
+        root = doc.documentElement
+        rec.enter(SERIALIZATION, 0)
+        # The XML declaration
+        header = StringIO()
+        xml.dom.minidom.getDOMImplementation().createDocument(None, None,
+                None).writexml(header, '', indent, newl)
+        stream.write(header.getvalue())
+        children = self._xml_child_elements(doc, rec)
+        first = None
+        for first in children:
+            break
+        rec.enter(SERIALIZATION, 0)
+        if first is None:
+            # No children, so the RtsProfile node is an empty element
+            root.writexml(stream, '', indent, newl)
+            return
+        # Write the RtsProfile node with no children to get its start tag
+        start = StringIO()
+        root.writexml(start, '', indent, newl)
+        start = start.getvalue()
+        stream.write(start[:start.rindex('/>')] + '>' + newl)
+        for e in chain([first], children):
+            rec.enter(SERIALIZATION)
+            chunk = StringIO()
+            e.writexml(chunk, indent, indent, newl)
+            stream.write(chunk.getvalue())
+            e.unlink()
+        stream.write('</{0}>{1}'.format(root.tagName, newl))
+
+    def _xml_child_elements(self, doc, rec=NULL_RECORDER):
+        # Generate the elements for the children of the RtsProfile node, in
+        # document order. The elements are created by doc but not added to
+        # it.
         for c in self.components:
+            rec.enter(COMPONENTS)
             new_comp_element = doc.createElementNS(RTS_NS,
                                                    RTS_NS_S + 'Components')
             c.save_xml(doc, new_comp_element)
-            doc.documentElement.appendChild(new_comp_element)
+            yield new_comp_element
         for g in self.groups:
+            rec.enter(GROUPS)
             new_group_element = doc.createElementNS(RTS_NS,
                                                     RTS_NS_S + 'Groups')
             g.save_xml(doc, new_group_element)
-            doc.documentElement.appendChild(new_group_element)
+            yield new_group_element
         for dc in self.data_port_connectors:
+            rec.enter(CONNECTORS)
             new_conn_element = doc.createElementNS(RTS_NS,
                     RTS_NS_S + 'DataPortConnectors')
             dc.save_xml(doc, new_conn_element)
-            doc.documentElement.appendChild(new_conn_element)
+            yield new_conn_element
         for sc in self.service_port_connectors:
+            rec.enter(CONNECTORS)
             new_conn_element = doc.createElementNS(RTS_NS,
                     RTS_NS_S + 'ServicePortConnectors')
             sc.save_xml(doc, new_conn_element)
-            doc.documentElement.appendChild(new_conn_element)
+            yield new_conn_element
         if self.startup:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'StartUp')
             self.startup.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         if self.shutdown:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'ShutDown')
             self.shutdown.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         if self.activation:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'Activation')
             self.activation.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         if self.deactivation:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'Deactivation')
             self.deactivation.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         if self.resetting:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'Resetting')
             self.resetting.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         if self.initializing:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'Initializing')
             self.initializing.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         if self.finalizing:
+            rec.enter(MESSAGE_SENDING)
             new_cond = doc.createElementNS(RTS_NS, RTS_NS_S + 'Finalizing')
             self.finalizing.save_xml(doc, new_cond)
-            doc.documentElement.appendChild(new_cond)
+            yield new_cond
         for vl in self.version_up_log:
+            rec.enter(EXTENDED)
             new_vl_element = doc.createElementNS(RTS_EXT_NS,
                                                  RTS_EXT_NS_S + 'VersionUpLog')
             new_text_node = doc.createTextNode(vl)
             new_vl_element.appendChild(new_text_node)
-            doc.documentElement.appendChild(new_vl_element)
+            yield new_vl_element
         for p in self.properties:
+            rec.enter(EXTENDED)
             new_prop_element = doc.createElementNS(RTS_EXT_NS,
                                                    RTS_EXT_NS_S + 'Properties')
             properties_to_xml(new_prop_element, p, self.properties[p])
-            doc.documentElement.appendChild(new_prop_element)
-        return doc
+            yield new_prop_element
+
 
-    def _to_yaml(self):
-        return yaml.safe_dump(self._to_dict())
+##############################################################################
+## Private values
+
+# The phase in which each child of the RtsProfile node is parsed
+_XML_CHILD_PHASES = {'Components': COMPONENTS,
+                     'Groups': GROUPS,
+                     'DataPortConnectors': CONNECTORS,
+                     'ServicePortConnectors': CONNECTORS,
+                     'StartUp': MESSAGE_SENDING,
+                     'ShutDown': MESSAGE_SENDING,
+                     'Activation': MESSAGE_SENDING,
+                     'Deactivation': MESSAGE_SENDING,
+                     'Resetting': MESSAGE_SENDING,
+                     'Initializing': MESSAGE_SENDING,
+                     'Finalizing': MESSAGE_SENDING}
+
+# The message sending children, by their names in the dictionary form and
+# the names of the properties that hold them
+_MESSAGE_SENDING_KEYS = ('startUp', 'shutDown', 'activation', 'deactivation',
+                         'resetting', 'initializing', 'finalizing')
+_MESSAGE_SENDING_ATTRS = ('startup', 'shutdown', 'activation',
+                          'deactivation', 'resetting', 'initializing',
+                          'finalizing')
+# The attributes of a profile that its clones borrow
+_SHARED_ATTRS = ('_components', '_groups', '_data_port_connectors',
+                 '_service_port_connectors', '_version_up_log',
+                 '_properties') + \
+        tuple(['_' + attr for attr in _MESSAGE_SENDING_ATTRS])
 
 
 # vim: tw=79
@@ -0,0 +1,314 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: snapshot_cache.py
+
+On-disk cache of parsed RtsProfile objects, stored as binary snapshots.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import time
+
+from rtsprofile import RTSPROFILE_VERSION
+from rtsprofile.rts_profile import RtsProfile
+from rtsprofile.utils import trusted_load
+
+
+##############################################################################
+## Snapshot format
+
+# Bump this when the layout of the snapshot files changes.
+SNAPSHOT_FORMAT_VERSION = 1
+
+SNAPSHOT_SUFFIX = '.snap'
+
+# The header identifies the snapshot format and everything the validity of the
+# marshalled data depends on: the marshal format and Python version that wrote
+# it, and the version of the library whose _to_dict() tree it contains.
+# Snapshots with a different header are ignored and rewritten.
+SNAPSHOT_HEADER = 'RTSPSNAP {0} {1} {2}.{3} {4}\n'.format(
+        SNAPSHOT_FORMAT_VERSION, marshal.version, sys.version_info[0],
+        sys.version_info[1], RTSPROFILE_VERSION).encode('ascii')
+
+
+##############################################################################
+## SnapshotCache object
+
+class SnapshotCache(object):
+    '''Loads RtsProfile objects from XML and YAML files through a cache of
+    binary snapshots.
+
+    The first time a file is loaded it is parsed as normal, and the
+    dictionary tree of the resulting profile (the same tree that is written
+    out as YAML) is saved in the cache directory as a marshal snapshot, named
+    by the hash of the file's content. Later loads of a file with the same
+    content rebuild the profile from the snapshot without parsing the file.
+    Changing the file changes its hash, so the stale snapshot is not used.
+
+    The total size of the snapshots is kept below max_bytes by removing the
+    least-recently-used snapshots each time a new one is written.
+
+    Example:
+    >>> import shutil
+    >>> d = tempfile.mkdtemp()
+    >>> cache = SnapshotCache(d)
+    >>> s = cache.load('test/rtsystem.xml')
+    >>> cache.hits, cache.misses
+    (0, 1)
+    >>> s2 = cache.load('test/rtsystem.xml')
+    >>> cache.hits, cache.misses
+    (1, 1)
+    >>> str(s) == str(s2)
+    True
+    >>> s2.save_to_xml() == s.save_to_xml()
+    True
+    >>> len(cache.snapshots())
+    1
+
+    A snapshot that cannot be rebuilt is replaced:
+    >>> f = open(cache.snapshots()[0], 'wb')
+    >>> f.write(SNAPSHOT_HEADER + marshal.dumps({'components': 1}))
+    >>> f.close()
+    >>> cache.load('test/rtsystem.xml').save_to_xml() == s.save_to_xml()
+    True
+    >>> cache.hits, cache.misses
+    (1, 2)
+    >>> cache.load('test/rtsystem.xml') and (cache.hits, cache.misses)
+    (2, 2)
+    >>> cache.clear()
+    >>> cache.snapshots()
+    []
+    >>> shutil.rmtree(d)
+    '''
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        '''Constructor.
+
+        @param cache_dir The directory to store snapshots in. It is created if
+        it does not exist.
+        @type cache_dir str
+        @param max_bytes The maximum total size of the snapshots in the cache
+        directory.
+        @type max_bytes int
+
+        '''
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @property
+    def cache_dir(self):
+        '''The directory the snapshots are stored in.'''
+        return self._cache_dir
+
+    @property
+    def max_bytes(self):
+        '''The maximum total size of the snapshots in the cache directory.'''
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        self._max_bytes = max_bytes
+        self.evict()
+
+    @property
+    def hits(self):
+        '''The number of loads that were served from a snapshot.'''
+        return self._hits
+
+    @property
+    def misses(self):
+        '''The number of loads that required the file to be parsed.'''
+        return self._misses
+
+    def load(self, path, format=None):
+        '''Load an RtsProfile from a file, using a snapshot if one exists for
+        the file's current content.
+
+        @param path The path of the XML or YAML file to load.
+        @param format 'xml' or 'yaml'. If None, files with a .yaml or .yml
+        extension are loaded as YAML and all others as XML.
+        @return An RtsProfile object.
+
+        '''
+        if format is None:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                format = 'yaml'
+            else:
+                format = 'xml'
+        f = open(path, 'rb')
+        try:
+            content = f.read()
+        finally:
+            f.close()
+        key = hashlib.sha1(content).hexdigest()
+        prof = self._load_snapshot(key)
+        if prof is not None:
+            self._hits += 1
+            return prof
+        self._misses += 1
+        if format == 'yaml':
+            prof = RtsProfile(yaml_spec=content)
+        else:
+            prof = RtsProfile(xml_spec=content)
+        self._save_snapshot(key, prof)
+        return prof
+
+    def snapshots(self):
+        '''The paths of the snapshots in the cache, from least- to
+        most-recently used.
+
+        '''
+        return [p for p, mtime, size in self._list()]
+
+    def evict(self):
+        '''Remove least-recently-used snapshots until the total size of the
+        cache is no more than max_bytes.
+
+        Example:
+        >>> import shutil
+        >>> d = tempfile.mkdtemp()
+        >>> cache = SnapshotCache(d)
+        >>> s = cache.load('test/rtsystem.xml')
+        >>> s = cache.load('test/rtsystem.yaml')
+        >>> len(cache.snapshots())
+        2
+        >>> s = cache.load('test/rtsystem.xml')
+        >>> cache.max_bytes = os.path.getsize(cache.snapshots()[-1])
+        >>> [os.path.getsize(p) for p in cache.snapshots()] == \\
+        ...     [cache.max_bytes]
+        True
+        >>> cache.load('test/rtsystem.xml') and cache.hits
+        2
+        >>> shutil.rmtree(d)
+        '''
+        entries = self._list()
+        total = sum([size for p, mtime, size in entries])
+        for p, mtime, size in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                # Removed by another process sharing the cache
+                pass
+            total -= size
+
+    def clear(self):
+        '''Remove all snapshots from the cache.'''
+        for p in self.snapshots():
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    ###########################################################################
+    # Internal functions
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key + SNAPSHOT_SUFFIX)
+
+    def _list(self):
+        # Get (path, mtime, size) of each snapshot, oldest first
+        result = []
+        for name in os.listdir(self._cache_dir):
+            if not name.endswith(SNAPSHOT_SUFFIX):
+                continue
+            p = os.path.join(self._cache_dir, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            result.append((p, st.st_mtime, st.st_size))
+        result.sort(key=lambda e: e[1])
+        return result
+
+    def _load_snapshot(self, key):
+        p = self._path(key)
+        try:
+            f = open(p, 'rb')
+        except IOError:
+            return None
+        try:
+            header = f.readline()
+            if header != SNAPSHOT_HEADER:
+                return None
+            try:
+                tree = marshal.load(f)
+            except (EOFError, ValueError, TypeError):
+                # Truncated or corrupt snapshot; it will be rewritten
+                return None
+        finally:
+            f.close()
+        prof = RtsProfile()
+        try:
+            # The tree was validated when the snapshot was made
+            with trusted_load():
+                prof._parse_yaml(tree)
+        except Exception:
+            # A tree that cannot be rebuilt, e.g. from a corrupt snapshot, is
+            # treated as a missing snapshot; it will be rewritten
+            return None
+        try:
+            # Mark the snapshot as recently used. The time is given explicitly
+            # because file systems may stamp files with a coarser clock.
+            now = time.time()
+            os.utime(p, (now, now))
+        except OSError:
+            pass
+        return prof
+
+    def _save_snapshot(self, key, prof):
+        # Write to a temporary file and rename it into place, so that other
+        # processes sharing the cache never see a partial snapshot. Failure to
+        # write the snapshot does not prevent the profile being loaded.
+        try:
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self._cache_dir)
+        except (IOError, OSError):
+            return
+        try:
+            f = os.fdopen(fd, 'wb')
+            try:
+                f.write(SNAPSHOT_HEADER)
+                marshal.dump(prof._to_dict(), f)
+            finally:
+                f.close()
+            if sys.platform == 'win32' and os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+            os.rename(tmp, self._path(key))
+        except (IOError, OSError, ValueError):
+            # ValueError is raised by marshal for values it cannot write
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+
+# vim: tw=79
+
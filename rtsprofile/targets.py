@@ -26,15 +26,17 @@ __version__ = '$Revision: $'
 
 from rtsprofile import RTS_NS, RTS_NS_S, RTS_EXT_NS, RTS_EXT_NS_S, \
                        RTS_EXT_NS_YAML, XSI_NS, XSI_NS_S
+from rtsprofile.tracking import ModelDict, ModelObject
 from rtsprofile.utils import get_direct_child_elements_xml, \
-                             parse_properties_xml, properties_to_xml, \
-                             validate_attribute, string_types
+                             intern_string, parse_properties_xml, \
+                             properties_to_xml, validate_attribute, \
+                             string_types
 
 
 ##############################################################################
 ## TargetComponent object
 
-class TargetComponent(object):
+class TargetComponent(ModelObject):
     '''Stores enough information to uniquely identify a component in the RT
     system. Used to specify target components, for example the components
     participating in a group or running in an execution context, or the
@@ -42,6 +44,8 @@ class TargetComponent(object):
 
     '''
 
+    __slots__ = ('_component_id', '_instance_name', '_properties')
+
     def __init__(self, component_id='', instance_name=''):
         '''Constructor.
 
@@ -57,7 +61,7 @@ class TargetComponent(object):
         validate_attribute(instance_name, 'target_component.instanceName',
                            expected_type=string_types(), required=False)
         self._instance_name = instance_name
-        self._properties = {}
+        self._properties = ModelDict(parent=self)
 
     def __str__(self):
         result = 'Component ID: {0}\nInstance name: {1}\n'.format(\
@@ -82,6 +86,7 @@ class TargetComponent(object):
     def component_id(self, component_id):
         validate_attribute(component_id, 'target_component.componentID',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._component_id = component_id
 
     @property
@@ -98,6 +103,7 @@ class TargetComponent(object):
     def instance_name(self, instance_name):
         validate_attribute(instance_name, 'target_component.instanceName',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._instance_name = instance_name
 
     @property
@@ -115,27 +121,36 @@ class TargetComponent(object):
     def properties(self, properties):
         validate_attribute(properties, 'target_component.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a target component into
         this object.
 
         '''
-        self.component_id = node.getAttributeNS(RTS_NS, 'componentId')
-        self.instance_name = node.getAttributeNS(RTS_NS, 'instanceName')
-        for c in node.getElementsByTagNameNS(RTS_EXT_NS, 'Properties'):
+        self.component_id = intern_string(node.getAttributeNS(RTS_NS,
+                                                              'componentId'))
+        self.instance_name = intern_string(node.getAttributeNS(RTS_NS,
+                                                               'instanceName'))
+        for c in get_direct_child_elements_xml(node, prefix=RTS_EXT_NS,
+                                               local_name='Properties'):
             name, value = parse_properties_xml(c)
             self._properties[name] = value
         return self
 
+    @classmethod
+    def from_dict(cls, d):
+        '''Create a new target component from a dictionary.'''
+        return cls().parse_yaml(d)
+
     def parse_yaml(self, y):
         '''Parse a YAML specification of a target component into this
         object.
 
         '''
-        self.component_id = y['componentId']
-        self.instance_name = y['instanceName']
+        self.component_id = intern_string(y['componentId'])
+        self.instance_name = intern_string(y['instanceName'])
         if RTS_EXT_NS_YAML + 'properties' in y:
             for p in y.get(RTS_EXT_NS_YAML + 'properties'):
                 if 'value' in p:
@@ -181,6 +196,8 @@ class TargetPort(TargetComponent):
 
     '''
 
+    __slots__ = ('_port_name',)
+
     def __init__(self, component_id='', instance_name='', port_name=''):
         '''Constructor. See also the @ref TargetComponent constructor.
 
@@ -206,6 +223,7 @@ class TargetPort(TargetComponent):
     def port_name(self, port_name):
         validate_attribute(port_name, 'target_port.portName',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._port_name = port_name
 
     def parse_xml_node(self, node):
@@ -214,13 +232,13 @@ class TargetPort(TargetComponent):
 
         '''
         super(TargetPort, self).parse_xml_node(node)
-        self.port_name = node.getAttributeNS(RTS_NS, 'portName')
+        self.port_name = intern_string(node.getAttributeNS(RTS_NS, 'portName'))
         return self
 
     def parse_yaml(self, y):
         '''Parse a YAML specification of a target port into this object.'''
         super(TargetPort, self).parse_yaml(y)
-        self.port_name = y['portName']
+        self.port_name = intern_string(y['portName'])
         return self
 
     def save_xml(self, doc, element):
@@ -249,6 +267,8 @@ class TargetExecutionContext(TargetComponent):
 
     '''
 
+    __slots__ = ('_id',)
+
     def __init__(self, component_id='', instance_name='', id=''):
         '''Constructor. See also the @ref TargetComponent constructor.
 
@@ -261,7 +281,7 @@ class TargetExecutionContext(TargetComponent):
         validate_attribute(id, 'target_executioncontext.id',
                            expected_type=string_types(), required=False)
         self._id = id
-        self._properties = {}
+        self._properties = ModelDict(parent=self)
 
     def __str__(self):
         result = TargetComponent.__str__(self) + '\nID: {0}\n'.format(self.id)
@@ -280,6 +300,7 @@ class TargetExecutionContext(TargetComponent):
     def id(self, id):
         validate_attribute(id, 'target_executioncontext.id',
                            expected_type=string_types(), required=True)
+        self._changed()
         self._id = id
 
     @property
@@ -298,7 +319,8 @@ class TargetExecutionContext(TargetComponent):
         validate_attribute(properties,
                            'target_executioncontext.ext.Properties',
                            expected_type=dict, required=False)
-        self._properties = properties
+        self._changed()
+        self._properties = ModelDict(properties, self)
 
     def parse_xml_node(self, node):
         '''Parse an xml.dom Node object representing a target execution context
@@ -307,7 +329,7 @@ class TargetExecutionContext(TargetComponent):
         '''
         super(TargetExecutionContext, self).parse_xml_node(node)
         if node.hasAttributeNS(RTS_NS, 'id'):
-            self.id = node.getAttributeNS(RTS_NS, 'id')
+            self.id = intern_string(node.getAttributeNS(RTS_NS, 'id'))
         else:
             self.id = ''
         return self
@@ -319,7 +341,7 @@ class TargetExecutionContext(TargetComponent):
         '''
         super(TargetExecutionContext, self).parse_yaml(y)
         if 'id' in y:
-            self.id = y['id']
+            self.id = intern_string(y['id'])
         else:
             self.id = ''
         return self
@@ -0,0 +1,648 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: tracking.py
+
+Tracking of changes made to the objects of the model.
+
+Every object of the model, and every list and dictionary holding its
+children, has a revision number and weak references to the objects and
+lists holding it. A change to an object, whether through a setter or by
+adding an item to, removing one from or reordering one of its lists,
+increases the revision of that object and of every object above it, up to
+the profiles holding it. Values computed from an object, such as its
+fingerprint, are kept with its revision and are computed again only when
+the revision has changed, so after a change only the objects on the paths
+from the changed object to the profiles are computed again.
+
+An object can be held in several places, for example when the same
+component is added to two profiles. A change to it is counted in all of
+them.
+
+Lists and dictionaries given to the setters of the model are copied into a
+ModelList or ModelDict, so changes made afterwards to the list given are not
+seen by the model. Change the list returned by the getter instead.
+
+A profile can also borrow lists, dictionaries and objects from another, as
+RtsProfile.clone does, holding them without copying them. Changes are then
+kept apart by copying borrowed values only when needed:
+
+- Before a borrowed value is changed, each list or profile borrowing it is
+  given a copy of it as it was. The profile it was borrowed from keeps the
+  value, and changes it in place.
+- A borrowed value is replaced with a copy the first time it is got from
+  the list or profile borrowing it, so a value got from a clone always
+  belongs to the clone. An object cannot tell which profile a change was
+  made through, so this is the only way that changes made through the clone
+  are kept out of the original.
+
+The copy of an object holds copies of its own children, such as its
+location, but its lists are new lists borrowing the same items, so copying
+an object does not copy everything below it.
+
+'''
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import copy
+try:
+    import copy_reg as copyreg
+except ImportError:
+    import copyreg
+import weakref
+
+
+##############################################################################
+## Private functions
+
+# The lists and profiles that borrow values, by their IDs
+_borrowing = {}
+
+
+def _holders(obj):
+    # The objects, lists and dictionaries holding an object that are still
+    # alive
+    held = obj._parent
+    if held is None:
+        return []
+    if type(held) is not tuple:
+        held = (held,)
+    return [h for h in [ref() for ref in held] if h is not None]
+
+
+def _set_holders(obj, holders):
+    # Set the objects, lists and dictionaries holding an object
+    if not holders:
+        obj._parent = None
+    elif len(holders) == 1:
+        obj._parent = weakref.ref(holders[0])
+    else:
+        obj._parent = tuple([weakref.ref(h) for h in holders])
+
+
+def _count_change(obj):
+    # Count a change about to be made to an object, increasing its revision
+    # and the revisions of the objects holding it. Lists and profiles
+    # borrowing the object, or an object holding it, are first given copies
+    # of them as they are.
+    if _borrowing:
+        _copy_for_borrowers(obj)
+    while True:
+        obj._revision += 1
+        held = obj._parent
+        if held is None:
+            return
+        if type(held) is tuple:
+            # Held in several places
+            for holder in _holders(obj):
+                _count_change(holder)
+            return
+        obj = held()
+        if obj is None:
+            return
+
+
+def _copy_for_borrowers(obj):
+    # Give a copy of an object to each list or profile borrowing it, after
+    # doing the same for the objects holding it. Copying a holder for its
+    # borrowers can make new lists borrowing the object, so the borrowers
+    # are looked for until there are none.
+    for holder in _holders(obj):
+        if not _borrows(holder, obj):
+            _copy_for_borrowers(holder)
+    while True:
+        borrowers = [h for h in _holders(obj) if _borrows(h, obj)]
+        if not borrowers:
+            return
+        for holder in borrowers:
+            _own(holder, obj)
+
+
+def _borrows(holder, obj):
+    # Check if a list or profile borrows an object rather than owning it.
+    # Borrowed values are kept alive by the holder, so their IDs are not
+    # reused.
+    borrowed = holder._borrowed
+    return bool(borrowed) and id(obj) in borrowed
+
+
+def _borrow(holder, value):
+    # Make a list or profile hold a value that it borrows
+    if isinstance(value, _TRACKED):
+        holder._borrowed[id(value)] = value
+        _adopt(holder, value)
+        key = id(holder)
+        if key not in _borrowing:
+            # Forgotten when the holder is deleted
+            _borrowing[key] = weakref.ref(
+                    holder, lambda ref: _borrowing.pop(key, None))
+
+
+def _own(holder, value):
+    # Replace a value borrowed by a list or profile with a copy that belongs
+    # to it, wherever the holder holds the value. The copy is not a change to
+    # the holder, but other lists and profiles borrowing the holder are given
+    # copies of it as it was.
+    new = _copy(value)
+    if _borrowing:
+        _copy_for_borrowers(holder)
+    if isinstance(holder, list):
+        for ii, item in enumerate(holder._read()):
+            if item is value:
+                list.__setitem__(holder, ii, new)
+    else:
+        for name, item in list(holder.__dict__.items()):
+            if item is value:
+                holder.__dict__[name] = new
+    _release(holder, value)
+    _adopt(holder, new)
+    return new
+
+
+def _copy(value):
+    # Copy a list, dictionary or object of the model for a list or profile
+    # that borrowed it. A copy of a list borrows the items of the list; a
+    # copy of an object holds copies of the object's children.
+    if isinstance(value, ModelList):
+        new = _BorrowingList()
+        list.extend(new, value._read())
+        for item in new._read():
+            _borrow(new, item)
+    elif isinstance(value, ModelDict):
+        new = ModelDict(value)
+    else:
+        new = type(value).__new__(type(value))
+        for name, child in _state(value).items():
+            if isinstance(child, _TRACKED):
+                child = _adopt(new, _copy(child))
+            setattr(new, name, child)
+    new._revision = value._revision
+    return new
+
+
+def _adopt(parent, child):
+    # Make an object, list or dictionary of the model a child of a list or
+    # object, so that its changes are counted in the parent. Other values are
+    # left as they are.
+    if not isinstance(child, _TRACKED):
+        return child
+    held = child._parent
+    if held is None:
+        child._parent = weakref.ref(parent)
+    elif type(held) is weakref.ref and held() is parent:
+        pass
+    else:
+        holders = _holders(child)
+        for holder in holders:
+            if holder is parent:
+                return child
+        _set_holders(child, holders + [parent])
+    return child
+
+
+def _release(parent, child):
+    # Stop counting the changes of an object in a list or object that no
+    # longer holds it
+    if isinstance(child, _TRACKED):
+        _set_holders(child, [h for h in _holders(child) if h is not parent])
+        if parent._borrowed and \
+                parent._borrowed.pop(id(child), None) is not None and \
+                not parent._borrowed:
+            # Nothing is borrowed any more
+            _borrowing.pop(id(parent), None)
+
+
+def _release_items(parent, items):
+    # Release the items removed from a list that it no longer holds
+    for item in items:
+        if isinstance(item, _TRACKED) and item not in parent:
+            _release(parent, item)
+
+
+def _state(obj):
+    # The attributes of a model object, other than the references to the
+    # objects holding it and to the values it borrows
+    state = dict(getattr(obj, '__dict__', ()))
+    state.pop('_borrowed', None)
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name not in ('_parent', '__weakref__') and hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    return state
+
+
+##############################################################################
+## ModelObject object
+
+class ModelObject(object):
+    '''Base of the objects of the model, which counts the changes made to
+    them.
+
+    Example:
+    >>> from rtsprofile.component import Component
+    >>> c = Component()
+    >>> c.location.x = 5
+    >>> c.revision > 0 and c.location.revision > 0
+    True
+    >>> before = c.revision
+    >>> c.location.y = 5
+    >>> c.revision == before + 1
+    True
+
+    A change to an object held in several places is counted in all of them:
+    >>> other = Component()
+    >>> other.location = c.location
+    >>> before, other_before = c.revision, other.revision
+    >>> c.location.x = 6
+    >>> c.revision > before and other.revision > other_before
+    True
+    '''
+
+    __slots__ = ('_parent', '_revision', '__weakref__')
+
+    # The values borrowed by this object, by their IDs. Only profiles made by
+    # RtsProfile.clone borrow values.
+    _borrowed = None
+
+    def __new__(cls, *args, **kwargs):
+        # The tracking values are set here rather than in the constructors,
+        # so they are also set for objects made by copy and pickle
+        obj = super(ModelObject, cls).__new__(cls)
+        obj._parent = None
+        obj._revision = 0
+        return obj
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles do not keep the references to the objects
+        # holding this one, which are set again as the objects holding the
+        # copy are made
+        return (copyreg.__newobj__, (type(self),), _state(self))
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+            _adopt(self, value)
+
+    @property
+    def revision(self):
+        '''The number of changes made to this object and its children.
+
+        It increases whenever an attribute of this object or of any object
+        below it is set, or an item is added to, removed from or moved within
+        one of their lists or dictionaries.
+
+        '''
+        return self._revision
+
+    # Count a change to this object
+    _changed = _count_change
+
+    # Make a value a child of this object
+    _adopt = _adopt
+
+    # Make this object hold a value that it borrows
+    _borrow = _borrow
+
+    def _owned(self, value):
+        # Get a child of this object, first replacing it with a copy that
+        # belongs to this object if it is borrowed
+        if self._borrowed and id(value) in self._borrowed:
+            return _own(self, value)
+        return value
+
+
+##############################################################################
+## ModelList object
+
+class ModelList(list):
+    '''A list of values of the model, which counts the changes made to it in
+    the object holding it.
+
+    Items that are objects of the model become children of the list.
+
+    Example:
+    >>> from rtsprofile.component import Component
+    >>> from rtsprofile.ports import DataPort
+    >>> c = Component()
+    >>> before = c.revision
+    >>> c.data_ports.append(DataPort(name='in'))
+    >>> c.revision > before
+    True
+    >>> before = c.revision
+    >>> c.data_ports[0].name = 'out'
+    >>> c.revision > before
+    True
+    >>> p = c.data_ports.pop()
+    >>> before = c.revision
+    >>> p.name = 'in'
+    >>> c.revision == before
+    True
+    '''
+
+    __slots__ = ('_parent', '_revision', '__weakref__')
+
+    _borrowed = None
+
+    def __new__(cls, *args, **kwargs):
+        obj = super(ModelList, cls).__new__(cls)
+        obj._parent = None
+        obj._revision = 0
+        return obj
+
+    def __init__(self, items=(), parent=None):
+        '''Constructor.
+
+        @param items The items of the list.
+        @param parent The object holding the list.
+
+        '''
+        super(ModelList, self).__init__(items)
+        if parent is not None:
+            self._parent = weakref.ref(parent)
+        for item in self._read():
+            _adopt(self, item)
+
+    def __reduce__(self):
+        # Pickled as a new list holding the same items
+        return (ModelList, (list(self),))
+
+    def __copy__(self):
+        # A copy is a new list holding the same items, which are then held
+        # by both lists
+        return ModelList(self)
+
+    def __deepcopy__(self, memo):
+        new = ModelList()
+        memo[id(self)] = new
+        new._revision = self._revision
+        list.extend(new, [copy.deepcopy(item, memo)
+                               for item in self._read()])
+        for item in new:
+            _adopt(new, item)
+        return new
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = list(value)
+            old = list.__getitem__(self, key)
+        else:
+            old = [list.__getitem__(self, key)]
+        self._changed()
+        list.__setitem__(self, key, value)
+        if isinstance(key, slice):
+            for item in value:
+                _adopt(self, item)
+        else:
+            _adopt(self, value)
+        _release_items(self, old)
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            old = list.__getitem__(self, key)
+        else:
+            old = [list.__getitem__(self, key)]
+        self._changed()
+        list.__delitem__(self, key)
+        _release_items(self, old)
+
+    # Python 2 passes simple slices to these methods
+    def __setslice__(self, i, j, value):
+        self.__setitem__(slice(max(i, 0), max(j, 0)), value)
+
+    def __delslice__(self, i, j):
+        self.__delitem__(slice(max(i, 0), max(j, 0)))
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __imul__(self, n):
+        if n <= 0:
+            del self[:]
+        else:
+            self._changed()
+            list.__imul__(self, n)
+        return self
+
+    @property
+    def revision(self):
+        '''The number of changes made to this list and its items.'''
+        return self._revision
+
+    def append(self, item):
+        self._changed()
+        list.append(self, _adopt(self, item))
+
+    def extend(self, items):
+        items = list(items)
+        self._changed()
+        for item in items:
+            _adopt(self, item)
+        list.extend(self, items)
+
+    def insert(self, index, item):
+        self._changed()
+        list.insert(self, index, _adopt(self, item))
+
+    def pop(self, index=-1):
+        self._changed()
+        item = list.pop(self, index)
+        _release_items(self, [item])
+        return item
+
+    def remove(self, item):
+        del self[self.index(item)]
+
+    def clear(self):
+        del self[:]
+
+    def reverse(self):
+        self._changed()
+        list.reverse(self)
+
+    def sort(self, *args, **kwargs):
+        self._changed()
+        list.sort(self, *args, **kwargs)
+
+    # Count a change to this list
+    _changed = _count_change
+
+    # Iterate over the items without copying those that are borrowed, to
+    # read them only
+    _read = list.__iter__
+
+
+##############################################################################
+## Borrowing lists
+
+class _BorrowingList(ModelList):
+    # A list made by copying a list that was borrowed, which borrows the
+    # items of that list in turn. Each borrowed item is replaced with a copy
+    # the first time it is got from the list, by index, slice, iteration or
+    # pop. Pickles and copies of the list are plain ModelLists.
+
+    __slots__ = ('_borrowed',)
+
+    def __init__(self, items=(), parent=None):
+        self._borrowed = {}
+        super(_BorrowingList, self).__init__(items, parent)
+
+    def __reduce__(self):
+        return (ModelList, (list(self._read()),))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[ii] for ii in range(*key.indices(len(self)))]
+        item = list.__getitem__(self, key)
+        if self._borrowed and id(item) in self._borrowed:
+            item = _own(self, item)
+        return item
+
+    # Python 2 passes simple slices to this method
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(max(i, 0), max(j, 0)))
+
+    def __iter__(self):
+        ii = 0
+        while ii < len(self):
+            yield self[ii]
+            ii += 1
+
+    def __reversed__(self):
+        ii = len(self) - 1
+        while ii >= 0:
+            if ii < len(self):
+                yield self[ii]
+            ii -= 1
+
+    def __add__(self, items):
+        return self[:] + items
+
+    def __mul__(self, n):
+        return self[:] * n
+
+    __rmul__ = __mul__
+
+    def copy(self):
+        return self[:]
+
+    def pop(self, index=-1):
+        # The item is got first so that a borrowed item is copied
+        self[index]
+        return super(_BorrowingList, self).pop(index)
+
+
+##############################################################################
+## ModelDict object
+
+class ModelDict(dict):
+    '''A dictionary of values of the model, such as properties, which counts
+    the changes made to it in the object holding it.
+
+    Example:
+    >>> from rtsprofile.ports import DataPort
+    >>> p = DataPort()
+    >>> before = p.revision
+    >>> p.properties['key'] = 'value'
+    >>> p.revision > before
+    True
+    '''
+
+    __slots__ = ('_parent', '_revision', '__weakref__')
+
+    _borrowed = None
+
+    def __new__(cls, *args, **kwargs):
+        obj = super(ModelDict, cls).__new__(cls)
+        obj._parent = None
+        obj._revision = 0
+        return obj
+
+    def __init__(self, items=(), parent=None):
+        '''Constructor.
+
+        @param items The items of the dictionary, as a dictionary or a
+        sequence of key and value pairs.
+        @param parent The object holding the dictionary.
+
+        '''
+        super(ModelDict, self).__init__(items)
+        if parent is not None:
+            self._parent = weakref.ref(parent)
+
+    def __reduce__(self):
+        return (ModelDict, (dict(self),))
+
+    def __copy__(self):
+        return ModelDict(self)
+
+    def __deepcopy__(self, memo):
+        new = ModelDict()
+        memo[id(self)] = new
+        new._revision = self._revision
+        for key, value in self.items():
+            dict.__setitem__(new, copy.deepcopy(key, memo),
+                             copy.deepcopy(value, memo))
+        return new
+
+    def __setitem__(self, key, value):
+        self._changed()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._changed()
+        dict.__delitem__(self, key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    @property
+    def revision(self):
+        '''The number of changes made to this dictionary.'''
+        return self._revision
+
+    def clear(self):
+        self._changed()
+        dict.clear(self)
+
+    def pop(self, *args):
+        self._changed()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._changed()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._changed()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        self._changed()
+        dict.update(self, *args, **kwargs)
+
+    # Count a change to this dictionary
+    _changed = _count_change
+
+
+# The types whose changes are tracked
+_TRACKED = (ModelObject, ModelList, ModelDict)
+
+
+# vim: tw=79
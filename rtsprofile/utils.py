@@ -23,9 +23,10 @@ __version__ = '$Revision: $'
 # $Source$
 
 
-import new
+from contextlib import contextmanager
 import re
 import sys
+import threading
 import time
 
 from rtsprofile import RTS_EXT_NS, RTS_EXT_NS_S
@@ -36,10 +37,12 @@ from rtsprofile.exceptions import InvalidTypeError, RequiredAttributeError
 ## Public API functions
 
 def string_types():
-    if sys.version_info[0] == 3:
-        return [str]
-    else:
-        return [str, unicode]
+    '''Returns the list of types that are strings in this version of Python.
+
+    The same list is returned on each call; it must not be modified.
+
+    '''
+    return _string_types
 
 def date_to_dict(date):
     date = date.split('T')
@@ -55,18 +58,26 @@ def date_to_dict(date):
             'minute': min, 'second': sec}
 
 def get_direct_child_elements_xml(node, prefix=None, local_name=None):
+    '''Iterate over the child elements of a node.
+
+    Only the direct children of the node are visited, so unlike
+    getElementsByTagNameNS the cost does not depend on the size of the subtree
+    below the children, and elements with the same name nested deeper in the
+    tree are never returned.
+
+    @param node The xml.dom Node to get the child elements of.
+    @param prefix If not None, only return children in this namespace URI.
+    @param local_name If not None, only return children with this local name.
+
+    '''
     for c in node.childNodes:
-        matches = False
-        if prefix:
-            if c.prefix == prefix:
-                matches = True
-        if local_name:
-            if c.localName == local_name:
-                matches = True
-            else:
-                matches = False
-        if matches:
-            yield c
+        if c.nodeType != c.ELEMENT_NODE:
+            continue
+        if prefix and c.namespaceURI != prefix:
+            continue
+        if local_name and c.localName != local_name:
+            continue
+        yield c
 
 
 def indent_string(string, num_spaces=2):
@@ -96,6 +107,146 @@ def properties_to_xml(element, name, value=None):
         element.setAttributeNS(RTS_EXT_NS, RTS_EXT_NS_S + 'value', value)
 
 
+def trusted_load(trusted=True):
+    '''Context manager that turns off attribute validation in the current
+    thread.
+
+    While inside the context, @ref validate_attribute accepts every value
+    without checking it. This is used when parsing input that is known to be
+    valid, such as a profile that has been loaded and validated before, to
+    avoid the cost of validating every attribute of every object. Other
+    threads are not affected, so objects being changed elsewhere are still
+    validated.
+
+    @param trusted If False, the context does nothing. This allows callers to
+    choose whether to validate without duplicating code.
+
+    Example:
+    >>> validate_attribute(1, 'example', expected_type=str)
+    Traceback (most recent call last):
+    ...
+    InvalidTypeError: ('example', <type 'int'>, <type 'str'>)
+    >>> with trusted_load():
+    ...     validate_attribute(1, 'example', expected_type=str)
+    >>> is_trusted()
+    False
+    '''
+    return _trusted_load(trusted)
+
+
+def is_trusted():
+    '''Returns True if attribute validation is turned off in the current
+    thread by @ref trusted_load.
+
+    '''
+    return _trust.trusted
+
+
+def intern_string(value):
+    '''Returns the copy of a string kept by the string table in use, so
+    that equal strings read while parsing share one object.
+
+    The parse methods of the model objects pass the identifiers that are
+    repeated throughout a profile through this function: component IDs,
+    instance names, port and execution context names, and the types of
+    connectors and execution contexts. The table in use is the one given to
+    @ref interning in the current thread, or the one set with @ref
+    set_string_table; if there is neither, the value is returned unchanged.
+
+    Apart from the memory saved, dictionaries keyed by interned strings,
+    such as the component index of RtsProfile, find keys by identity before
+    comparing their characters.
+
+    @param value The string read.
+    @return An equal string.
+
+    Example:
+    >>> a = ''.join(['RTC:', 'Vendor'])
+    >>> b = ''.join(['RTC:', 'Vendor'])
+    >>> a is b
+    False
+    >>> with interning():
+    ...     intern_string(a) is intern_string(b)
+    True
+    >>> intern_string(b) is a
+    False
+    '''
+    table = _interning_state.table
+    if table is None:
+        table = _shared_table[0]
+        if table is None:
+            return value
+    return table.intern(value)
+
+
+def interning(table=None):
+    '''Context manager that makes @ref intern_string use a table in the
+    current thread.
+
+    Used by the parse methods of RtsProfile, so that each string is kept once
+    per profile. The table used by the last parse of a profile is kept as
+    its string_table, to give the statistics of the parse.
+
+    @param table The @ref StringTable to use. If None, the table set with
+    @ref set_string_table is used; if that is also None, a new table is used,
+    so that the strings of one profile are shared with each other but not
+    with other profiles.
+    @return A context manager that gives the table in use as the target of
+    the with statement.
+
+    Example:
+    >>> with interning() as t:
+    ...     a = intern_string(''.join(['Comp', '1']))
+    ...     intern_string(''.join(['Comp', '1'])) is a
+    True
+    >>> t.lookups, t.hits
+    (2, 1)
+    '''
+    return _interning(table)
+
+
+def current_string_table():
+    '''Returns the table used by @ref intern_string in the current thread, or
+    None if strings are not being interned.
+
+    '''
+    table = _interning_state.table
+    if table is None:
+        return _shared_table[0]
+    return table
+
+
+def set_string_table(table):
+    '''Set the table used by @ref intern_string whenever no other is given.
+
+    Setting a table makes the strings of every profile parsed share one
+    object for each value, and gathers the statistics of all of the parses
+    in that table. The strings are kept by the table until it is cleared or
+    replaced.
+
+    @param table The @ref StringTable, or None to use a new table for each
+    profile parsed. This is the default.
+
+    Example:
+    >>> from rtsprofile.rts_profile import RtsProfile
+    >>> t = StringTable()
+    >>> set_string_table(t)
+    >>> s = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> s2 = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    >>> set_string_table(None)
+    >>> s.components[0].instance_name is s2.components[0].instance_name
+    True
+    >>> t.hits > 0 and t.saved_bytes > 0
+    True
+    '''
+    _shared_table[0] = table
+
+
+def get_string_table():
+    '''Get the table set with @ref set_string_table, or None.'''
+    return _shared_table[0]
+
+
 def validate_attribute(attr, name, expected_type=None, required=False):
     '''Validates that an attribute meets expectations.
 
@@ -106,35 +257,189 @@ def validate_attribute(attr, name, expected_type=None, required=False):
     @param attr The value to validate.
     @param name The attribute name to use in exceptions.
     @param expected_type The type the value must be. If None, no check is
-    performed. If a list, attr must match one type in the list.
+    performed. If a list, attr must match one type in the list. Instances of
+    subclasses of the expected types are accepted, except that a bool is not
+    accepted as an int.
     @param required If the value must not be empty, e.g. not an empty string.
     @raises InvalidTypeError
     @raises RequiredAttributeError
 
+    The check for each attribute name is prepared on first use and kept, so
+    later calls only look up the value's type in a set.
+
+    Example:
+    >>> validate_attribute(1.0, 'example.rate', expected_type=[int, float])
+    >>> validate_attribute(True, 'example.rate', expected_type=[int, float])
+    Traceback (most recent call last):
+    ...
+    InvalidTypeError: ('example.rate', <type 'bool'>, [<type 'int'>, <type 'float'>])
+    >>> validate_attribute('', 'example.name', expected_type=str,
+    ...                    required=True)
+    Traceback (most recent call last):
+    ...
+    RequiredAttributeError: example.name
     '''
+    if _trust.trusted:
+        return
     if expected_type:
-        if type(expected_type) == list:
-            if not _check_type(attr, expected_type):
-                raise InvalidTypeError(name, type(attr), expected_type)
-        else:
-            if not _check_type(attr, [expected_type]):
-                raise InvalidTypeError(name, type(attr), expected_type)
+        v = _validators.get(name)
+        if v is None or (v[0] is not expected_type and v[0] != expected_type):
+            v = _make_validator(name, expected_type)
+        t = type(attr)
+        if t not in v[1] and (t is bool or not isinstance(attr, v[2])):
+            raise InvalidTypeError(name, t, expected_type)
     if required and not attr:
         raise RequiredAttributeError(name)
 
 
+##############################################################################
+## StringTable object
+
+class StringTable(object):
+    '''A table of strings, holding one copy of each value given to it.
+
+    Example:
+    >>> t = StringTable()
+    >>> a = t.intern(''.join(['Comp', '1']))
+    >>> t.intern(''.join(['Comp', '1'])) is a
+    True
+    >>> len(t), t.lookups, t.hits
+    (1, 2, 1)
+    '''
+
+    __slots__ = ('_strings', '_lookups', '_hits', '_saved_bytes')
+
+    def __init__(self):
+        '''Constructor.'''
+        self._strings = {}
+        self._lookups = 0
+        self._hits = 0
+        self._saved_bytes = 0
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __str__(self):
+        return '{0} strings, {1} lookups, {2} hits, {3} bytes saved'.format(
+                len(self._strings), self._lookups, self._hits,
+                self._saved_bytes)
+
+    @property
+    def lookups(self):
+        '''The number of strings given to the table.'''
+        return self._lookups
+
+    @property
+    def hits(self):
+        '''The number of strings given to the table that it already held a
+        copy of.
+
+        '''
+        return self._hits
+
+    @property
+    def saved_bytes(self):
+        '''The total size of the strings that were replaced by the copy held
+        by the table, in bytes.
+
+        This is the memory saved once the replaced strings are freed, such as
+        when the parsed document is discarded.
+
+        '''
+        return self._saved_bytes
+
+    def intern(self, value):
+        '''Get the table's copy of a string, adding it if the table does not
+        hold one.
+
+        '''
+        self._lookups += 1
+        existing = self._strings.setdefault(value, value)
+        if existing is not value:
+            if type(existing) is not type(value):
+                # Under Python 2, str and unicode strings are equal
+                return value
+            self._hits += 1
+            self._saved_bytes += sys.getsizeof(value)
+        return existing
+
+    def clear(self):
+        '''Discard the strings and statistics.'''
+        self._strings = {}
+        self._lookups = 0
+        self._hits = 0
+        self._saved_bytes = 0
+
+
 ##############################################################################
 ## Private functions
 
-def _check_type(value, expected_types):
-    # Check if the type of value is one of those listed in expected_types
-    for et in expected_types:
-        if type(et) == type and type(value) == et:
-            return True
-        elif type(et) == new.classobj and \
-                value.__class__ == et:
-            return True
-    return False
+class _TrustState(threading.local):
+    # Per-thread flag set by trusted_load
+    trusted = False
+
+_trust = _TrustState()
+
+
+@contextmanager
+def _trusted_load(trusted):
+    if not trusted:
+        yield
+        return
+    previous = _trust.trusted
+    _trust.trusted = True
+    try:
+        yield
+    finally:
+        _trust.trusted = previous
+
+
+class _InterningState(threading.local):
+    # Per-thread table set by interning
+    table = None
+
+_interning_state = _InterningState()
+
+
+@contextmanager
+def _interning(table):
+    if table is None:
+        table = _shared_table[0]
+        if table is None:
+            table = StringTable()
+    previous = _interning_state.table
+    _interning_state.table = table
+    try:
+        yield table
+    finally:
+        _interning_state.table = previous
+
+
+# The table set by set_string_table, kept in a list so it can be changed
+_shared_table = [None]
+
+
+if sys.version_info[0] == 3:
+    _string_types = [str]
+else:
+    _string_types = [str, unicode]
+
+
+# Type checks for validate_attribute, by attribute name. Each is a tuple of the
+# expected type as given, the frozenset of types accepted as-is, and the tuple
+# of types whose subclasses are also accepted.
+_validators = {}
+
+
+def _make_validator(name, expected_type):
+    # Prepare and store the type check for an attribute
+    if type(expected_type) == list:
+        types = tuple(expected_type)
+    else:
+        types = (expected_type,)
+    v = (expected_type, frozenset(types), types)
+    _validators[name] = v
+    return v
 
 
 # vim: tw=79
@@ -0,0 +1,89 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_bulk_load.py
+
+Benchmark of parallel bulk loading against the number of worker processes.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from rtsprofile.bulk_load import bulk_load
+
+from bench_xml_parse import make_profile
+
+
+def main(argv):
+    print('''This benchmark loads a directory of generated profiles with an
+increasing number of worker processes, and prints the time taken and the
+speed-up over a single worker. Only checking is measured; the loaded profiles
+are not sent back.
+''')
+    num_files = 96
+    if len(argv) > 1:
+        num_files = int(argv[1])
+    cpus = multiprocessing.cpu_count()
+    d = tempfile.mkdtemp()
+    try:
+        xml_spec = make_profile(20, 8)
+        paths = []
+        for ii in range(num_files):
+            p = os.path.join(d, 'rtsystem{0}.xml'.format(ii))
+            open(p, 'w').write(xml_spec)
+            paths.append(p)
+        print('{0} files, {1} CPUs\n'.format(num_files, cpus))
+        print('{0:>10} {1:>10} {2:>10} {3:>10}'.format('Processes', 'Chunk',
+            'Seconds', 'Speed-up'))
+        counts = []
+        n = 1
+        while n < cpus:
+            counts.append(n)
+            n *= 2
+        counts.append(cpus)
+        base = None
+        for processes in counts:
+            for chunk_size in (1, 4):
+                start = time.time()
+                for r in bulk_load(paths, processes=processes,
+                                   chunk_size=chunk_size, keep_profiles=False):
+                    if not r.ok:
+                        print(r)
+                t = time.time() - start
+                if base is None:
+                    base = t
+                print('{0:>10} {1:>10} {2:>10.2f} {3:>9.2f}x'.format(processes,
+                    chunk_size, t, base / t))
+    finally:
+        shutil.rmtree(d)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,97 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_clone.py
+
+Benchmark of cloning generated profiles, compared with deep copying them.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import copy
+import gc
+import sys
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+def count_objects():
+    # Count the live objects of the rtsprofile package and the lists and
+    # dictionaries
+    gc.collect()
+    count = 0
+    for o in gc.get_objects():
+        t = type(o)
+        if t in (list, dict) or t.__module__.startswith('rtsprofile'):
+            count += 1
+    return count
+
+
+def what_if(prof):
+    # Make the kind of changes a planning tool tries out: remove a
+    # component, rewire a connector and change a configuration parameter
+    c = prof.clone()
+    del c.components[len(c.components) // 2]
+    c.data_port_connectors[0].target_data_port.port_name = 'dp1'
+    c.components[0].configuration_sets[0].configuration_data[0].data = \
+            'changed'
+    return c
+
+
+def new_objects(f):
+    before = count_objects()
+    result = f()
+    return count_objects() - before, result
+
+
+def main(argv):
+    print('''This benchmark copies generated profiles of increasing size with
+copy.deepcopy, clones them, and clones them and makes a few changes to the
+clone: removing a component, rewiring a connector and changing a configuration
+parameter. It prints the time taken in milliseconds and the number of model
+objects, lists and dictionaries created. Cloning should take the same time for
+any size of profile, and the changes should create the same number of objects;
+their time grows only with copying the component and connector lists, which
+hold references to the objects of the original.
+''')
+    print('{0:>10} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10} {6:>10}'.format(
+            'Components', 'Deepcopy', 'Objects', 'Clone', 'Objects',
+            'What-if', 'Objects'))
+    for num_comps in (100, 1000, 10000):
+        prof = generate_profile(num_comps)
+        repeats = num_comps < 10000 and 3 or 1
+        t_d = best_of(lambda: copy.deepcopy(prof), repeats)[0]
+        n_d = new_objects(lambda: copy.deepcopy(prof))[0]
+        t_c = best_of(prof.clone, 3)[0]
+        n_c = new_objects(prof.clone)[0]
+        t_w = best_of(lambda: what_if(prof), 3)[0]
+        n_w = new_objects(lambda: what_if(prof))[0]
+        print('{0:>10} {1:>10.1f} {2:>10} {3:>10.3f} {4:>10} {5:>10.3f} '
+              '{6:>10}'.format(num_comps, t_d * 1e3, n_d, t_c * 1e3, n_c,
+                               t_w * 1e3, n_w))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,67 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_critical_path.py
+
+Benchmark of the critical path analysis of the start up of generated
+profiles.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.lifecycle import analyze_critical_path
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+def main(argv):
+    print('''This benchmark analyses the initializing, start up and activation of
+generated profiles of increasing size, both from the dependencies alone and
+with the sequence numbers treated as strict. It prints the time taken by the
+analysis in milliseconds, and the makespan in seconds and parallelism of each.
+A strict makespan much longer than the other shows how much following the
+sequence numbers one at a time serializes the system. The time per component
+should stay about the same as the profiles grow.
+''')
+    print('{0:>10} {1:>10} {2:>10} {3:>8} {4:>10} {5:>10} {6:>8}'.format(
+            'Components', 'Analysis', 'Makespan', 'Par.', 'Strict',
+            'Makespan', 'Par.'))
+    for num_comps in (100, 1000, 5000, 20000):
+        prof = generate_profile(num_comps)
+        t, a = best_of(lambda: analyze_critical_path(prof, action_time=1),
+                        3)
+        t_s, s = best_of(lambda: analyze_critical_path(prof,
+                strict_sequence=True, action_time=1), 3)
+        print('{0:>10} {1:>10.1f} {2:>10.1f} {3:>8.2f} {4:>10.1f} '
+              '{5:>10.1f} {6:>8.2f}'.format(num_comps, t * 1e3,
+                                            a.makespan / 1e3, a.parallelism,
+                                            t_s * 1e3, s.makespan / 1e3,
+                                            s.parallelism))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
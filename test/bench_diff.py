@@ -0,0 +1,76 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_diff.py
+
+Benchmark of the structural diff between two profiles as they grow.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import random
+import sys
+import time
+
+from rtsprofile.diff import diff
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_xml_parse import make_profile
+
+
+def edit(prof, rng):
+    # Reorder the components and make a few edits, so that nothing can be
+    # matched by position
+    rng.shuffle(prof.components)
+    for c in rng.sample(prof.components, 3):
+        c.configuration_sets[0].configuration_data[0].data = 'edited'
+    prof.components.pop()
+
+
+def main(argv):
+    print('''This benchmark measures the time taken to diff two profiles in which
+the components have been reordered and a few edited. The time per component
+should stay about the same as the profiles grow.
+''')
+    rng = random.Random(1)
+    print('{0:>10} {1:>10} {2:>12} {3:>16}'.format('Components', 'Changes',
+                                                    'Time (s)', 'us/component'))
+    for num_comps in (50, 100, 200, 400, 800):
+        xml = make_profile(num_comps, 5)
+        old = RtsProfile(xml_spec=xml, validate=False)
+        new = RtsProfile(xml_spec=xml, validate=False)
+        edit(new, rng)
+        best = None
+        for ii in range(3):
+            start = time.time()
+            changes = diff(old, new)
+            t = time.time() - start
+            if best is None or t < best:
+                best = t
+        print('{0:>10} {1:>10} {2:>12.4f} {3:>16.1f}'.format(num_comps,
+                len(changes), best, best / num_comps * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,88 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_executor.py
+
+Benchmark of executing the activation of generated profiles with mock
+components. Requires Python 3.4 or later.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.executor import LifecycleExecutor, MockDriver
+from rtsprofile.lifecycle import analyze_critical_path
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+# The time each mock component takes to carry out an action, in milliseconds
+LATENCY = 20
+# The wait times and latencies run this many times faster than real time
+SPEED_UP = 100
+
+
+def execute(prof, strict_sequence, latency, time_scale):
+    driver = MockDriver(latency=latency, time_scale=time_scale)
+    executor = LifecycleExecutor(driver, strict_sequence=strict_sequence,
+                                 time_scale=time_scale)
+    return executor.run(prof.activation, 'activation')
+
+
+def main(argv):
+    print('''This benchmark executes the activation of generated profiles of increasing
+size with mock components.
+
+First the wait times and latencies are set to zero, so that only the cost of
+scheduling is measured, which is printed as steps per second. Then each
+component takes {0} ms to activate, running {1} times faster than real time,
+and the activation is executed with the sequence numbers treated as strict,
+so that the components are activated one at a time, and with only the
+conditions followed, so that they are activated as concurrently as the
+conditions allow. The time each takes is printed in seconds of profile time,
+along with the makespan found by the critical path analysis and the most
+activations in progress at once. For the largest profiles, the cost of
+scheduling at this speed makes the concurrent time longer than the makespan.
+'''.format(LATENCY, SPEED_UP))
+    print('{0:>10} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10}'.format(
+            'Components', 'Steps/s', 'Strict', 'Concurrent', 'Makespan',
+            'In flight'))
+    for num_comps in (100, 300, 1000, 3000):
+        prof = generate_profile(num_comps)
+        steps = len(prof.activation.targets)
+        t, r = best_of(lambda: execute(prof, False, 0, 1e-9), 3)
+        strict = execute(prof, True, LATENCY, 0.001 / SPEED_UP)
+        concurrent = execute(prof, False, LATENCY, 0.001 / SPEED_UP)
+        a = analyze_critical_path(prof, actions=('activation',),
+                                  action_time=LATENCY)
+        print('{0:>10} {1:>10.0f} {2:>10.1f} {3:>10.1f} {4:>10.1f} '
+              '{5:>10}'.format(num_comps, steps / t, strict.duration / 1e3,
+                               concurrent.duration / 1e3, a.makespan / 1e3,
+                               concurrent.max_in_flight))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
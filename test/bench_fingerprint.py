@@ -0,0 +1,66 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_fingerprint.py
+
+Benchmark of profile fingerprints against comparing saved profiles.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_suite import best_of
+from bench_xml_parse import make_profile
+
+
+def main(argv):
+    print('''This benchmark compares the time taken to check whether a profile has
+changed by saving it as XML, by computing its fingerprint for the first time,
+by getting its cached fingerprint, and by getting it after changing one
+component, which hashes only that component and the profile again.
+''')
+    print('{0:>10} {1:>12} {2:>12} {3:>12} {4:>12}'.format('Components',
+            'XML (s)', 'First (s)', 'Cached (s)', 'Changed (s)'))
+    for num_comps in (50, 200, 800):
+        xml = make_profile(num_comps, 5)
+        prof = RtsProfile(xml_spec=xml)
+        t_xml = best_of(prof.save_to_xml, 1)[0]
+        profs = [RtsProfile(xml_spec=xml) for ii in range(3)]
+        t_first = best_of(lambda: profs.pop().fingerprint(), 3)[0]
+        prof.fingerprint()
+        t_cached = best_of(prof.fingerprint, 3)[0]
+        comp = prof.components[num_comps // 2]
+        def change_one():
+            comp.comment = comp.comment + 'x'
+            return prof.fingerprint()
+        t_changed = best_of(change_one, 3)[0]
+        print('{0:>10} {1:>12.4f} {2:>12.4f} {3:>12.6f} {4:>12.6f}'.format(
+                num_comps, t_xml, t_first, t_cached, t_changed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,190 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_import.py
+
+Benchmark of the time taken to import the library, alone and followed by
+loading a profile in each format.
+
+    python test/bench_import.py [options]
+
+Each case is run in a new interpreter. Where the interpreter supports it
+(Python 3.7 and later), the time taken by the imports themselves is measured
+with python -X importtime.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import optparse
+import os
+import subprocess
+import sys
+import time
+
+
+# The modules that should only be imported when a format that needs them is
+# used
+DEFERRED = ['yaml', 'xml.dom.minidom', 'xml.dom.pulldom', 'json',
+            'rtsprofile.patch', 'rtsprofile.fingerprint']
+
+# The cases, as (name, code run after importing rtsprofile.rts_profile,
+# deferred modules that the code may import)
+CASES = [('import', '', []),
+         ('load XML', "RtsProfile(xml_spec=open('test/rtsystem.xml').read())",
+          ['xml.dom.minidom']),
+         ('load YAML',
+          "RtsProfile(yaml_spec=open('test/rtsystem.yaml').read())",
+          ['yaml']),
+         ('load JSON', "RtsProfile(json_spec=s)", ['json'])]
+
+# Prints the deferred modules that were imported
+_REPORT = '''
+import sys
+print(' '.join([m for m in {0!r} if m in sys.modules]))
+'''
+
+
+def case_code(code):
+    # The program run for a case
+    lines = ['from rtsprofile.rts_profile import RtsProfile']
+    if code.startswith('RtsProfile(json_spec'):
+        # Make the JSON text without importing a JSON module first
+        lines.append("s = open('test/rtsystem.json').read()")
+    if code:
+        lines.append(code)
+    return '\n'.join(lines) + _REPORT.format(DEFERRED)
+
+
+def run_case(python, code, importtime):
+    # Run a case once and get (wall time, import time, imported modules).
+    # The import time is the total time of the imports made by the case,
+    # including those made when loading the profile, or None if it is not
+    # measured.
+    cmd = [python]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', case_code(code)]
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(['.', env.get('PYTHONPATH', '')])
+    start = time.time()
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                         env=env)
+    out, err = p.communicate()
+    wall = time.time() - start
+    if p.returncode != 0:
+        raise RuntimeError(err.decode('utf-8', 'replace'))
+    imported = out.decode('utf-8').split()
+    if not importtime:
+        return wall, None, imported
+    # Lines are "import time: self | cumulative | name", with the name
+    # indented by its depth. The imports made by the case are those at depth
+    # 0 from the first rtsprofile module on; those before it are made when
+    # the interpreter starts.
+    total = 0
+    started = False
+    for l in err.decode('utf-8').splitlines():
+        if not l.startswith('import time:'):
+            continue
+        fields = l[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2]
+        if name[1:].startswith(' '):
+            # Imported by another module
+            continue
+        if name.strip().startswith('rtsprofile'):
+            started = True
+        if started:
+            total += int(fields[1])
+    return wall, total / 1e6, imported
+
+
+def main(argv):
+    parser = optparse.OptionParser(usage='%prog [options]',
+            description='Measure the time taken to import rtsprofile and to '
+                        'load a profile in each format, each in a new '
+                        'interpreter.')
+    parser.add_option('-p', '--python', dest='python', default=sys.executable,
+                      help='Interpreter to measure [Default: this one]')
+    parser.add_option('-r', '--repeat', dest='repeats', type='int', default=5,
+                      help='Runs of each case; the best time is kept '
+                           '[Default: %default]')
+    parser.add_option('-c', '--check', dest='check', action='store_true',
+                      default=False,
+                      help='Exit with status 1 if a case imports a deferred '
+                           'module it does not need')
+    options, args = parser.parse_args(argv[1:])
+
+    version = subprocess.Popen([options.python, '-c',
+            'import sys; print(sys.version_info >= (3, 7))'],
+            stdout=subprocess.PIPE).communicate()[0]
+    importtime = version.strip() == b'True'
+    # A JSON copy of the sample profile, made in this process
+    from rtsprofile.rts_profile import RtsProfile
+    f = open('test/rtsystem.json', 'w')
+    try:
+        f.write(RtsProfile(xml_spec=open('test/rtsystem.xml').read()
+                           ).save_to_json(backend='json'))
+    finally:
+        f.close()
+
+    print('''This benchmark starts a new interpreter to import rtsprofile.rts_profile,
+alone and followed by loading the sample profile in each format. It prints
+the best wall time of {0} runs and, with -X importtime, the time spent
+importing the library and the modules it uses, in milliseconds. The last
+column lists the modules with a deferred import that were imported.
+'''.format(options.repeats))
+    if not importtime:
+        print('This interpreter does not support -X importtime; only the '
+              'wall time is measured.\n')
+    print('{0:>10} {1:>10} {2:>10}  {3}'.format('Case', 'Wall', 'Imports',
+                                                'Deferred modules imported'))
+    failed = False
+    try:
+        for name, code, allowed in CASES:
+            best = None
+            for ii in range(options.repeats):
+                result = run_case(options.python, code, importtime)
+                if best is None or result[0] < best[0]:
+                    best = result
+            wall, imports, imported = best
+            if imports is None:
+                imports = '-'
+            else:
+                imports = '{0:.1f}'.format(imports * 1e3)
+            print('{0:>10} {1:>10.1f} {2:>10}  {3}'.format(name, wall * 1e3,
+                    imports, ' '.join(imported)))
+            unexpected = [m for m in imported if m not in allowed]
+            if unexpected:
+                failed = True
+                print('{0:>10} imported unexpectedly: {1}'.format('',
+                      ' '.join(unexpected)))
+    finally:
+        os.remove('test/rtsystem.json')
+    if options.check and failed:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
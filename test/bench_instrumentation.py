@@ -0,0 +1,74 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_instrumentation.py
+
+Benchmark of the cost of instrumenting parsing and saving.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.instrumentation import Collector
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+def main(argv):
+    print('''This benchmark parses and saves a generated profile of 200 components as
+XML and YAML without an instrument, with a collector, and with a collector
+that traces memory (Python 3 only), and prints the time taken in
+milliseconds. The phases measured by the last run are then printed.
+''')
+    repeats = 5
+    prof = generate_profile(200)
+    xml_spec = prof.save_to_xml()
+    yaml_spec = prof.save_to_yaml()
+    s = RtsProfile()
+    print('{0:>14} {1:>10} {2:>10} {3:>10} {4:>10}'.format('Instrument',
+            'XML load', 'XML save', 'YAML load', 'YAML save'))
+    for name, inst in [('None', None), ('Collector', Collector()),
+                       ('Memory traced', Collector(trace_memory=True))]:
+        times = [best_of(lambda: s.parse_from_xml(xml_spec,
+                                                  instrument=inst),
+                         repeats)[0],
+                 best_of(lambda: s.save_to_xml(instrument=inst), repeats)[0],
+                 best_of(lambda: s.parse_from_yaml(yaml_spec,
+                                                   instrument=inst),
+                         repeats)[0],
+                 best_of(lambda: s.save_to_yaml(instrument=inst), repeats)[0]]
+        print('{0:>14} {1:>10.1f} {2:>10.1f} {3:>10.1f} {4:>10.1f}'.format(
+                name, *[t * 1e3 for t in times]))
+    c = Collector()
+    s.parse_from_xml(xml_spec, instrument=c)
+    s.save_to_yaml(instrument=c)
+    print()
+    print(c)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,59 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_integrity.py
+
+Benchmark of checking the references of generated profiles.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.integrity import check_integrity
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+def main(argv):
+    print('''This benchmark checks the references of generated profiles of increasing
+size, first as generated and then with every tenth component removed so that
+many references are broken, and prints the time taken in milliseconds and the
+number of broken references found. The time per component should stay about
+the same as the profiles grow.
+''')
+    print('{0:>10} {1:>10} {2:>10} {3:>10} {4:>10}'.format(
+            'Components', 'Check', 'Broken', 'Damaged', 'Broken'))
+    for num_comps in (100, 1000, 10000, 30000):
+        prof = generate_profile(num_comps)
+        t, broken = best_of(lambda: check_integrity(prof), 3)
+        del prof.components[::10]
+        t_d, broken_d = best_of(lambda: check_integrity(prof), 3)
+        print('{0:>10} {1:>10.1f} {2:>10} {3:>10.1f} {4:>10}'.format(
+                num_comps, t * 1e3, len(broken), t_d * 1e3, len(broken_d)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
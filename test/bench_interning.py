@@ -0,0 +1,66 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_interning.py
+
+Benchmark of the strings shared by interning while parsing generated
+profiles.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+def main(argv):
+    print('''This benchmark parses generated profiles of increasing size from XML and
+YAML, and prints the time taken in milliseconds, and from the string table of
+the parsed profile the number of strings looked up, the number of distinct
+strings kept, and the memory saved by sharing them in KiB.
+''')
+    print('{0:>10} {1:>6} {2:>10} {3:>10} {4:>10} {5:>10}'.format(
+            'Components', 'Format', 'Parse', 'Lookups', 'Strings',
+            'Saved KiB'))
+    for num_comps in (100, 1000, 5000):
+        prof = generate_profile(num_comps)
+        for fmt, spec in (('xml', prof.save_to_xml()),
+                          ('yaml', prof.save_to_yaml())):
+            if fmt == 'xml':
+                parse = lambda: RtsProfile(xml_spec=spec)
+            else:
+                parse = lambda: RtsProfile(yaml_spec=spec)
+            t, p = best_of(parse, 3)
+            table = p.string_table
+            print('{0:>10} {1:>6} {2:>10.1f} {3:>10} {4:>10} '
+                  '{5:>10.1f}'.format(num_comps, fmt, t * 1e3, table.lookups,
+                                      len(table), table.saved_bytes / 1024.0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,76 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_json.py
+
+Benchmark of JSON parsing and saving with each of the available backends,
+compared with XML and YAML.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.backends import available_json_backends
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_suite import best_of
+from bench_xml_parse import make_profile
+
+
+def main(argv):
+    print('''This benchmark parses and saves generated profiles of increasing size as
+XML, YAML, and JSON with each available JSON backend, and prints the time
+taken in milliseconds.
+''')
+    repeats = 3
+    backends = available_json_backends()
+    header = '{0:>10} {1:>10} {2:>10} {3:>10} {4:>10}'.format('Components',
+            'XML load', 'XML save', 'YAML load', 'YAML save')
+    for b in backends:
+        header += ' {0:>16} {1:>16}'.format(b + ' load', b + ' save')
+    print(header)
+    for num_comps in [10, 50, 100, 200]:
+        prof = RtsProfile(xml_spec=make_profile(num_comps, 8))
+        xml_spec = prof.save_to_xml()
+        yaml_spec = prof.save_to_yaml()
+        json_spec = prof.save_to_json(backend='json')
+        s = RtsProfile()
+        line = '{0:>10}'.format(num_comps)
+        for load, save in [(lambda: s.parse_from_xml(xml_spec), s.save_to_xml),
+                           (lambda: s.parse_from_yaml(yaml_spec),
+                            s.save_to_yaml)]:
+            line += ' {0:>10.1f} {1:>10.1f}'.format(
+                    best_of(load, repeats)[0] * 1e3,
+                    best_of(save, repeats)[0] * 1e3)
+        for b in backends:
+            t_load = best_of(lambda: s.parse_from_json(json_spec, backend=b),
+                             repeats)[0]
+            t_save = best_of(lambda: s.save_to_json(backend=b), repeats)[0]
+            line += ' {0:>16.1f} {1:>16.1f}'.format(t_load * 1e3, t_save * 1e3)
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
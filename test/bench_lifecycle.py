@@ -0,0 +1,64 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_lifecycle.py
+
+Benchmark of planning the start up of generated profiles.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.lifecycle import plan_lifecycle
+
+from bench_suite import best_of
+from profile_generator import generate_profile
+
+
+def main(argv):
+    print('''This benchmark plans the start up of generated profiles of increasing
+size, both from the dependencies alone and with the sequence numbers treated
+as strict, and prints the time taken to plan in milliseconds, the number of
+waves in each plan, and the least time each plan takes to carry out given
+the wait times of the targets, in seconds. The time per component should stay
+about the same as the profiles grow.
+''')
+    print('{0:>10} {1:>10} {2:>8} {3:>10} {4:>10} {5:>8} {6:>10}'.format(
+            'Components', 'Plan', 'Waves', 'Duration', 'Strict', 'Waves',
+            'Duration'))
+    for num_comps in (100, 1000, 5000, 20000):
+        startup = generate_profile(num_comps).startup
+        t, plan = best_of(lambda: plan_lifecycle(startup), 3)
+        t_s, strict = best_of(lambda: plan_lifecycle(startup,
+                                                     strict_sequence=True), 3)
+        print('{0:>10} {1:>10.1f} {2:>8} {3:>10.1f} {4:>10.1f} {5:>8} '
+              '{6:>10.1f}'.format(num_comps, t * 1e3, len(plan.waves),
+                                  plan.duration() / 1e3, t_s * 1e3,
+                                  len(strict.waves),
+                                  strict.duration() / 1e3))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,132 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_memory.py
+
+Benchmark of the memory used by the object model of a large profile.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import gc
+import os
+import resource
+import sys
+
+from rtsprofile.component import Component
+from rtsprofile.config_set import ConfigurationSet, ConfigurationData
+from rtsprofile.port_connectors import DataPortConnector
+from rtsprofile.ports import DataPort, ServicePort
+from rtsprofile.rts_profile import RtsProfile
+from rtsprofile.targets import TargetPort
+
+
+def current_rss():
+    # Resident set size in bytes. Uses /proc where it is available, otherwise
+    # the peak RSS, which is close enough when measuring growth.
+    try:
+        f = open('/proc/self/statm')
+        try:
+            return int(f.read().split()[1]) * resource.getpagesize()
+        finally:
+            f.close()
+    except IOError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def make_profile(num_comps, num_ports, num_params):
+    prof = RtsProfile()
+    for ii in range(num_comps):
+        c = Component(id='RTC:bench:Memory:Comp{0}:1.0'.format(ii),
+                      path_uri='/localhost/comp{0}.rtc'.format(ii),
+                      instance_name='Comp{0}'.format(ii))
+        for jj in range(num_ports):
+            c.data_ports.append(DataPort(name='dp{0}'.format(jj)))
+            c.service_ports.append(ServicePort(name='sp{0}'.format(jj)))
+        cs = ConfigurationSet(id='default')
+        for jj in range(num_params):
+            cs.configuration_data.append(ConfigurationData(
+                name='param{0}'.format(jj), data=str(jj)))
+        c.configuration_sets.append(cs)
+        prof.components.append(c)
+        if ii:
+            prof.data_port_connectors.append(DataPortConnector(
+                connector_id='conn{0}'.format(ii), name='conn{0}'.format(ii),
+                data_type='TimedLong', interface_type='corba_cdr',
+                data_flow_type='push',
+                source_data_port=TargetPort(
+                    'RTC:bench:Memory:Comp{0}:1.0'.format(ii - 1),
+                    'Comp{0}'.format(ii - 1), 'dp0'),
+                target_data_port=TargetPort(
+                    'RTC:bench:Memory:Comp{0}:1.0'.format(ii),
+                    'Comp{0}'.format(ii), 'dp1')))
+    return prof
+
+
+def count_objects():
+    # Count the live objects of each type in the rtsprofile package, and the
+    # instance dictionaries that belong to them.
+    counts = {}
+    dicts = 0
+    for o in gc.get_objects():
+        t = type(o)
+        if t.__module__.startswith('rtsprofile'):
+            counts[t.__name__] = counts.get(t.__name__, 0) + 1
+            if hasattr(o, '__dict__'):
+                dicts += 1
+    return counts, dicts
+
+
+def main(argv):
+    print('''This benchmark builds a profile with many components, ports and
+configuration parameters in memory and reports the number of model objects,
+how many of them carry an instance dictionary, their total size as reported
+by sys.getsizeof, and the growth in resident memory.
+''')
+    num_comps, num_ports, num_params = 2000, 10, 10
+    if len(argv) > 1:
+        num_comps = int(argv[1])
+    gc.collect()
+    rss_before = current_rss()
+    prof = make_profile(num_comps, num_ports, num_params)
+    gc.collect()
+    rss_after = current_rss()
+    counts, dicts = count_objects()
+    size = 0
+    for o in gc.get_objects():
+        if type(o).__module__.startswith('rtsprofile'):
+            size += sys.getsizeof(o)
+            if hasattr(o, '__dict__'):
+                size += sys.getsizeof(o.__dict__)
+    for name in sorted(counts):
+        print('{0:>24} {1:>10}'.format(name, counts[name]))
+    print('{0:>24} {1:>10}'.format('Total objects', sum(counts.values())))
+    print('{0:>24} {1:>10}'.format('Instance dictionaries', dicts))
+    print('{0:>24} {1:>10.2f}'.format('Object size (MiB)', size / 1048576.0))
+    print('{0:>24} {1:>10.2f}'.format('RSS growth (MiB)',
+        (rss_after - rss_before) / 1048576.0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,63 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_patch.py
+
+Benchmark of sending a small change as a patch rather than a whole profile.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_suite import best_of
+from bench_xml_parse import make_profile
+
+
+def main(argv):
+    print('''This benchmark compares updating a receiver's copy of a profile after
+one configuration value changes, by sending the whole profile as XML and
+by sending a patch.
+''')
+    print('{0:>10} {1:>12} {2:>12} {3:>12} {4:>12}'.format('Components',
+            'XML bytes', 'Patch bytes', 'XML (s)', 'Patch (s)'))
+    for num_comps in (50, 200, 800):
+        xml = make_profile(num_comps, 5)
+        old = RtsProfile(xml_spec=xml)
+        new = RtsProfile(xml_spec=xml)
+        cd = new.components[num_comps // 2].configuration_sets[0]
+        cd.configuration_data[0].data = 'changed'
+        full = new.save_to_xml()
+        patch = old.make_patch(new).save_to_yaml()
+        t_full = best_of(lambda: RtsProfile(xml_spec=full), 5)[0]
+        receivers = [RtsProfile(xml_spec=xml) for ii in range(5)]
+        t_patch = best_of(lambda: receivers.pop().apply_patch(patch), 5)[0]
+        print('{0:>10} {1:>12} {2:>12} {3:>12.4f} {4:>12.6f}'.format(
+                num_comps, len(full), len(patch), t_full, t_patch))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
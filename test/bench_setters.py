@@ -0,0 +1,72 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_setters.py
+
+Micro-benchmark of the throughput of validated property setters.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+import timeit
+
+
+SETUP = '''
+from rtsprofile.component import Component
+from rtsprofile.exec_context import ExecutionContext
+from rtsprofile.location import Location
+from rtsprofile.port_connectors import DataPortConnector
+from rtsprofile.ports import DataPort
+from rtsprofile.targets import TargetPort
+c = Component()
+p = DataPort()
+ec = ExecutionContext()
+l = Location()
+conn = DataPortConnector()
+t = TargetPort('id', 'name', 'port')
+'''
+
+
+CASES = [('Component.id (string)', "c.id = 'RTC:a:b:c:1.0'"),
+         ('Component.is_required (bool)', 'c.is_required = True'),
+         ('DataPort.name (string)', "p.name = 'port'"),
+         ('ExecutionContext.rate (int or float)', 'ec.rate = 100.0'),
+         ('Location.x (int)', 'l.x = 10'),
+         ('DataPortConnector.source_data_port (object)',
+          'conn.source_data_port = t')]
+
+
+def main(argv):
+    print('''This benchmark measures the number of assignments per second made
+through validated property setters.
+''')
+    number = 200000
+    for label, stmt in CASES:
+        t = min(timeit.repeat(stmt, SETUP, repeat=7, number=number))
+        print('{0:<45} {1:>12.0f}/s'.format(label, number / t))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,77 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_snapshot.py
+
+Benchmark of loading profiles through the snapshot cache against parsing them.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import os
+import shutil
+import sys
+import tempfile
+
+from rtsprofile.rts_profile import RtsProfile
+from rtsprofile.snapshot_cache import SnapshotCache
+
+from bench_suite import best_of
+from bench_xml_parse import make_profile
+
+
+def main(argv):
+    print('''This benchmark loads generated profiles of increasing size by parsing
+them and through the snapshot cache, and prints the time taken in
+milliseconds.
+''')
+    repeats = 3
+    d = tempfile.mkdtemp()
+    try:
+        cache = SnapshotCache(os.path.join(d, 'cache'))
+        print('{0:>10} {1:>10} {2:>10} {3:>10} {4:>10}'.format('Components',
+            'XML ms', 'YAML ms', 'Cached ms', 'Speedup'))
+        for num_comps in [10, 50, 100, 200]:
+            xml_spec = make_profile(num_comps, 8)
+            xml_path = os.path.join(d, 'rtsystem.xml')
+            yaml_path = os.path.join(d, 'rtsystem.yaml')
+            open(xml_path, 'w').write(xml_spec)
+            open(yaml_path, 'w').write(
+                RtsProfile(xml_spec=xml_spec).save_to_yaml())
+            t_xml = best_of(lambda: RtsProfile(xml_spec=open(xml_path).read()),
+                            repeats)[0]
+            t_yaml = best_of(
+                lambda: RtsProfile(yaml_spec=open(yaml_path).read()),
+                repeats)[0]
+            cache.load(xml_path)
+            t_cached = best_of(lambda: cache.load(xml_path), repeats)[0]
+            print('{0:>10} {1:>10.1f} {2:>10.1f} {3:>10.1f} {4:>9.1f}x'.format(
+                num_comps, t_xml * 1e3, t_yaml * 1e3, t_cached * 1e3,
+                t_xml / t_cached))
+    finally:
+        shutil.rmtree(d)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
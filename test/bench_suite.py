@@ -0,0 +1,219 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_suite.py
+
+Reproducible benchmark suite over generated profiles of several sizes, with
+the results written as JSON for tracking regressions.
+
+    python test/bench_suite.py [options]
+
+Each size is measured in a separate process, so the peak memory recorded for
+a size is not affected by the sizes before it.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import datetime
+import gc
+import json
+import optparse
+import os
+import platform
+import subprocess
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from rtsprofile import RTSPROFILE_VERSION
+from rtsprofile.connection_graph import ConnectionGraph
+from rtsprofile.rts_profile import RtsProfile
+
+from profile_generator import generate_profile
+
+
+DEFAULT_SIZES = '10,1000,10000,100000'
+
+# The operations timed for each size, in the order they are run and reported
+OPERATIONS = ['generate', 'save_to_xml', 'save_to_yaml', 'str',
+              'parse_from_xml', 'parse_from_yaml', 'optional_connections',
+              'required_connections', 'connection_graph', 'fan_queries']
+
+
+def best_of(f, repeats):
+    # The best time of several runs, and the result of the last run
+    best = None
+    for ii in range(repeats):
+        gc.collect()
+        start = time.time()
+        result = f()
+        t = time.time() - start
+        if best is None or t < best:
+            best = t
+    return best, result
+
+
+def peak_rss():
+    # Peak resident set size of this process in bytes, or None if it is not
+    # available
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss
+    return rss * 1024
+
+
+def measure(num_comps, seed, repeats):
+    '''Measure each operation on a generated profile of the given size.
+
+    @return A dictionary of results: the size of the profile, the best time of
+    each operation in seconds, the sizes of the saved forms in bytes, and the
+    peak memory of the process in bytes.
+
+    '''
+    times = {}
+    times['generate'], prof = best_of(lambda: generate_profile(num_comps,
+                                                               seed), repeats)
+    times['save_to_xml'], xml_spec = best_of(prof.save_to_xml, repeats)
+    times['save_to_yaml'], yaml_spec = best_of(prof.save_to_yaml, repeats)
+    times['str'], s = best_of(lambda: str(prof), repeats)
+    times['parse_from_xml'], p = best_of(lambda: RtsProfile(xml_spec=xml_spec),
+                                         repeats)
+    times['parse_from_yaml'], p = best_of(
+            lambda: RtsProfile(yaml_spec=yaml_spec), repeats)
+    p = None
+    times['optional_connections'], opt = best_of(
+            lambda: (prof.optional_data_connections(),
+                     prof.optional_service_connections()), repeats)
+    times['required_connections'], req = best_of(
+            lambda: (prof.required_data_connections(),
+                     prof.required_service_connections()), repeats)
+    # Build the graph directly, as the profile keeps its graph once built
+    times['connection_graph'], graph = best_of(
+            lambda: ConnectionGraph(prof.data_port_connectors,
+                                    prof.service_port_connectors), repeats)
+    times['fan_queries'], fans = best_of(
+            lambda: sum([len(graph.fan_in(c)) + len(graph.fan_out(c))
+                         for c in prof.components]), repeats)
+    return {'components': num_comps,
+            'data_port_connectors': len(prof.data_port_connectors),
+            'service_port_connectors': len(prof.service_port_connectors),
+            'optional_connections': len(opt[0]) + len(opt[1]),
+            'required_connections': len(req[0]) + len(req[1]),
+            'times': times,
+            'xml_bytes': len(xml_spec),
+            'yaml_bytes': len(yaml_spec),
+            'str_bytes': len(s),
+            'peak_rss': peak_rss()}
+
+
+def run_worker(num_comps, seed, repeats):
+    # Measure one size in a new process and get its results
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker',
+           '--sizes', str(num_comps), '--seed', str(seed),
+           '--repeat', str(repeats)]
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    out = p.communicate()[0]
+    if p.returncode != 0:
+        return {'components': num_comps,
+                'error': 'Worker exited with status {0}'.format(p.returncode)}
+    return json.loads(out.decode('utf-8'))
+
+
+def main(argv):
+    parser = optparse.OptionParser(usage='%prog [options]',
+            description='Time parsing, saving, printing and the connection '
+                        'queries on generated profiles of several sizes, '
+                        'and record the peak memory used.')
+    parser.add_option('-s', '--sizes', dest='sizes', default=DEFAULT_SIZES,
+                      help='Comma-separated numbers of components '
+                           '[Default: %default]')
+    parser.add_option('--seed', dest='seed', type='int', default=0,
+                      help='Seed of the profile generator [Default: %default]')
+    parser.add_option('-r', '--repeat', dest='repeats', type='int', default=3,
+                      help='Runs of each operation; the best time is kept '
+                           '[Default: %default]')
+    parser.add_option('-o', '--output', dest='output',
+                      default='bench_results.json',
+                      help='File to write the results to [Default: %default]')
+    parser.add_option('--worker', dest='worker', action='store_true',
+                      default=False, help=optparse.SUPPRESS_HELP)
+    options, args = parser.parse_args(argv[1:])
+    sizes = [int(s) for s in options.sizes.split(',')]
+
+    if options.worker:
+        print(json.dumps(measure(sizes[0], options.seed, options.repeats)))
+        return 0
+
+    print('''This benchmark generates profiles of each size, and times saving them as
+XML and YAML, converting them to strings, parsing them back, and the
+connection queries. Times are the best of {0} runs in milliseconds; memory is
+the peak resident set size in MiB of the process measuring that size.
+'''.format(options.repeats))
+    header = '{0:>10}'.format('Components')
+    for op in OPERATIONS:
+        header += ' {0:>{1}}'.format(op, max(len(op), 8))
+    header += ' {0:>8}'.format('Peak MiB')
+    print(header)
+    results = []
+    for num_comps in sizes:
+        r = run_worker(num_comps, options.seed, options.repeats)
+        results.append(r)
+        line = '{0:>10}'.format(num_comps)
+        if 'error' in r:
+            print(line + ' ' + r['error'])
+            continue
+        for op in OPERATIONS:
+            line += ' {0:>{1}.1f}'.format(r['times'][op] * 1e3,
+                                          max(len(op), 8))
+        if r['peak_rss'] is None:
+            line += ' {0:>8}'.format('-')
+        else:
+            line += ' {0:>8.1f}'.format(r['peak_rss'] / 1048576.0)
+        print(line)
+
+    report = {'rtsprofile_version': RTSPROFILE_VERSION,
+              'python_version': platform.python_version(),
+              'python_implementation': platform.python_implementation(),
+              'platform': platform.platform(),
+              'date': datetime.datetime.utcnow().isoformat(),
+              'seed': options.seed,
+              'repeats': options.repeats,
+              'results': results}
+    f = open(options.output, 'w')
+    try:
+        json.dump(report, f, indent=2, sort_keys=True)
+    finally:
+        f.close()
+    print('\nResults written to {0}'.format(options.output))
+    if any(['error' in r for r in results]):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
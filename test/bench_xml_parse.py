@@ -0,0 +1,111 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_xml_parse.py
+
+Benchmark of XML parsing time against the size of the profile.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+import time
+
+from rtsprofile.component import Component
+from rtsprofile.config_set import ConfigurationSet, ConfigurationData
+from rtsprofile.exec_context import ExecutionContext
+from rtsprofile.ports import DataPort
+from rtsprofile.rts_profile import RtsProfile
+from rtsprofile.targets import TargetComponent
+
+
+def make_profile(num_comps, num_children):
+    # Make a profile in which every component has num_children of each kind
+    # of nested child, including execution contexts with participants that
+    # nest below the component's own children.
+    prof = RtsProfile()
+    prof.id = 'RTSystem:bench:Nested:1.0'
+    prof.abstract = 'Nested benchmark profile'
+    prof.creation_date = '2015-01-01T00:00:00'
+    prof.update_date = '2015-01-01T00:00:00'
+    prof.version = '0.2'
+    for ii in range(num_comps):
+        c = Component(id='RTC:bench:Nested:Comp{0}:1.0'.format(ii),
+                      path_uri='/localhost/comp{0}.rtc'.format(ii),
+                      instance_name='Comp{0}'.format(ii))
+        cs = ConfigurationSet(id='default')
+        for jj in range(num_children):
+            c.data_ports.append(DataPort(name='port{0}'.format(jj)))
+            cs.configuration_data.append(ConfigurationData(
+                name='param{0}'.format(jj), data=str(jj)))
+            ec = ExecutionContext(id='ec{0}'.format(jj),
+                                  kind='PeriodicExecutionContext', rate=100.0)
+            for kk in range(num_children):
+                ec.participants.append(TargetComponent(
+                    'RTC:bench:Nested:Comp{0}:1.0'.format(kk),
+                    'Comp{0}'.format(kk)))
+            c.execution_contexts.append(ec)
+        c.configuration_sets.append(cs)
+        prof.components.append(c)
+    return prof.save_to_xml()
+
+
+def time_parse(xml_spec, repeats, validate=True, lazy=False):
+    best = None
+    for ii in range(repeats):
+        start = time.time()
+        RtsProfile(xml_spec=xml_spec, validate=validate, lazy=lazy)
+        t = time.time() - start
+        if best is None or t < best:
+            best = t
+    return best
+
+
+def main(argv):
+    print('''This benchmark parses generated XML profiles of increasing size and
+depth, and prints the time taken per XML element. If parsing scales linearly
+with the size of the document, the time per element stays roughly constant.
+Times are given for validated, trusted (validate=False) and lazy (lazy=True,
+with no components used after loading) parsing.
+''')
+    repeats = 3
+    print('{0:>10} {1:>10} {2:>10} {3:>12} {4:>12} {5:>12}'.format(
+        'Components', 'Children', 'Elements', 'us/element', 'trusted',
+        'lazy'))
+    for num_comps, num_children in [(10, 2), (10, 4), (10, 8), (10, 16),
+                                    (10, 32), (20, 8), (40, 8), (80, 8),
+                                    (160, 8)]:
+        xml_spec = make_profile(num_comps, num_children)
+        elements = xml_spec.count('<') - xml_spec.count('</') - 1
+        t = time_parse(xml_spec, repeats)
+        t_trusted = time_parse(xml_spec, repeats, validate=False)
+        t_lazy = time_parse(xml_spec, repeats, lazy=True)
+        print('{0:>10} {1:>10} {2:>10} {3:>12.2f} {4:>12.2f} {5:>12.2f}'.format(
+            num_comps, num_children, elements, t / elements * 1e6,
+            t_trusted / elements * 1e6, t_lazy / elements * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
+
@@ -0,0 +1,68 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: bench_yaml.py
+
+Benchmark of YAML parsing and saving with each of the available backends.
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+
+from rtsprofile.backends import available_yaml_backends
+from rtsprofile.rts_profile import RtsProfile
+
+from bench_suite import best_of
+from bench_xml_parse import make_profile
+
+
+def main(argv):
+    print('''This benchmark parses and saves generated YAML profiles of increasing
+size with each available YAML backend, and prints the time taken in
+milliseconds.
+''')
+    repeats = 3
+    backends = available_yaml_backends()
+    if 'libyaml' not in backends:
+        print('libyaml is not available; only the Python backend is measured.\n')
+    header = '{0:>10}'.format('Components')
+    for b in backends:
+        header += ' {0:>14} {1:>14}'.format(b + ' load', b + ' save')
+    print(header)
+    for num_comps in [10, 50, 100, 200]:
+        prof = RtsProfile(xml_spec=make_profile(num_comps, 8))
+        yaml_spec = prof.save_to_yaml(backend='python')
+        line = '{0:>10}'.format(num_comps)
+        for b in backends:
+            s = RtsProfile()
+            t_load = best_of(lambda: s.parse_from_yaml(yaml_spec, backend=b),
+                             repeats)[0]
+            t_save = best_of(lambda: s.save_to_yaml(backend=b), repeats)[0]
+            line += ' {0:>14.1f} {1:>14.1f}'.format(t_load * 1e3, t_save * 1e3)
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,312 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: profile_generator.py
+
+Seeded generator of realistic RT system profiles of any size, for
+benchmarks.
+
+Can also be run as a program to write a generated profile to a file:
+
+    python test/profile_generator.py [options] <number of components> <file>
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import optparse
+import random
+import sys
+
+from rtsprofile import direction
+from rtsprofile.component import Component
+from rtsprofile.component_group import ComponentGroup
+from rtsprofile.config_set import ConfigurationSet, ConfigurationData
+from rtsprofile.exec_context import ExecutionContext
+from rtsprofile.location import Location
+from rtsprofile.message_sending import StartUp, ShutDown, Activation, \
+                                       Deactivation, Condition, Preceding, \
+                                       WaitTime
+from rtsprofile.port_connectors import DataPortConnector, ServicePortConnector
+from rtsprofile.ports import DataPort, ServicePort
+from rtsprofile.rts_profile import RtsProfile
+from rtsprofile.targets import TargetComponent, TargetExecutionContext, \
+                               TargetPort
+
+
+##############################################################################
+## Generation parameters
+
+# The number of kinds of component. Components of the same kind share an ID
+# and have the same ports and configuration parameters, as instances of one
+# RT component do in a real system.
+NUM_KINDS = 50
+
+DATA_TYPES = ['RTC::TimedLong', 'RTC::TimedDouble', 'RTC::TimedString',
+              'RTC::TimedLongSeq', 'RTC::TimedDoubleSeq', 'RTC::CameraImage',
+              'RTC::TimedPose2D', 'RTC::TimedVelocity2D']
+
+EC_RATES = [10.0, 30.0, 100.0, 500.0, 1000.0]
+
+# Data ports of a component are connected to components at most this far
+# away in the component list, giving chains of processing as in real systems
+CONNECTION_SPAN = 20
+
+
+##############################################################################
+## Public API functions
+
+def generate_profile(num_comps, seed=0):
+    '''Generate a profile with the given number of components.
+
+    The same number of components and seed always give the same profile,
+    on Python 2 and 3.
+
+    Each component has data ports, service ports, configuration sets and an
+    execution context, with the numbers chosen by its kind. Output data ports
+    are connected to input ports of nearby components, some service ports are
+    connected, one component in every 50 starts a group, and every component
+    has start up, shut down, activation and deactivation conditions, some of
+    them with wait times or preceding components.
+
+    @param num_comps The number of components.
+    @param seed The seed of the random number generator.
+    @return An RtsProfile object.
+
+    '''
+    rng = random.Random(seed)
+    kinds = [_make_kind(rng, k) for k in range(NUM_KINDS)]
+    prof = RtsProfile()
+    prof.id = 'RTSystem:bench:Generated:1.0.0'
+    prof.abstract = 'Generated system of {0} components, seed {1}'.format(
+            num_comps, seed)
+    prof.creation_date = '2015-01-01T00:00:00'
+    prof.update_date = '2015-01-01T00:00:00'
+    prof.version = '0.2'
+    prof.comment = 'Generated for benchmarking'
+
+    for ii in range(num_comps):
+        kind = kinds[_randint(rng, 0, NUM_KINDS - 1)]
+        prof.components.append(_make_component(rng, ii, kind))
+    comps = prof.components
+
+    for ii, c in enumerate(comps):
+        for p in c.data_ports:
+            if not p.name.startswith('out'):
+                continue
+            for jj in range(_randint(rng, 1, 2)):
+                target = _nearby(rng, comps, ii, 'in')
+                if target is None:
+                    break
+                tc, tp = target
+                prof.data_port_connectors.append(DataPortConnector(
+                    connector_id=_uuid(rng),
+                    name='{0}_{1}_{2}_{3}'.format(c.instance_name, p.name,
+                                                  tc.instance_name, tp.name),
+                    data_type=_choice(rng, DATA_TYPES),
+                    interface_type='corba_cdr',
+                    data_flow_type='push',
+                    subscription_type=_choice(rng, ['flush', 'new',
+                                                  'periodic']),
+                    source_data_port=TargetPort(c.id, c.instance_name,
+                                                p.name),
+                    target_data_port=TargetPort(tc.id, tc.instance_name,
+                                                tp.name)))
+        for p in c.service_ports:
+            if not p.name.startswith('provided') or rng.random() < 0.5:
+                continue
+            target = _nearby(rng, comps, ii, 'required')
+            if target is None:
+                continue
+            tc, tp = target
+            prof.service_port_connectors.append(ServicePortConnector(
+                connector_id=_uuid(rng),
+                name='{0}_{1}_{2}_{3}'.format(c.instance_name, p.name,
+                                              tc.instance_name, tp.name),
+                source_service_port=TargetPort(c.id, c.instance_name, p.name),
+                target_service_port=TargetPort(tc.id, tc.instance_name,
+                                               tp.name)))
+
+    for ii in range(0, num_comps, 50):
+        members = [TargetComponent(c.id, c.instance_name)
+                   for c in comps[ii:ii + 5]]
+        prof.groups.append(ComponentGroup('group{0}'.format(ii // 50),
+                                          members))
+
+    prof.startup = StartUp(_make_conditions(rng, comps))
+    prof.shutdown = ShutDown(_make_conditions(rng, list(reversed(comps))))
+    prof.activation = Activation(_make_conditions(rng, comps))
+    prof.deactivation = Deactivation(_make_conditions(rng,
+                                                      list(reversed(comps))))
+    return prof
+
+
+def main(argv):
+    '''Write a generated profile to a file.'''
+    parser = optparse.OptionParser(
+            usage='%prog [options] <number of components> <file>',
+            description='Write a generated profile to a file.')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='Seed of the generator [Default: %default]')
+    parser.add_option('-f', '--format', dest='format', default='xml',
+                      help='xml, yaml or json [Default: %default]')
+    options, args = parser.parse_args(argv[1:])
+    if len(args) != 2:
+        parser.error('Wrong number of arguments.')
+    prof = generate_profile(int(args[0]), options.seed)
+    if options.format == 'yaml':
+        content = prof.save_to_yaml()
+    elif options.format == 'json':
+        content = prof.save_to_json()
+    else:
+        content = prof.save_to_xml()
+    f = open(args[1], 'w')
+    try:
+        f.write(content)
+    finally:
+        f.close()
+    return 0
+
+
+##############################################################################
+## Private functions
+
+def _make_kind(rng, k):
+    # Choose the ID, ports and configuration parameters of a kind of component
+    return {'id': 'RTC:Vendor{0}:Category{1}:Kind{2}:1.0.{3}'.format(
+                _randint(rng, 0, 4), _randint(rng, 0, 9), k,
+                _randint(rng, 0, 2)),
+            'name': 'Kind{0}'.format(k),
+            'in': _randint(rng, 0, 3),
+            'out': _randint(rng, 0, 3),
+            'provided': _randint(rng, 0, 1),
+            'required': _randint(rng, 0, 1),
+            'config_sets': _randint(rng, 1, 3),
+            'params': ['param{0}'.format(p)
+                       for p in range(_randint(rng, 1, 8))]}
+
+
+def _make_component(rng, ii, kind):
+    # Make one component of a kind
+    c = Component(id=kind['id'],
+                  path_uri='/localhost/host{0}.host_cxt/{1}{2}.rtc'.format(
+                      ii % 16, kind['name'], ii),
+                  active_configuration_set='default',
+                  instance_name='{0}_{1}'.format(kind['name'], ii),
+                  is_required=rng.random() < 0.8,
+                  location=Location(x=(ii % 40) * 120, y=(ii // 40) * 90,
+                                    height=60, width=80,
+                                    direction=_choice(rng, [direction.RIGHT,
+                                                          direction.LEFT])))
+    for p in range(kind['in']):
+        c.data_ports.append(DataPort(name='in{0}'.format(p)))
+    for p in range(kind['out']):
+        c.data_ports.append(DataPort(name='out{0}'.format(p)))
+    for p in range(kind['provided']):
+        c.service_ports.append(ServicePort(name='provided{0}'.format(p)))
+    for p in range(kind['required']):
+        c.service_ports.append(ServicePort(name='required{0}'.format(p)))
+    for s in range(kind['config_sets']):
+        if s == 0:
+            cs = ConfigurationSet('default')
+        else:
+            cs = ConfigurationSet('mode{0}'.format(s))
+        for name in kind['params']:
+            cs.configuration_data.append(ConfigurationData(name,
+                    str(_randint(rng, 0, 999))))
+        c.configuration_sets.append(cs)
+    c.execution_contexts.append(ExecutionContext('default',
+            'PeriodicExecutionContext', _choice(rng, EC_RATES)))
+    if rng.random() < 0.1:
+        c.properties['host'] = 'host{0}'.format(ii % 16)
+    return c
+
+
+def _nearby(rng, comps, ii, prefix):
+    # Choose a port with a name starting with prefix on a component near
+    # component ii, returning (component, port), or None if there is none
+    for attempt in range(5):
+        jj = (ii + _randint(rng, 1, CONNECTION_SPAN)) % len(comps)
+        if jj == ii:
+            continue
+        c = comps[jj]
+        ports = [p for p in c.data_ports + c.service_ports
+                 if p.name.startswith(prefix)]
+        if ports:
+            return c, _choice(rng, ports)
+    return None
+
+
+def _make_conditions(rng, comps):
+    # Make one condition for each component, in order
+    conds = []
+    for seq, c in enumerate(comps):
+        target = TargetExecutionContext(c.id, c.instance_name, 'default')
+        r = rng.random()
+        if r < 0.1:
+            conds.append(WaitTime(wait_time=_randint(rng, 100, 999),
+                                  sequence=seq, target_component=target))
+        elif r < 0.2 and seq > 0:
+            preceding = [TargetExecutionContext(p.id, p.instance_name,
+                                                'default')
+                         for p in _sample(rng, comps[max(0, seq - 10):seq],
+                                             min(seq, _randint(rng, 1, 3)))]
+            conds.append(Preceding(sequence=seq, target_component=target,
+                                   timeout=1000, sending_timing='SYNC',
+                                   preceding_components=preceding))
+        else:
+            conds.append(Condition(sequence=seq, target_component=target))
+    return conds
+
+
+def _randint(rng, a, b):
+    # A random integer from a to b inclusive. Only rng.random() is used to
+    # draw values, as it gives the same values for a seed on Python 2 and 3,
+    # and randrange, randint, choice, sample and getrandbits may not.
+    return a + int(rng.random() * (b - a + 1))
+
+
+def _choice(rng, seq):
+    # A random item of a sequence
+    return seq[int(rng.random() * len(seq))]
+
+
+def _sample(rng, population, k):
+    # k different random items of a sequence
+    pool = list(population)
+    return [pool.pop(int(rng.random() * len(pool))) for ii in range(k)]
+
+
+def _bits(rng, n):
+    # A random integer of n bits, for n up to 53
+    return int(rng.random() * (1 << n))
+
+
+def _uuid(rng):
+    # A connector ID in the form of a random UUID
+    return '{0:08x}-{1:04x}-4{2:03x}-{3:04x}-{4:012x}'.format(
+            _bits(rng, 32), _bits(rng, 16), _bits(rng, 12),
+            0x8000 | _bits(rng, 14), _bits(rng, 48))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79
@@ -0,0 +1,199 @@
+# -*- Python -*-
+# -*- coding: utf-8 -*-
+
+'''rtsprofile
+
+Copyright (C) 2009-2015
+    Geoffrey Biggs
+    RT-Synthesis Research Group
+    Intelligent Systems Research Institute,
+    National Institute of Advanced Industrial Science and Technology (AIST),
+    Japan
+    All rights reserved.
+Licensed under the GNU Lesser General Public License version 3.
+http://www.gnu.org/licenses/lgpl-3.0.en.html
+
+File: test_executor.py
+
+Test of the lifecycle executor against mock components. The tests are
+skipped if asyncio is not available (Python 3.4 or later is needed).
+
+'''
+
+from __future__ import print_function
+
+__version__ = '$Revision: $'
+# $Source$
+
+
+import sys
+try:
+    from unittest import SkipTest
+except ImportError:
+    # Python 2.6
+    from nose.plugins.skip import SkipTest
+
+from rtsprofile.executor import DONE, FAILED, SKIPPED, LifecycleExecutor, \
+                                MockDriver
+from rtsprofile.lifecycle import ASYNC, analyze_critical_path
+from rtsprofile.rts_profile import RtsProfile
+
+from profile_generator import generate_profile
+
+
+# A profile millisecond is this many seconds, so that the tests run quickly
+SCALE = 0.0002
+# Allowed lateness of the event loop, in profile milliseconds
+SLACK = 100
+
+
+def require_asyncio():
+    try:
+        import asyncio
+    except ImportError:
+        raise SkipTest('asyncio is not available')
+
+
+def run(ms, action, strict_sequence=False, **kwargs):
+    driver = MockDriver(time_scale=SCALE, **kwargs)
+    executor = LifecycleExecutor(driver, strict_sequence=strict_sequence,
+                                 time_scale=SCALE)
+    return driver, executor.run(ms, action)
+
+
+def check_order(report, strict_sequence=False):
+    # Check that every step started no earlier than the steps it waits for
+    # allowed, and was sent after its wait time
+    errors = []
+    for r in report.results:
+        if r.state != DONE:
+            continue
+        if r.sent < r.start + r.step.wait_time - 1e-6:
+            errors.append('{0} sent before its wait time'.format(r))
+        for d, timing in r.step.dependencies:
+            p = report.result(d)
+            if timing == ASYNC:
+                allowed = p.sent
+            elif d in r.timed_out:
+                allowed = p.sent + r.step.timeout
+            else:
+                allowed = p.finished
+            if r.start < allowed - 1e-6:
+                errors.append('{0} started before {1}'.format(r, p))
+        if strict_sequence:
+            for p in report.results:
+                if p.step.sequence < r.step.sequence and \
+                        r.start < p.finished - 1e-6:
+                    errors.append('{0} started before {1}'.format(r, p))
+    return errors
+
+
+def test_sample():
+    require_asyncio()
+    errors = []
+    prof = RtsProfile(xml_spec=open('test/rtsystem.xml').read())
+    driver, report = run(prof.startup, 'startup')
+    if not report.succeeded or len(driver.calls) != 3:
+        errors.append('Start up did not act on all components')
+    errors += check_order(report)
+    for r in report.results:
+        if abs(r.sent - r.step.wait_time) > SLACK:
+            errors.append('{0} not sent after its wait time'.format(r))
+
+    # The first component to shut down takes longer than the timeout
+    driver, report = run(prof.shutdown, 'shutdown',
+                         latencies={'SampleComponent3_1': 1000})
+    first, second, third = report.results
+    if second.timed_out != [first.target]:
+        errors.append('Shut down did not time out: {0}'.format(report))
+    if not report.succeeded:
+        errors.append('Shut down failed: {0}'.format(report))
+    if abs(report.duration - 1300) > SLACK:
+        errors.append('Shut down took {0} ms'.format(report.duration))
+    errors += check_order(report)
+
+    # A failure skips the components waiting for it
+    driver, report = run(prof.shutdown, 'shutdown',
+                         failures=['SampleComponent3_1'])
+    states = [r.state for r in report.results]
+    if states != [FAILED, SKIPPED, SKIPPED] or len(driver.calls) != 1:
+        errors.append('Failure did not skip: {0}'.format(report))
+    assert not errors, '\n'.join(errors)
+
+
+def test_generated():
+    require_asyncio()
+    errors = []
+    prof = generate_profile(300)
+    for strict in (False, True):
+        driver, report = run(prof.activation, 'activation', strict,
+                             latency=5)
+        if not report.succeeded:
+            errors.append('Activation failed: {0}'.format(report))
+        errors += check_order(report, strict)
+        a = analyze_critical_path(prof, actions=('activation',),
+                                  strict_sequence=strict, action_time=5)
+        if report.duration < a.makespan - 1e-6:
+            errors.append('Finished in {0} ms, before the makespan of {1} '
+                          'ms'.format(report.duration, a.makespan))
+        if not strict and report.duration > a.makespan * 1.5 + SLACK:
+            errors.append('Finished in {0} ms, long after the makespan of '
+                          '{1} ms'.format(report.duration, a.makespan))
+        if driver.max_active != report.max_in_flight:
+            errors.append('Driver saw {0} in flight, executor {1}'.format(
+                    driver.max_active, report.max_in_flight))
+    assert not errors, '\n'.join(errors)
+
+
+def test_cancel():
+    require_asyncio()
+    import asyncio
+    errors = []
+    prof = generate_profile(50)
+    driver = MockDriver(latency=1000, time_scale=SCALE)
+    executor = LifecycleExecutor(driver, time_scale=SCALE)
+    loop = asyncio.new_event_loop()
+    try:
+        future = executor.execute(prof.activation, 'activation', loop)
+        loop.run_until_complete(asyncio.sleep(10 * SCALE))
+        future.cancel()
+        loop.run_until_complete(asyncio.sleep(2000 * SCALE))
+        if driver.active:
+            errors.append('{0} actions left after cancelling'.format(
+                    driver.active))
+        if len(driver.calls) == len(prof.activation.targets):
+            errors.append('Cancelling did not stop any actions')
+    finally:
+        loop.close()
+    assert not errors, '\n'.join(errors)
+
+
+def main(argv):
+    print('''This test executes the actions of the sample profile and generated profiles
+with mock components, and checks that each step starts only once the steps it
+waits for allow, that timeouts, failures and cancelling are handled, and that
+the time taken agrees with the critical path analysis.
+''')
+    failed = False
+    for test in (test_sample, test_generated, test_cancel):
+        try:
+            test()
+        except SkipTest as e:
+            print('{0} skipped: {1}'.format(test.__name__, e))
+        except AssertionError as e:
+            print(e, file=sys.stderr)
+            print('{0} failed.'.format(test.__name__), file=sys.stderr)
+            failed = True
+        else:
+            print('{0} passed.'.format(test.__name__))
+    if failed:
+        return 1
+    print('Tests passed.', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+
+# vim: tw=79